@@ -1,22 +1,86 @@
 import json
+from urllib.parse import parse_qs
+
 from channels.generic.websocket import WebsocketConsumer
 from asgiref.sync import async_to_sync
 
+from .fanout import ALERTS_GROUP
+
+
+def _id_set(values):
+    ids = set()
+    for value in values or ():
+        for part in str(value).split(','):
+            if part.strip().isdigit():
+                ids.add(int(part))
+    return ids or None
+
+
+def _name_set(values):
+    names = {part.strip().lower() for value in values or () for part in str(value).split(',') if part.strip()}
+    return names or None
+
+
 class AlertConsumer(WebsocketConsumer):
+    """Dashboard alert feed.
+
+    Clients receive ``alert.batch`` frames of alert summaries, optionally
+    limited to some cameras and severities: ``?camera=1,2&severity=high`` on
+    connect, or ``{"filter": {"cameras": [1, 2], "severities": ["high"]}}``
+    at any time (empty or null means all). ``{"action": "detail", "id": n}``
+    returns the full alert, payload included, as ``alert.detail``.
+    """
+
     def connect(self):
-        async_to_sync(self.channel_layer.group_add)('alerts', self.channel_name)
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        self.cameras = _id_set(query.get('camera'))
+        self.severities = _name_set(query.get('severity'))
+        async_to_sync(self.channel_layer.group_add)(ALERTS_GROUP, self.channel_name)
         self.accept()
 
     def disconnect(self, close_code):
-        async_to_sync(self.channel_layer.group_discard)('alerts', self.channel_name)
+        async_to_sync(self.channel_layer.group_discard)(ALERTS_GROUP, self.channel_name)
 
-    def alert_new(self, event):
-        self.send(text_data=json.dumps({
-            'type': 'alert.new',
-            'alert': event['alert'],
-        }))
+    def receive(self, text_data=None, bytes_data=None):
+        if not text_data:
+            return
+        try:
+            msg = json.loads(text_data)
+        except json.JSONDecodeError:
+            return
+        if not isinstance(msg, dict):
+            return
+        if isinstance(msg.get('filter'), dict):
+            self.cameras = _id_set(msg['filter'].get('cameras'))
+            self.severities = _name_set(msg['filter'].get('severities'))
+        if msg.get('action') == 'detail':
+            self._send_detail(msg.get('id'))
+
+    def _send_detail(self, alert_id):
+        from .models import Alert
+        from .serializers import AlertSerializer
+
+        alert = Alert.objects.select_related('camera').filter(pk=alert_id).first() if str(alert_id).isdigit() else None
+        if alert is None:
+            self.send(text_data=json.dumps({'type': 'alert.detail', 'id': alert_id, 'error': 'not found'}))
+            return
+        self.send(text_data=json.dumps({'type': 'alert.detail', 'alert': AlertSerializer(alert).data}))
+
+    def _wants(self, camera_id, severity):
+        return (
+            (self.cameras is None or camera_id in self.cameras)
+            and (self.severities is None or severity in self.severities)
+        )
+
+    def alert_batch(self, event):
+        # Summaries arrive pre-encoded; only the envelope is built per client.
+        parts = [entry['json'] for entry in event['alerts'] if self._wants(entry['camera_id'], entry['severity'])]
+        if parts:
+            self.send(text_data='{"type": "alert.batch", "alerts": [' + ', '.join(parts) + ']}')
 
     def alert_acknowledged(self, event):
+        if not self._wants(event.get('camera_id'), event.get('severity')):
+            return
         self.send(text_data=json.dumps({
             'type': 'alert.acknowledged',
             'alert_id': event['alert_id'],
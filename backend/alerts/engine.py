@@ -0,0 +1,220 @@
+"""In-memory alert cooldown and coalescing.
+
+``AlertEngine`` tracks every open alert by the violations it covers: a
+(camera, model, worker track) subject, see ``violation_subjects``. A
+detection whose subjects all belong to open alerts is coalesced into them
+(``occurrence_count`` and ``last_seen_at`` are bumped through the
+persistence queue) instead of creating a row; only subjects not seen within
+``ALERT_COOLDOWN_SECONDS`` open a new alert. The cooldown check itself never
+queries the database.
+
+An entry expires ``ALERT_COOLDOWN_SECONDS`` after its subject was last seen.
+Expiry is kept in a heap and processed lazily on each call; an entry that
+was extended in the meantime is pushed back with its new deadline.
+
+Track IDs do not survive a restart, so the open alerts rebuilt from the
+database on first use are bound to the first subjects their camera and
+model report again.
+"""
+import heapq
+import itertools
+import threading
+import time
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+class _Entry:
+    __slots__ = ("alert", "camera_id", "model_key", "subjects", "expires_at")
+
+    def __init__(self, alert, camera_id, model_key, expires_at):
+        # Queued alerts have no primary key until the persistence queue flushes.
+        self.alert = alert
+        self.camera_id = camera_id
+        self.model_key = model_key
+        self.subjects = set()
+        self.expires_at = expires_at
+
+
+def violation_subjects(model_key, payload):
+    """Face tracks in violation, or ``{None}`` when the model is untracked.
+
+    Fatigue reports a track per face; PPE boxes carry no track identity, so
+    PPE alerts cool down per camera and model.
+    """
+    payload = payload or {}
+    subjects = set()
+    if model_key == 'fatigue':
+        for face in payload.get('faces') or [payload]:
+            if face.get('detected', face.get('is_fatigued')):
+                subjects.add(face.get('track_id'))
+    subjects.discard(None)
+    return subjects or {None}
+
+
+class AlertEngine:
+    def __init__(self, cooldown_seconds):
+        self.cooldown_seconds = float(cooldown_seconds)
+        self._lock = threading.Lock()
+        # Serialises the one-off rebuild; held across its query, unlike _lock.
+        self._load_lock = threading.Lock()
+        self._by_subject = {}
+        self._by_alert = {}
+        self._unbound = {}
+        self._heap = []
+        self._order = itertools.count()
+        self._loaded = False
+        self._stats = {"created": 0, "coalesced": 0, "expired": 0}
+
+    # --- state ----------------------------------------------------------------
+
+    def _push(self, entry):
+        heapq.heappush(self._heap, (entry.expires_at, next(self._order), entry))
+
+    def _expire(self, now):
+        while self._heap and self._heap[0][0] <= now:
+            _, _, entry = heapq.heappop(self._heap)
+            if self._by_alert.get(id(entry.alert)) is not entry:
+                continue
+            if entry.expires_at > now:
+                self._push(entry)
+                continue
+            self._drop(entry)
+            self._stats["expired"] += 1
+
+    def _drop(self, entry):
+        if self._by_alert.get(id(entry.alert)) is entry:
+            del self._by_alert[id(entry.alert)]
+        for subject in entry.subjects:
+            if self._by_subject.get((entry.camera_id, entry.model_key, subject)) is entry:
+                del self._by_subject[(entry.camera_id, entry.model_key, subject)]
+        key = (entry.camera_id, entry.model_key)
+        if self._unbound.get(key) is entry:
+            del self._unbound[key]
+
+    def _register(self, alert, camera_id, model_key, subjects, expires_at):
+        entry = _Entry(alert, camera_id, model_key, expires_at)
+        self._by_alert[id(alert)] = entry
+        for subject in subjects:
+            self._bind(entry, subject)
+        self._push(entry)
+        return entry
+
+    def _bind(self, entry, subject):
+        entry.subjects.add(subject)
+        self._by_subject[(entry.camera_id, entry.model_key, subject)] = entry
+
+    def load(self):
+        """Rebuild open, still-cooling-down alerts from the database."""
+        from .models import Alert
+
+        now_wall = timezone.now()
+        now = time.monotonic()
+        since = now_wall - timedelta(seconds=self.cooldown_seconds)
+        recent = Alert.objects.filter(Q(last_seen_at__gte=since) | Q(created_at__gte=since), status='open')
+        rows = list(recent.only('id', 'camera_id', 'model_key', 'created_at', 'last_seen_at'))
+        with self._lock:
+            for alert in rows:
+                age = (now_wall - (alert.last_seen_at or alert.created_at)).total_seconds()
+                if age >= self.cooldown_seconds:
+                    continue
+                key = (alert.camera_id, alert.model_key)
+                entry = self._register(alert, *key, (), now + self.cooldown_seconds - age)
+                previous = self._unbound.get(key)
+                if previous is None or previous.expires_at < entry.expires_at:
+                    self._unbound[key] = entry
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load()
+
+    def forget_alert(self, alert_id):
+        """Stop coalescing into ``alert_id`` (e.g. once it is acknowledged)."""
+        with self._lock:
+            for entry in [entry for entry in self._by_alert.values() if entry.alert.pk == alert_id]:
+                self._drop(entry)
+
+    def discard(self, alert):
+        """Stop coalescing into a queued ``alert`` whose row was never written."""
+        with self._lock:
+            entry = self._by_alert.get(id(alert))
+            if entry is not None:
+                self._drop(entry)
+
+    # --- decisions ------------------------------------------------------------
+
+    def _claim(self, camera_id, model_key, subjects, now):
+        """Split ``subjects`` into open entries to coalesce into and new subjects."""
+        self._expire(now)
+        open_entries = {}
+        fresh = set()
+        for subject in subjects:
+            entry = self._by_subject.get((camera_id, model_key, subject))
+            if entry is None:
+                entry = self._unbound.get((camera_id, model_key))
+                if entry is not None:
+                    self._bind(entry, subject)
+            if entry is None:
+                fresh.add(subject)
+                continue
+            entry.expires_at = now + self.cooldown_seconds
+            open_entries[id(entry.alert)] = entry
+        return open_entries, fresh
+
+    def observe(self, camera, model_key, payload, create):
+        """Record a violation; ``create(subjects)`` queues a new alert for the
+        subjects no open alert covers (``None`` for an untracked model).
+
+        Returns the new alert, or ``None`` when every subject was coalesced
+        into an open alert.
+        """
+        from .persistence import get_persistence_queue
+
+        self._ensure_loaded()
+        subjects = violation_subjects(model_key, payload)
+        now = time.monotonic()
+        with self._lock:
+            open_entries, fresh = self._claim(camera.id, model_key, subjects, now)
+            self._stats["coalesced"] += len(open_entries)
+
+        seen_at = timezone.now()
+        for entry in open_entries.values():
+            get_persistence_queue().record_occurrence(entry.alert, seen_at)
+        if not fresh:
+            return None
+
+        alert = create(fresh)
+        if alert is None:
+            return None
+        with self._lock:
+            self._register(alert, camera.id, model_key, fresh, now + self.cooldown_seconds)
+            self._stats["created"] += 1
+        return alert
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["open_alerts"] = len(self._by_alert)
+            stats["tracked_subjects"] = len(self._by_subject)
+        return stats
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_alert_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from .services import ALERT_COOLDOWN_SECONDS
+
+                _engine = AlertEngine(ALERT_COOLDOWN_SECONDS)
+    return _engine
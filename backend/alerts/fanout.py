@@ -0,0 +1,112 @@
+"""Batched, slim alert broadcasts to dashboard WebSockets.
+
+``AlertFanout`` turns each new alert into a small summary (no detection
+payload; fatigue payloads carry every face landmark) serialised to JSON
+once, and collects summaries for ``ALERT_BROADCAST_WINDOW_MS`` before
+sending them to the ``alerts`` group as a single ``alert.batch`` event.
+Each ``AlertConsumer`` drops the summaries outside its client's camera and
+severity filters and joins the rest into one frame without re-encoding.
+The full alert, payload included, is fetched on demand by id (over the
+socket or ``GET /api/v1/alerts/<id>/``).
+"""
+import json
+import threading
+from typing import Dict, List
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+ALERTS_GROUP = 'alerts'
+
+
+def _camera_name(alert):
+    from detection.config_snapshot import get_config_snapshot
+
+    from .models import Alert
+
+    if Alert.camera.is_cached(alert):
+        return alert.camera.name
+    return get_config_snapshot().camera_name(alert.camera_id)
+
+
+def alert_summary(alert) -> Dict:
+    return {
+        'id': alert.id,
+        'severity': alert.severity,
+        'model_key': alert.model_key,
+        'camera_id': alert.camera_id,
+        'camera_name': _camera_name(alert),
+        'message': alert.message,
+        'status': alert.status,
+        'occurrence_count': alert.occurrence_count,
+        'created_at': alert.created_at.isoformat(),
+    }
+
+
+def _entry(alert) -> Dict:
+    return {
+        'camera_id': alert.camera_id,
+        'severity': alert.severity,
+        'json': json.dumps(alert_summary(alert)),
+    }
+
+
+class AlertFanout:
+    def __init__(self, window_ms: int = 200):
+        self.window_seconds = max(0, int(window_ms)) / 1000.0
+        self._lock = threading.Lock()
+        self._entries = []
+        self._timer = None
+        self._stats = {"alerts": 0, "batches": 0, "largest_batch": 0}
+
+    def publish(self, alerts: List) -> None:
+        entries = [_entry(alert) for alert in alerts]
+        if not entries:
+            return
+        with self._lock:
+            self._entries.extend(entries)
+            if self.window_seconds and self._timer is None:
+                self._timer = threading.Timer(self.window_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if not self.window_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            entries, self._entries = self._entries, []
+            timer, self._timer = self._timer, None
+            if timer is not None and timer is not threading.current_thread():
+                timer.cancel()
+            if entries:
+                self._stats["alerts"] += len(entries)
+                self._stats["batches"] += 1
+                self._stats["largest_batch"] = max(self._stats["largest_batch"], len(entries))
+        if not entries:
+            return
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(ALERTS_GROUP, {'type': 'alert.batch', 'alerts': entries})
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._entries)
+        stats["window_ms"] = int(self.window_seconds * 1000)
+        return stats
+
+
+_fanout = None
+_fanout_lock = threading.Lock()
+
+
+def get_alert_fanout():
+    global _fanout
+    if _fanout is None:
+        with _fanout_lock:
+            if _fanout is None:
+                from config import ALERT_BROADCAST_WINDOW_MS
+
+                _fanout = AlertFanout(ALERT_BROADCAST_WINDOW_MS)
+    return _fanout
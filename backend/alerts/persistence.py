@@ -0,0 +1,222 @@
+"""Write-behind persistence for detections and alerts raised by inference.
+
+Inference threads hand unsaved ``Detection``/``Alert`` instances to a
+``PersistenceQueue`` instead of inserting them one by one, so a busy SQLite
+writer never stalls a camera. A writer thread inserts everything queued with
+``bulk_create`` in one short transaction whenever ``batch_size`` rows are
+waiting or ``flush_interval_ms`` has passed. Occurrences coalesced into an
+open alert are summed per alert and written as one UPDATE per flush (or
+folded into the INSERT when the alert itself is still queued).
+
+Memory is bounded by ``max_pending``: a full queue makes the submitting
+thread wait up to ``block_ms`` for the writer, then drops the row; both are
+counted in ``stats``. Alerts are broadcast once their rows are committed.
+``close`` (also run at interpreter exit) flushes whatever is still queued.
+"""
+import atexit
+import logging
+import threading
+import time
+from typing import Dict
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class PersistenceQueue:
+    def __init__(self, batch_size: int = 64, flush_interval_ms: int = 250, max_pending: int = 2048, block_ms: int = 50):
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0, int(flush_interval_ms)) / 1000.0
+        self.max_pending = max(1, int(max_pending))
+        self.block_seconds = max(0, int(block_ms)) / 1000.0
+        self._pending = []
+        self._occurrences = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._exit_hook = False
+        self._stats = {
+            "flushes": 0,
+            "detections_written": 0,
+            "alerts_written": 0,
+            "occurrences_written": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "high_water": 0,
+            "blocked": 0,
+            "blocked_ms": 0.0,
+            "dropped": 0,
+            "failed": 0,
+        }
+
+    @property
+    def write_through(self) -> bool:
+        return self.flush_interval == 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._closed = False
+                self._thread = threading.Thread(target=self._loop, name="alert-persistence", daemon=True)
+                self._thread.start()
+                if not self._exit_hook:
+                    atexit.register(self.close)
+                    self._exit_hook = True
+
+    def submit(self, detection=None, alert=None) -> bool:
+        """Queue an unsaved detection and/or alert; ``False`` if it was dropped.
+
+        A detection that already has a primary key is only used as the
+        alert's foreign key.
+        """
+        if not self.write_through:
+            self._ensure_started()
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self._stats["blocked"] += 1
+                self._cond.notify_all()
+                started = time.monotonic()
+                has_room = self._cond.wait_for(lambda: len(self._pending) < self.max_pending, self.block_seconds)
+                self._stats["blocked_ms"] = round(self._stats["blocked_ms"] + (time.monotonic() - started) * 1000.0, 1)
+                if not has_room:
+                    self._stats["dropped"] += 1
+                    return False
+            self._pending.append((detection, alert))
+            self._stats["high_water"] = max(self._stats["high_water"], len(self._pending))
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        if self.write_through:
+            self.flush()
+        return True
+
+    def record_occurrence(self, alert, seen_at) -> None:
+        """Count one more occurrence of ``alert`` (queued or already written)."""
+        if not self.write_through:
+            self._ensure_started()
+        with self._cond:
+            _, count, _ = self._occurrences.get(id(alert), (alert, 0, None))
+            self._occurrences[id(alert)] = (alert, count + 1, seen_at)
+        if self.write_through:
+            self.flush()
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._pending) >= self.batch_size, self.flush_interval)
+                closed = self._closed
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Alert persistence flush failed")
+            if closed:
+                return
+
+    def flush(self) -> int:
+        """Write everything queued now; returns the number of rows inserted."""
+        from detection.models import Detection
+
+        from .engine import get_alert_engine
+        from .models import Alert
+        from .services import broadcast_alerts
+
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+                occurrences, self._occurrences = self._occurrences, {}
+                self._cond.notify_all()
+            if not batch and not occurrences:
+                return 0
+
+            detections = [detection for detection, _ in batch if detection is not None and detection.pk is None]
+            alerts = [alert for _, alert in batch if alert is not None]
+            queued = {id(alert) for alert in alerts}
+            updates = []
+            for alert, count, seen_at in occurrences.values():
+                if alert.pk is not None:
+                    updates.append((alert, count, seen_at))
+                elif id(alert) in queued:
+                    alert.occurrence_count += count
+                    alert.last_seen_at = seen_at
+                # else: its insert failed in an earlier flush; nothing to count.
+
+            started = time.monotonic()
+            released = []
+            try:
+                with transaction.atomic():
+                    Detection.objects.bulk_create(detections)
+                    Alert.objects.bulk_create(alerts)
+                    for alert, count, seen_at in updates:
+                        updated = Alert.objects.filter(pk=alert.pk, status='open').update(
+                            occurrence_count=F('occurrence_count') + count,
+                            last_seen_at=seen_at,
+                        )
+                        if not updated:
+                            released.append(alert.pk)
+            except Exception:
+                logger.exception("Dropping %d detection/alert rows that failed to persist", len(batch))
+                with self._cond:
+                    self._stats["failed"] += len(batch)
+                for alert in alerts:
+                    get_alert_engine().discard(alert)
+                return 0
+
+            with self._cond:
+                self._stats["flushes"] += 1
+                self._stats["detections_written"] += len(detections)
+                self._stats["alerts_written"] += len(alerts)
+                self._stats["occurrences_written"] += len(updates)
+                self._stats["last_batch_size"] = len(batch)
+                self._stats["last_flush_ms"] = round((time.monotonic() - started) * 1000.0, 1)
+
+        # Acknowledged or deleted elsewhere: the next repeat raises a new alert.
+        for alert_id in released:
+            get_alert_engine().forget_alert(alert_id)
+        if alerts:
+            broadcast_alerts(alerts)
+        return len(detections) + len(alerts)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the writer thread after a final flush."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+            stats["pending_occurrences"] = len(self._occurrences)
+        stats["batch_size"] = self.batch_size
+        stats["flush_interval_ms"] = int(self.flush_interval * 1000)
+        stats["max_pending"] = self.max_pending
+        return stats
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_persistence_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                from config import PERSIST_BATCH_SIZE, PERSIST_BLOCK_MS, PERSIST_FLUSH_INTERVAL_MS, PERSIST_MAX_PENDING
+
+                _queue = PersistenceQueue(
+                    batch_size=PERSIST_BATCH_SIZE,
+                    flush_interval_ms=PERSIST_FLUSH_INTERVAL_MS,
+                    max_pending=PERSIST_MAX_PENDING,
+                    block_ms=PERSIST_BLOCK_MS,
+                )
+    return _queue
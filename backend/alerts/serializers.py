@@ -9,5 +9,5 @@ class AlertSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'detection', 'camera', 'camera_name', 'model_key',
             'severity', 'status', 'message', 'payload',
-            'created_at', 'acknowledged_at',
+            'created_at', 'acknowledged_at', 'occurrence_count', 'last_seen_at',
         ]
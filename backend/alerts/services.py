@@ -1,8 +1,8 @@
 from django.utils import timezone
-from datetime import timedelta
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from .engine import get_alert_engine
+from .fanout import get_alert_fanout
 from .models import Alert
+from .persistence import get_persistence_queue
 from config import DEFAULT_ALERT_CONFIDENCE_THRESHOLD
 from detection.models import Detection
 
@@ -21,9 +21,9 @@ ALERT_COOLDOWN_SECONDS = 15
 
 
 def _resolve_alert_severity(camera_id, model_key):
-    from .models import CameraAlertSeverity
+    from detection.config_snapshot import get_config_snapshot
 
-    override = CameraAlertSeverity.objects.filter(camera_id=camera_id, model_key=model_key).values_list('severity', flat=True).first()
+    override = get_config_snapshot().alert_severity(camera_id, model_key)
     if override:
         return override
     return SEVERITY_MAP.get(model_key, 'low')
@@ -61,32 +61,30 @@ def _build_alert_message(model_key, payload):
     return f"{model_key.capitalize()} violation detected"
 
 
-def _should_emit_alert(camera_id, model_key):
-    since = timezone.now() - timedelta(seconds=ALERT_COOLDOWN_SECONDS)
-    return not Alert.objects.filter(
-        camera_id=camera_id,
-        model_key=model_key,
-        status='open',
-        created_at__gte=since,
-    ).exists()
-
 def create_alert(camera, model_key, message, detection=None, payload=None):
+    """Queue an alert (and its unsaved detection) for write-behind persistence.
+
+    A summary is broadcast once its row is committed; returns the pending
+    ``Alert``, or ``None`` if the persistence queue was full."""
     severity = _resolve_alert_severity(camera.id, model_key)
-    alert = Alert.objects.create(
+    alert = Alert(
         detection=detection,
         camera=camera,
         model_key=model_key,
         severity=severity,
         message=message,
         payload=payload or {},
+        last_seen_at=timezone.now(),
     )
-    broadcast_alert(alert)
+    if not get_persistence_queue().submit(detection=detection, alert=alert):
+        return None
     return alert
 
 
 def create_alert_from_inference(camera, model_key, result, detection=None):
-    """Persist a Detection+Alert when a model reports an actionable event.
-    Applies confidence threshold + cooldown to avoid duplicate spam."""
+    """Queue a Detection+Alert when a model reports an actionable event.
+    Applies confidence threshold; repeats within the cooldown are coalesced
+    into the open alert by the alert engine instead of creating new rows."""
     if not result or result.get('status') != 'ok' or not bool(result.get('detected')):
         return None
 
@@ -94,47 +92,28 @@ def create_alert_from_inference(camera, model_key, result, detection=None):
     if confidence < DEFAULT_ALERT_CONFIDENCE_THRESHOLD and model_key != 'fatigue':
         return None
 
-    if not _should_emit_alert(camera.id, model_key):
-        return None
-
     payload = result.get('payload') or {}
-    if detection is None:
-        detection = Detection.objects.create(
+
+    def _create(subjects):
+        # Record which tracks opened this alert; the payload lists every face,
+        # including ones already covered by other open alerts.
+        track_ids = sorted(subject for subject in subjects if subject is not None)
+        return create_alert(
             camera=camera,
             model_key=model_key,
-            payload=payload,
-            confidence=confidence,
-            status=result.get('status', 'ok'),
-            detected=bool(result.get('detected')),
+            message=_build_alert_message(model_key, payload),
+            detection=detection or Detection(
+                camera=camera,
+                model_key=model_key,
+                payload=payload,
+                confidence=confidence,
+                status=result.get('status', 'ok'),
+                detected=bool(result.get('detected')),
+            ),
+            payload={**payload, 'track_ids': track_ids} if track_ids else payload,
         )
 
-    message = _build_alert_message(model_key, payload)
-    return create_alert(
-        camera=camera,
-        model_key=model_key,
-        message=message,
-        detection=detection,
-        payload=payload,
-    )
+    return get_alert_engine().observe(camera, model_key, payload, _create)
 
-def broadcast_alert(alert):
-    channel_layer = get_channel_layer()
-    if channel_layer is None:
-        return
-    async_to_sync(channel_layer.group_send)(
-        'alerts',
-        {
-            'type': 'alert.new',
-            'alert': {
-                'id': alert.id,
-                'severity': alert.severity,
-                'model_key': alert.model_key,
-                'camera_id': alert.camera_id,
-                'camera_name': alert.camera.name,
-                'message': alert.message,
-                'payload': alert.payload,
-                'status': alert.status,
-                'created_at': alert.created_at.isoformat(),
-            }
-        }
-    )
+def broadcast_alerts(alerts):
+    get_alert_fanout().publish(alerts)
@@ -14,6 +14,7 @@ from io import StringIO
 import re
 from cameras.models import Camera
 from detection.models import ModelSetting
+from .engine import get_alert_engine
 from .models import Alert, CameraAlertSeverity
 from .serializers import AlertSerializer
 from .services import SEVERITY_MAP
@@ -169,12 +170,13 @@ class AlertViewSet(viewsets.ReadOnlyModelViewSet):
         alert.status = 'acknowledged'
         alert.acknowledged_at = timezone.now()
         alert.save()
+        get_alert_engine().forget_alert(alert.id)
 
         channel_layer = get_channel_layer()
         if channel_layer:
             async_to_sync(channel_layer.group_send)(
                 'alerts',
-                {'type': 'alert.acknowledged', 'alert_id': alert.id}
+                {'type': 'alert.acknowledged', 'alert_id': alert.id, 'camera_id': alert.camera_id, 'severity': alert.severity}
             )
 
         return Response(AlertSerializer(alert).data)
@@ -1,5 +1,22 @@
-"""Draw inference annotations onto video frames using OpenCV."""
+"""Draw inference annotations onto video frames using OpenCV.
+
+The detections are first turned into display lists of drawing primitives:
+PPE boxes and their labels, which the tracker moves on every frame, and
+everything else (fatigue face boxes, landmarks, pose and metrics), which
+only changes with an inference cycle. Boxes are cheap and drawn directly.
+The static list is rendered into a sparse layer (the pixels it touches,
+their colours and their anti-aliasing alpha) the second time it is seen and
+cached, so between inference cycles, or for every view with the same
+overlays, a frame only composites the cached layer with a few vectorized
+assignments. A list seen once is drawn directly, so display lists that
+change every frame never pay for rendering a layer.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
 import cv2
+import numpy as np
 
 # BGR color palette
 _COLORS = {
@@ -24,6 +41,15 @@ _MODEL_COLORS = {
 }
 
 _FONT = cv2.FONT_HERSHEY_SIMPLEX
+_LABEL_SCALE = 0.48
+_METRIC_SCALE = 0.38
+
+_LAYER_CACHE_SIZE = 64
+_layer_cache = OrderedDict()
+# Static display lists seen once, not yet worth rendering a layer for.
+_layer_candidates = OrderedDict()
+_layer_cache_lock = threading.Lock()
+_layer_cache_stats = {"hits": 0, "misses": 0, "direct": 0}
 
 
 def draw_annotations(frame, detections, enabled_overlays=None):
@@ -37,6 +63,35 @@ def draw_annotations(frame, detections, enabled_overlays=None):
         Annotated frame (new copy).
     """
     out = frame.copy()
+    static, boxes = _display_list(detections, enabled_overlays)
+    if static:
+        layer = _cached_layer(static, out.shape)
+        if layer is not None:
+            layer.composite(out)
+        else:
+            _draw(out, static)
+    if boxes:
+        _draw(out, boxes)
+    return out
+
+
+def overlay_cache_stats():
+    with _layer_cache_lock:
+        stats = dict(_layer_cache_stats)
+        stats["layers"] = len(_layer_cache)
+    return stats
+
+
+@lru_cache(maxsize=1024)
+def _text_size(text, scale):
+    (tw, th), _ = cv2.getTextSize(text, _FONT, scale, 1)
+    return tw, th
+
+
+def _display_list(detections, enabled_overlays):
+    """``(static, boxes)`` primitive tuples; only ``static`` is cached."""
+    static = []
+    boxes = []
     for model_key, result in detections.items():
         if enabled_overlays and model_key not in enabled_overlays:
             continue
@@ -44,56 +99,59 @@ def draw_annotations(frame, detections, enabled_overlays=None):
             continue
         payload = result.get('payload', {})
         if model_key == 'fatigue':
-            _draw_fatigue(out, payload, model_key)
+            _fatigue_primitives(static, payload, model_key)
         else:
-            _draw_ppe_boxes(out, payload, model_key)
-    return out
+            _ppe_primitives(boxes, payload, model_key)
+    return tuple(static), tuple(boxes)
 
 
-def _label_box(frame, text, x1, y1, color):
-    (tw, th), _ = cv2.getTextSize(text, _FONT, 0.48, 1)
-    cv2.rectangle(frame, (x1, y1 - th - 6), (x1 + tw + 4, y1), color, -1)
-    cv2.putText(frame, text, (x1 + 2, y1 - 3), _FONT, 0.48, (0, 0, 0), 1, cv2.LINE_AA)
+def _point(pt):
+    return int(pt[0]), int(pt[1])
 
 
-def _draw_ppe_boxes(frame, payload, model_key):
+def _ppe_primitives(primitives, payload, model_key):
     default_color = _MODEL_COLORS.get(model_key, _COLORS['white'])
     for box in payload.get('boxes', []):
-        x1, y1, x2, y2 = box['x1'], box['y1'], box['x2'], box['y2']
+        x1, y1, x2, y2 = int(box['x1']), int(box['y1']), int(box['x2']), int(box['y2'])
         label = box.get('label', model_key)
+        if box.get('worker_id') is not None:
+            label = f"{label} #{box['worker_id']}"
         cname = box.get('color', 'green')
         color = _COLORS.get(cname, default_color)
-        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-        _label_box(frame, label, x1, y1, color)
+        primitives.append(('rect', (x1, y1), (x2, y2), color))
+        primitives.append(('label', label, x1, y1, color))
+
+
+def _fatigue_primitives(primitives, payload, model_key):
+    # Multi-face results list every tracked face; single-face payloads are the face itself.
+    for face in payload.get('faces') or [payload]:
+        _fatigue_face_primitives(primitives, face, model_key)
 
 
-def _draw_fatigue(frame, payload, model_key):
+def _fatigue_face_primitives(primitives, payload, model_key):
     color = _MODEL_COLORS.get(model_key, _COLORS['orange'])
     face_box = payload.get('face_box')
     is_fatigued = payload.get('is_fatigued', False)
     box_color = _COLORS['red'] if is_fatigued else color
 
     if face_box:
-        x1, y1, x2, y2 = face_box['x1'], face_box['y1'], face_box['x2'], face_box['y2']
-        cv2.rectangle(frame, (x1, y1), (x2, y2), box_color, 2)
+        x1, y1, x2, y2 = int(face_box['x1']), int(face_box['y1']), int(face_box['x2']), int(face_box['y2'])
+        primitives.append(('rect', (x1, y1), (x2, y2), box_color))
         hybrid = payload.get('hybrid_score', 0)
         tag = "FATIGUED" if is_fatigued else "Alert"
-        _label_box(frame, f"{tag} ({hybrid:.0%})", x1, y1, box_color)
+        track_id = payload.get('track_id')
+        prefix = f"#{track_id} " if track_id else ""
+        primitives.append(('label', f"{prefix}{tag} ({hybrid:.0%})", x1, y1, box_color))
 
     # 68-point landmarks
     for pt in payload.get('landmarks', []):
         if len(pt) >= 2:
-            cv2.circle(frame, (int(pt[0]), int(pt[1])), 1, color, -1)
+            primitives.append(('dot', _point(pt), color))
 
     # Head-pose arrow
     pose = payload.get('pose_line')
     if pose:
-        cv2.arrowedLine(
-            frame,
-            tuple(map(int, pose['start'])),
-            tuple(map(int, pose['end'])),
-            _COLORS['cyan'], 2, tipLength=0.3,
-        )
+        primitives.append(('arrow', _point(pose['start']), _point(pose['end']), _COLORS['cyan']))
 
     # Metrics next to face box
     if face_box:
@@ -107,7 +165,196 @@ def _draw_fatigue(frame, payload, model_key):
             lines.append(f"MAR {mar:.2f}")
         if tilt is not None:
             lines.append(f"Tilt {tilt:.1f}")
-        x_t = face_box['x2'] + 5
-        y_t = face_box['y1'] + 14
+        x_t = int(face_box['x2']) + 5
+        y_t = int(face_box['y1']) + 14
         for i, txt in enumerate(lines):
-            cv2.putText(frame, txt, (x_t, y_t + i * 16), _FONT, 0.38, color, 1, cv2.LINE_AA)
+            primitives.append(('text', txt, (x_t, y_t + i * 16), color))
+
+
+def _draw(image, primitives, alpha=None):
+    """Draw ``primitives`` onto ``image``, and in 255 onto ``alpha`` if given."""
+    for primitive in primitives:
+        kind = primitive[0]
+        if kind == 'rect':
+            _, pt1, pt2, color = primitive
+            cv2.rectangle(image, pt1, pt2, color, 2)
+            if alpha is not None:
+                cv2.rectangle(alpha, pt1, pt2, 255, 2)
+        elif kind == 'label':
+            _, text, x1, y1, color = primitive
+            tw, th = _text_size(text, _LABEL_SCALE)
+            corner1, corner2 = (x1, y1 - th - 6), (x1 + tw + 4, y1)
+            cv2.rectangle(image, corner1, corner2, color, -1)
+            if alpha is not None:
+                cv2.rectangle(alpha, corner1, corner2, 255, -1)
+            cv2.putText(image, text, (x1 + 2, y1 - 3), _FONT, _LABEL_SCALE, (0, 0, 0), 1, cv2.LINE_AA)
+        elif kind == 'dot':
+            _, center, color = primitive
+            cv2.circle(image, center, 1, color, -1)
+            if alpha is not None:
+                cv2.circle(alpha, center, 1, 255, -1)
+        elif kind == 'arrow':
+            _, start, end, color = primitive
+            cv2.arrowedLine(image, start, end, color, 2, tipLength=0.3)
+            if alpha is not None:
+                cv2.arrowedLine(alpha, start, end, 255, 2, tipLength=0.3)
+        elif kind == 'text':
+            _, text, origin, color = primitive
+            cv2.putText(image, text, origin, _FONT, _METRIC_SCALE, color, 1, cv2.LINE_AA)
+            if alpha is not None:
+                cv2.putText(alpha, text, origin, _FONT, _METRIC_SCALE, 255, 1, cv2.LINE_AA)
+
+
+def _render_layer(primitives, shape):
+    """Draw ``primitives`` on black with a matching alpha mask.
+
+    Every primitive is drawn on the layer in its colour and on the mask in
+    255, with the same line type, so anti-aliased edges leave the layer
+    premultiplied by the mask's alpha.
+    """
+    layer = np.zeros((shape[0], shape[1], 3), dtype=np.uint8)
+    alpha = np.zeros((shape[0], shape[1]), dtype=np.uint8)
+    _draw(layer, primitives, alpha)
+    return _SparseLayer(layer, alpha)
+
+
+class _SparseLayer:
+    """The non-transparent pixels of a rendered layer, as flat byte indices
+    (assigning single bytes is much faster than indexing pixel rows)."""
+
+    __slots__ = ('opaque_index', 'opaque_bytes', 'blend_index', 'blend_bytes', 'blend_inverse')
+
+    def __init__(self, layer, alpha):
+        channels = np.arange(layer.shape[2])
+        flat_alpha = alpha.reshape(-1)
+        flat_layer = layer.reshape(-1)
+        opaque = np.flatnonzero(flat_alpha == 255)
+        blend = np.flatnonzero((flat_alpha > 0) & (flat_alpha < 255))
+        self.opaque_index = (opaque[:, None] * layer.shape[2] + channels).reshape(-1)
+        self.opaque_bytes = flat_layer[self.opaque_index]
+        self.blend_index = (blend[:, None] * layer.shape[2] + channels).reshape(-1)
+        self.blend_bytes = flat_layer[self.blend_index].astype(np.uint16)
+        self.blend_inverse = np.repeat(255 - flat_alpha[blend], layer.shape[2]).astype(np.uint16)
+
+    def composite(self, out):
+        """Composite onto ``out`` (a C-contiguous frame) in place."""
+        flat = out.reshape(-1)
+        flat[self.opaque_index] = self.opaque_bytes
+        if self.blend_index.size:
+            under = flat[self.blend_index].astype(np.uint16)
+            blended = (under * self.blend_inverse + 127) // 255 + self.blend_bytes
+            flat[self.blend_index] = np.minimum(blended, 255).astype(np.uint8)
+
+
+def _cached_layer(primitives, shape):
+    """The cached layer for ``primitives``, or ``None`` the first time they
+    are seen (the caller then draws them directly)."""
+    key = (shape[0], shape[1], primitives)
+    with _layer_cache_lock:
+        layer = _layer_cache.get(key)
+        if layer is not None:
+            _layer_cache.move_to_end(key)
+            _layer_cache_stats["hits"] += 1
+            return layer
+        if _layer_candidates.pop(key, None) is None:
+            _layer_candidates[key] = True
+            while len(_layer_candidates) > _LAYER_CACHE_SIZE:
+                _layer_candidates.popitem(last=False)
+            _layer_cache_stats["direct"] += 1
+            return None
+        _layer_cache_stats["misses"] += 1
+    layer = _render_layer(primitives, shape)
+    with _layer_cache_lock:
+        _layer_cache[key] = layer
+        while len(_layer_cache) > _LAYER_CACHE_SIZE:
+            _layer_cache.popitem(last=False)
+    return layer
+
+
+def _scale_box(box, sx, sy):
+    scaled = dict(box)
+    for key in ('x1', 'x2'):
+        scaled[key] = int(round(box[key] * sx))
+    for key in ('y1', 'y2'):
+        scaled[key] = int(round(box[key] * sy))
+    return scaled
+
+
+def _scale_point(pt, sx, sy):
+    return [int(round(pt[0] * sx)), int(round(pt[1] * sy)), *pt[2:]]
+
+
+def _scale_fatigue_face(payload, sx, sy):
+    scaled = dict(payload)
+    if payload.get('face_box'):
+        scaled['face_box'] = _scale_box(payload['face_box'], sx, sy)
+    if payload.get('landmarks'):
+        scaled['landmarks'] = [_scale_point(pt, sx, sy) for pt in payload['landmarks']]
+    pose = payload.get('pose_line')
+    if pose:
+        scaled['pose_line'] = {
+            'start': _scale_point(pose['start'], sx, sy),
+            'end': _scale_point(pose['end'], sx, sy),
+        }
+    return scaled
+
+
+def scale_detections(detections, sx, sy):
+    """Copy of ``detections`` with every pixel coordinate scaled by ``(sx, sy)``.
+
+    Used when inference ran on a lower-resolution sub-stream but overlays
+    are drawn on the main stream.
+    """
+    scaled = {}
+    for model_key, result in detections.items():
+        payload = result.get('payload')
+        if not payload:
+            scaled[model_key] = result
+            continue
+        payload = dict(payload)
+        if model_key == 'fatigue':
+            payload = _scale_fatigue_face(payload, sx, sy)
+            if payload.get('faces'):
+                payload['faces'] = [_scale_fatigue_face(face, sx, sy) for face in payload['faces']]
+        elif payload.get('boxes'):
+            payload['boxes'] = [_scale_box(box, sx, sy) for box in payload['boxes']]
+        scaled[model_key] = {**result, 'payload': payload}
+    return scaled
+
+
+_OVERLAY_BOX_FIELDS = ('x1', 'y1', 'x2', 'y2', 'label', 'color', 'worker_id')
+_OVERLAY_FACE_FIELDS = (
+    'face_box', 'landmarks', 'pose_line', 'is_fatigued', 'hybrid_score',
+    'track_id', 'ear', 'mar', 'head_tilt_degrees',
+)
+
+
+def _overlay_face(payload):
+    return {key: payload[key] for key in _OVERLAY_FACE_FIELDS if payload.get(key) is not None}
+
+
+def overlay_metadata(detections):
+    """What ``draw_annotations`` would draw, as compact JSON-ready data.
+
+    Keeps only successful results and only the fields the overlay uses, in
+    the same shape as the inference payloads, so clients can draw with the
+    same code they use for inference results.
+    """
+    overlay = {}
+    for model_key, result in detections.items():
+        if result.get('status') != 'ok':
+            continue
+        payload = result.get('payload') or {}
+        if model_key == 'fatigue':
+            compact = _overlay_face(payload)
+            if payload.get('faces'):
+                compact['faces'] = [_overlay_face(face) for face in payload['faces']]
+        else:
+            compact = {
+                'boxes': [
+                    {key: box[key] for key in _OVERLAY_BOX_FIELDS if box.get(key) is not None}
+                    for box in payload.get('boxes', [])
+                ]
+            }
+        overlay[model_key] = {'status': 'ok', 'payload': compact}
+    return overlay
@@ -0,0 +1,117 @@
+"""Dedicated capture thread that keeps only the newest decoded frame.
+
+``CaptureWorker`` reads a ``cv2.VideoCapture`` as fast as the source
+delivers into a ``FrameRing`` so OpenCV's internal buffer never backs up,
+whatever ``CAP_PROP_BUFFERSIZE`` the backend honours. The camera hub renders
+and infers on the latest committed frame; frames it had no time for are
+dropped in the ring instead of queueing, so slow encoding or sending never
+makes the stream drift behind real time.
+
+File sources have no live edge, so they are paced at their own frame rate
+instead of being decoded as fast as possible.
+
+With ``keep_fps`` set, every frame is still pulled off the source with
+``grab()`` (keeping the stream at its live edge), but only frames needed to
+sustain ``keep_fps`` are decoded with ``retrieve()``; the rest are counted
+as ``skipped`` without ever being decoded.
+"""
+import logging
+import threading
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+_MAX_CONSECUTIVE_READ_FAILURES = 15
+_READ_RETRY_DELAY = 0.03
+
+
+class CaptureWorker:
+    def __init__(self, capture, ring, name="camera-capture", paced_fps=None, keep_fps=None):
+        self.capture = capture
+        self.ring = ring
+        self.name = name
+        self.paced_fps = paced_fps
+        self.keep_fps = keep_fps
+        self.failed = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._started_ts = None
+        self._stats = {"frames": 0, "skipped": 0, "read_failures": 0}
+
+    def start(self):
+        self._started_ts = time.monotonic()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def _read(self, image=None):
+        return self.capture.read(image) if image is not None else self.capture.read()
+
+    def _retrieve(self, image=None):
+        return self.capture.retrieve(image) if image is not None else self.capture.retrieve()
+
+    def _loop(self):
+        consecutive_failures = 0
+        frame_interval = 1.0 / self.paced_fps if self.paced_fps else 0.0
+        keep_interval = 1.0 / self.keep_fps if self.keep_fps else 0.0
+        next_read = time.monotonic()
+        next_keep = next_read
+        while not self._stop.is_set():
+            if frame_interval:
+                delay = next_read - time.monotonic()
+                if delay > 0 and self._stop.wait(delay):
+                    break
+                next_read = max(next_read + frame_interval, time.monotonic())
+            try:
+                if keep_interval:
+                    ok = self.capture.grab()
+                    now = time.monotonic()
+                    if ok and now < next_keep:
+                        consecutive_failures = 0
+                        with self._lock:
+                            self._stats["skipped"] += 1
+                        continue
+                    if ok:
+                        # Catch up by at most one interval so jitter does not
+                        # turn into a burst of kept frames.
+                        next_keep = max(next_keep + keep_interval, now - keep_interval)
+                        ok = self.ring.write(self._retrieve, now)
+                else:
+                    ok = self.ring.write(self._read, time.monotonic())
+            except Exception:
+                logger.exception("%s: capture read raised", self.name)
+                ok = False
+            if ok:
+                consecutive_failures = 0
+                with self._lock:
+                    self._stats["frames"] += 1
+                continue
+            consecutive_failures += 1
+            with self._lock:
+                self._stats["read_failures"] += 1
+            if consecutive_failures > _MAX_CONSECUTIVE_READ_FAILURES:
+                self.failed = True
+                return
+            self._stop.wait(_READ_RETRY_DELAY)
+
+    def stop(self, timeout=6.0):
+        """Stop reading; the caller may release the capture once this returns."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        elapsed = time.monotonic() - self._started_ts if self._started_ts else 0.0
+        stats["capture_fps"] = round(stats["frames"] / elapsed, 2) if elapsed > 0 else 0.0
+        ring_stats = self.ring.stats()
+        stats["dropped"] = ring_stats["dropped"]
+        stats["overruns"] = ring_stats["overruns"]
+        return stats
@@ -0,0 +1,115 @@
+"""JPEG encoding tiers shared by every viewer of a camera.
+
+The hub encodes each rendered view once per frame for every ``EncodingTier``
+(output scale and JPEG quality) that at least one subscriber is on, and all
+subscribers of that view and tier share the bytes. WebSocket viewers move
+between tiers with an ``AdaptiveTier``: a client whose sends back up or who
+misses published frames steps down to a smaller, lower quality tier, and
+steps back up after a run of on-time sends.
+
+Encoding uses PyTurboJPEG (libjpeg-turbo) when it is installed and falls
+back to ``cv2.imencode`` otherwise::
+
+    pip install PyTurboJPEG
+"""
+import logging
+import os
+import threading
+from collections import namedtuple
+from typing import Optional
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+STREAM_JPEG_QUALITY = min(95, max(40, int(os.environ.get("CAMERA_STREAM_JPEG_QUALITY", "65"))))
+TURBOJPEG_ENABLED = os.environ.get("CAMERA_TURBOJPEG_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+
+EncodingTier = namedtuple("EncodingTier", ["scale", "quality"])
+
+# Tier 0 is the full stream; higher tiers trade resolution and quality for bandwidth.
+STREAM_TIERS = (
+    EncodingTier(1.0, STREAM_JPEG_QUALITY),
+    EncodingTier(0.75, max(40, STREAM_JPEG_QUALITY - 10)),
+    EncodingTier(0.5, max(35, STREAM_JPEG_QUALITY - 20)),
+)
+
+_turbo = None
+_turbo_checked = False
+_turbo_lock = threading.Lock()
+
+
+def _turbo_encoder():
+    global _turbo, _turbo_checked
+    if _turbo_checked:
+        return _turbo
+    with _turbo_lock:
+        if not _turbo_checked:
+            if TURBOJPEG_ENABLED:
+                try:
+                    from turbojpeg import TurboJPEG
+
+                    _turbo = TurboJPEG()
+                except Exception as exc:
+                    logger.info("PyTurboJPEG unavailable (%s); encoding JPEGs with OpenCV", exc)
+            _turbo_checked = True
+    return _turbo
+
+
+def encoder_backend() -> str:
+    return "turbojpeg" if _turbo_encoder() is not None else "opencv"
+
+
+def encode_jpeg(image, quality: int = STREAM_JPEG_QUALITY, scale: float = 1.0) -> Optional[bytes]:
+    """Encode a BGR frame, downscaled by ``scale``; ``None`` if encoding failed."""
+    if scale < 1.0:
+        height, width = image.shape[:2]
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    turbo = _turbo_encoder()
+    if turbo is not None:
+        try:
+            return turbo.encode(image, quality=int(quality))
+        except Exception:
+            logger.exception("TurboJPEG encode failed; falling back to OpenCV")
+    ok, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    return jpeg.tobytes() if ok else None
+
+
+def encode_tier(image, tier: int) -> Optional[bytes]:
+    scale, quality = STREAM_TIERS[tier]
+    return encode_jpeg(image, quality=quality, scale=scale)
+
+
+class AdaptiveTier:
+    """Choose a client's tier from its send backpressure.
+
+    ``record`` takes how long the last send blocked and how many published
+    frames the client missed since its previous one. ``step_down_after``
+    congested sends in a row move one tier down (smaller, lower quality);
+    ``step_up_after`` clean sends in a row move one tier back up.
+    """
+
+    def __init__(self, frame_budget: float, tiers: int = len(STREAM_TIERS), step_down_after: int = 3, step_up_after: int = 48):
+        self.frame_budget = float(frame_budget)
+        self.max_tier = max(0, int(tiers) - 1)
+        self.step_down_after = step_down_after
+        self.step_up_after = step_up_after
+        self.tier = 0
+        self._congested = 0
+        self._clean = 0
+
+    def record(self, send_seconds: float, missed_frames: int = 0) -> int:
+        if send_seconds > self.frame_budget or missed_frames > 0:
+            self._congested += 1
+            self._clean = 0
+        else:
+            self._clean += 1
+            self._congested = 0
+        if self._congested >= self.step_down_after and self.tier < self.max_tier:
+            self.tier += 1
+            self._congested = 0
+        elif self._clean >= self.step_up_after and self.tier > 0:
+            self.tier -= 1
+            self._clean = 0
+        return self.tier
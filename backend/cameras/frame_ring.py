@@ -0,0 +1,158 @@
+"""Preallocated latest-frame ring between a camera's capture and its consumers.
+
+Capture decodes straight into a ring slot (``cv2.VideoCapture.read`` reuses
+the array it is given), so steady-state capture allocates nothing. Consumers
+pin a committed frame by sequence number and read it in place until they
+release it; the writer never touches the newest frame or a pinned slot.
+
+Frames are never queued: a new commit supersedes the previous one, and a
+frame superseded before anyone pinned it is counted as ``dropped``. When
+every spare slot is pinned by slow consumers the new frame is decoded into a
+scratch buffer and discarded (``overruns``) rather than growing the ring.
+
+Usage::
+
+    ring = FrameRing(slots=4)
+    ring.write(capture.read)
+    with ring.acquire() as ref:
+        encode(ref.frame)
+"""
+import threading
+from typing import Callable, Dict, Optional
+
+
+class FrameRef:
+    """A pinned ring slot; the frame stays valid until ``release``."""
+
+    def __init__(self, ring, index, seq, frame, timestamp):
+        self._ring = ring
+        self._index = index
+        self.seq = seq
+        self.frame = frame
+        self.timestamp = timestamp
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._ring._unpin(self._index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class _Slot:
+    __slots__ = ("array", "seq", "timestamp", "pins", "consumed")
+
+    def __init__(self):
+        self.array = None
+        self.seq = 0
+        self.timestamp = 0.0
+        self.pins = 0
+        self.consumed = False
+
+
+class FrameRing:
+    def __init__(self, slots: int = 4):
+        self._slots = [_Slot() for _ in range(max(2, int(slots)))]
+        self._scratch = None
+        self._lock = threading.Condition()
+        self._seq = 0
+        self._latest = None
+        self._writing = None
+        self._stats = {"frames": 0, "dropped": 0, "overruns": 0, "reallocations": 0}
+
+    def _free_index(self) -> Optional[int]:
+        """Oldest slot that is neither the newest frame nor pinned."""
+        candidates = [
+            index for index, slot in enumerate(self._slots)
+            if index != self._latest and slot.pins == 0
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda index: self._slots[index].seq)
+
+    def write(self, reader: Callable, timestamp: float = 0.0) -> bool:
+        """Fill a free slot with ``reader(array) -> (ok, frame)`` and commit it.
+
+        ``reader`` is typically ``capture.read``; it may return a different
+        array (e.g. when the stream resolution changes), which then replaces
+        the slot's buffer. Returns ``ok``.
+        """
+        with self._lock:
+            index = self._free_index()
+            self._writing = index
+            buffer = self._scratch if index is None else self._slots[index].array
+        try:
+            ok, frame = reader(buffer) if buffer is not None else reader()
+        finally:
+            with self._lock:
+                self._writing = None
+        if not ok or frame is None:
+            return False
+
+        with self._lock:
+            if index is None:
+                self._scratch = frame
+                self._stats["overruns"] += 1
+                return True
+            slot = self._slots[index]
+            if slot.array is not None and frame is not slot.array:
+                self._stats["reallocations"] += 1
+            slot.array = frame
+            self._seq += 1
+            slot.seq = self._seq
+            slot.timestamp = timestamp
+            slot.consumed = False
+            if self._latest is not None and not self._slots[self._latest].consumed:
+                self._stats["dropped"] += 1
+            self._latest = index
+            self._stats["frames"] += 1
+            self._lock.notify_all()
+        return True
+
+    @property
+    def latest_seq(self) -> int:
+        with self._lock:
+            return self._slots[self._latest].seq if self._latest is not None else 0
+
+    def acquire(self, seq: int = None) -> Optional[FrameRef]:
+        """Pin the newest frame, or frame ``seq`` if it is still in the ring.
+
+        Returns ``None`` when there is no frame yet or ``seq`` was overwritten.
+        """
+        with self._lock:
+            if seq is None:
+                index = self._latest
+            else:
+                index = next(
+                    (i for i, slot in enumerate(self._slots) if slot.seq == seq and slot.array is not None),
+                    None,
+                )
+            if index is None or index == self._writing:
+                return None
+            slot = self._slots[index]
+            slot.pins += 1
+            slot.consumed = True
+            return FrameRef(self, index, slot.seq, slot.array, slot.timestamp)
+
+    def wait_for_frame(self, after_seq: int, timeout: float) -> Optional[FrameRef]:
+        """Block until a frame newer than ``after_seq`` is committed, then pin it."""
+        with self._lock:
+            if not self._lock.wait_for(lambda: self._seq > after_seq, timeout):
+                return None
+        return self.acquire()
+
+    def _unpin(self, index: int) -> None:
+        with self._lock:
+            self._slots[index].pins = max(0, self._slots[index].pins - 1)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["slots"] = len(self._slots)
+            stats["pinned"] = sum(1 for slot in self._slots if slot.pins)
+        return stats
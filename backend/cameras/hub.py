@@ -0,0 +1,732 @@
+"""Per-camera capture hub shared by every viewer of a camera.
+
+A ``CameraHub`` owns the single ``cv2.VideoCapture`` for a camera, its decode
+loop and its inference cadence. WebSocket and MJPEG viewers subscribe to the
+hub and receive its latest JPEG; each distinct overlay selection is rendered
+once per frame, and encoded once per ``EncodingTier`` its viewers are on, no
+matter how many viewers share it. Alerts are
+raised once per inference cycle, not once per viewer. Between cycles a
+``DetectionTracker`` moves the cached boxes along their tracked motion and
+tags them with stable worker IDs. Capture decodes into a preallocated
+``FrameRing`` that rendering and inference read in place, and only decodes
+the frames the stream rate needs (the rest are grabbed and skipped). A camera
+with an ``inference_source_url`` sub-stream is inferred on that lower
+resolution stream; its detections are scaled onto the main stream. The hub
+shuts down when its last subscriber leaves.
+
+Usage::
+
+    subscription = acquire_camera_stream(camera_id, overlays=None)
+    try:
+        jpeg = subscription.next_frame(timeout=1.0)
+    finally:
+        subscription.close()
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import cv2
+
+from motion_gate import MotionGate
+from tracking import DetectionTracker
+
+from .capture import CaptureWorker
+from .encoding import STREAM_TIERS, encode_tier
+from .frame_ring import FrameRing
+
+logger = logging.getLogger(__name__)
+
+STREAM_FPS = max(8, int(os.environ.get("CAMERA_STREAM_FPS", "16")))
+STREAM_FRAME_DELAY = 1.0 / STREAM_FPS
+INFERENCE_INTERVAL_MS = max(80, int(os.environ.get("CAMERA_INFERENCE_INTERVAL_MS", "260")))
+# Between inference cycles tracked boxes are moved with their predicted motion.
+# While every track is stable (no arrivals, departures, fast motion or active
+# violations) the inference interval stretches up to this factor.
+TRACKING_ENABLED = os.environ.get("CAMERA_TRACKING_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+TRACKING_MAX_INTERVAL_FACTOR = max(1.0, float(os.environ.get("CAMERA_TRACKING_MAX_INTERVAL_FACTOR", "3")))
+# Motion gate: skip inference on unchanged scenes (at most one idle cycle every
+# CAMERA_MOTION_GATE_IDLE_SECONDS) and run at once when motion starts.
+MOTION_GATE_ENABLED = os.environ.get("CAMERA_MOTION_GATE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+MOTION_GATE_IDLE_SECONDS = max(0.0, float(os.environ.get("CAMERA_MOTION_GATE_IDLE_SECONDS", "2.0")))
+# Preallocated frames per camera that capture decodes into; rendering and the
+# in-flight inference cycle each pin one, so 4 leaves room for capture.
+FRAME_RING_SLOTS = max(3, int(os.environ.get("CAMERA_FRAME_RING_SLOTS", "4")))
+# Grab every frame but decode (retrieve) only as many as STREAM_FPS needs.
+GRAB_SKIP_ENABLED = os.environ.get("CAMERA_GRAB_SKIP_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+# Frames decoded from an inference sub-stream: enough for the base inference
+# cadence plus the motion gate between cycles.
+INFERENCE_STREAM_FPS = max(2.0, 2000.0 / INFERENCE_INTERVAL_MS)
+
+_MAX_OPEN_ATTEMPTS = 3
+# How often a capturing hub checks whether a monitor worker took the camera over.
+_OWNER_CHECK_SECONDS = 1.0
+_LOG_EVERY_N_INFERENCE_CYCLES = 12
+
+# View keys: ``RAW_VIEW`` is the unannotated frame, ``ALL_OVERLAYS`` draws every
+# model, otherwise a frozenset of model keys selects specific overlays.
+# ``HEADLESS_VIEW`` subscribers (monitor workers) keep inference running
+# without asking for any rendered output. ``VECTOR_VIEW`` subscribers keep
+# inference running, receive the raw frame and draw the overlays themselves
+# from the packet's detections.
+RAW_VIEW = "raw"
+ALL_OVERLAYS = "all"
+HEADLESS_VIEW = "headless"
+VECTOR_VIEW = "vector"
+# Views the hub never renders an image for.
+_UNRENDERED_VIEWS = {HEADLESS_VIEW, VECTOR_VIEW}
+
+_hubs = {}
+_hubs_lock = threading.Lock()
+
+
+def _file_source_fps(capture):
+    """Native frame rate of a file source (paced by the capture thread), else ``None``."""
+    if capture.get(cv2.CAP_PROP_FRAME_COUNT) <= 0:
+        return None
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    return fps if 0 < fps <= 240 else STREAM_FPS
+
+
+def _encoded_key(view_key, tier):
+    """Key of a view's encoding in the published views: tier 0 is the bare view key."""
+    return view_key if tier == 0 else (view_key, tier)
+
+
+def _pick_view(views, view_key, tier):
+    """The subscriber's view at its tier; right after a tier or overlay
+    change, the same view at another tier, then the raw frame."""
+    jpeg = views.get(_encoded_key(view_key, tier)) or views.get(view_key)
+    if jpeg is None:
+        jpeg = next((data for key, data in views.items() if isinstance(key, tuple) and key[0] == view_key), None)
+    return jpeg or views.get(RAW_VIEW)
+
+
+def _view_key(overlays, annotated, headless=False, vector=False):
+    if headless:
+        return HEADLESS_VIEW
+    if vector:
+        return VECTOR_VIEW
+    if not annotated:
+        return RAW_VIEW
+    if not overlays:
+        return ALL_OVERLAYS
+    return frozenset(overlays)
+
+
+class CameraSubscription:
+    """A viewer's handle on a hub. Not shared between threads except for
+    ``set_overlays`` and ``close``, which are safe to call from any thread."""
+
+    def __init__(self, hub, overlays=None, annotated=True, headless=False, vector=False):
+        self._hub = hub
+        self._annotated = bool(annotated)
+        self._headless = bool(headless)
+        self._vector = bool(vector)
+        self._overlays = overlays
+        self.view_key = _view_key(overlays, self._annotated, self._headless, self._vector)
+        self.tier = 0
+        self.missed_frames = 0
+        self.overlay = None
+        self._last_seq = 0
+        self.closed = False
+
+    @property
+    def ended(self):
+        """True once the hub stopped for good (camera gone or unreachable)."""
+        return self._hub.ended
+
+    @property
+    def seq(self):
+        """Sequence number of the frame last returned by ``next_frame``."""
+        return self._last_seq
+
+    @property
+    def encoded_view(self):
+        """The view whose JPEG this subscriber receives."""
+        return RAW_VIEW if self.view_key == VECTOR_VIEW else self.view_key
+
+    def set_overlays(self, overlays):
+        self._overlays = overlays
+        self.view_key = _view_key(overlays, self._annotated, self._headless, self._vector)
+
+    def set_vector(self, vector):
+        """Receive raw frames plus overlay metadata instead of annotated frames."""
+        self._vector = bool(vector)
+        self.view_key = _view_key(self._overlays, self._annotated, self._headless, self._vector)
+
+    def set_tier(self, tier):
+        """Switch to encoding tier ``tier`` (0 is the full-size stream)."""
+        self.tier = min(max(0, int(tier)), len(STREAM_TIERS) - 1)
+
+    def next_frame(self, timeout=1.0):
+        """Block until the hub publishes a frame newer than the last one seen.
+
+        Returns JPEG bytes, or ``None`` on timeout or when the hub has ended.
+        ``missed_frames`` is set to the number of published frames skipped
+        since the previous call, and ``overlay`` to the frame's detections
+        and frame size (``None`` when the frame has none).
+        """
+        packet = self._hub.wait_for_packet(self._last_seq, timeout)
+        if packet is None:
+            return None
+        seq, views, overlay = packet
+        self.missed_frames = max(0, seq - self._last_seq - 1) if self._last_seq else 0
+        self._last_seq = seq
+        self.overlay = overlay
+        return _pick_view(views, self.encoded_view, self.tier)
+
+    @property
+    def hub(self):
+        return self._hub
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        _release(self._hub, self)
+
+
+class CameraHub:
+    def __init__(self, camera_id):
+        self.camera_id = int(camera_id)
+        self.ended = False
+        self._subscribers = set()
+        self._running = False
+        self._thread = None
+        self._condition = threading.Condition()
+        self._seq = 0
+        self._views = {}
+        self._overlay = None
+        self._listeners = []
+        self._frames = FrameRing(FRAME_RING_SLOTS)
+        # Sub-stream frames: the newest one, the in-flight cycle's and a spare.
+        self._inference_frames = FrameRing(3)
+        self._inference_worker = None
+        self._display_shape = None
+        self._rendered = 0
+        self._encoded = {}
+        self._last_drift_ms = 0.0
+        self._max_drift_ms = 0.0
+        self._total_drift_ms = 0.0
+
+        self._state_lock = threading.Lock()
+        self._cached = {}
+        self._tracker = DetectionTracker() if TRACKING_ENABLED else None
+        self._motion_gate = MotionGate(idle_seconds=MOTION_GATE_IDLE_SECONDS) if MOTION_GATE_ENABLED else None
+        self._inference_interval = INFERENCE_INTERVAL_MS / 1000.0
+        self._inference_inflight = False
+        self._preload_started = False
+        self._last_inference_ts = 0.0
+        self._heartbeat_counter = 0
+
+    # --- subscriber bookkeeping -------------------------------------------
+
+    def add_subscriber(self, subscription):
+        with self._condition:
+            self._subscribers.add(subscription)
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(
+                    target=self._run, name=f"camera-hub-{self.camera_id}", daemon=True
+                )
+                self._thread.start()
+
+    def remove_subscriber(self, subscription):
+        """Drop a subscriber; returns True when it was the last one."""
+        with self._condition:
+            self._subscribers.discard(subscription)
+            if self._subscribers:
+                return False
+            self._running = False
+            self._condition.notify_all()
+            return True
+
+    @property
+    def subscriber_count(self):
+        with self._condition:
+            return len(self._subscribers)
+
+    def add_listener(self, listener):
+        """Call ``listener(camera_id, views, detections)`` from the hub thread
+        after every published frame (used by monitor workers to export output)."""
+        with self._condition:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._condition:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify_listeners(self, views, detections):
+        with self._condition:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(self.camera_id, views, detections)
+            except Exception:
+                logger.exception("Camera hub %s listener failed", self.camera_id)
+
+    def _requested_views(self):
+        with self._condition:
+            return {subscription.view_key for subscription in self._subscribers}
+
+    def _requested_encodings(self):
+        """``(view_key, tier)`` pairs the subscribers are currently on."""
+        with self._condition:
+            return {(subscription.encoded_view, subscription.tier) for subscription in self._subscribers}
+
+    # --- publishing ---------------------------------------------------------
+
+    def _publish(self, views, detections=None, frame_shape=None):
+        """Publish a frame's encoded views, with the detections drawn on it
+        and the frame's ``(height, width)`` for vector subscribers."""
+        overlay = None
+        if detections is not None:
+            overlay = {"detections": detections}
+            if frame_shape is not None:
+                overlay["height"], overlay["width"] = int(frame_shape[0]), int(frame_shape[1])
+        with self._condition:
+            self._seq += 1
+            self._views = views
+            self._overlay = overlay
+            self._condition.notify_all()
+
+    def _end(self):
+        with self._condition:
+            self.ended = True
+            self._running = False
+            self._condition.notify_all()
+
+    def wait_for_packet(self, last_seq, timeout):
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._seq <= last_seq and not self.ended:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            if self._seq <= last_seq:
+                return None
+            return self._seq, self._views, self._overlay
+
+    # --- capture loop ---------------------------------------------------------
+
+    def _run(self):
+        from .inference_status import mark_loading, mark_stream_stopped
+
+        mark_loading(self.camera_id)
+        try:
+            self._stream()
+        except Exception:
+            logger.exception("Camera hub %s crashed", self.camera_id)
+        finally:
+            self._end()
+            mark_stream_stopped(self.camera_id)
+            with _hubs_lock:
+                if _hubs.get(self.camera_id) is self:
+                    del _hubs[self.camera_id]
+
+    def _stream(self):
+        from .models import Camera
+        from .monitor import get_monitor_spool
+        from .services import _no_signal_frame
+
+        camera = Camera.objects.filter(pk=self.camera_id).first()
+        _, no_signal_jpg = cv2.imencode('.jpg', _no_signal_frame())
+        no_signal_views = {RAW_VIEW: no_signal_jpg.tobytes()}
+        if camera is None:
+            logger.error("Camera %s does not exist", self.camera_id)
+            self._publish(no_signal_views)
+            return
+
+        # A background monitor worker in another process already captures and
+        # infers this camera: relay its output instead of opening the source
+        # again. Capturing hubs hand over as soon as a worker takes over, and
+        # take the camera back if the worker's output goes stale.
+        spool = get_monitor_spool()
+        while self._running:
+            if spool.owned_elsewhere(self.camera_id):
+                if self._relay(spool):
+                    return
+                logger.info("Camera %s: monitor output went stale, capturing locally", self.camera_id)
+            if not self._capture(camera, spool, no_signal_views):
+                return
+
+    def _capture(self, camera, spool, no_signal_views):
+        """Capture, render and publish the camera until the hub stops.
+
+        Returns True when another process took the camera over, after the
+        capture has been released.
+        """
+        from detection.config_snapshot import get_config_snapshot
+        from .inference_status import mark_capture_stats
+        from .services import _open_capture, _to_capture_source
+
+        source = _to_capture_source(camera.source_url)
+        for attempt in range(_MAX_OPEN_ATTEMPTS):
+            if not self._running:
+                return False
+
+            capture = _open_capture(source)
+            if capture is None:
+                logger.warning("Camera %s: open failed (attempt %d/%d)", source, attempt + 1, _MAX_OPEN_ATTEMPTS)
+                self._publish(no_signal_views)
+                time.sleep(1)
+                continue
+
+            worker = CaptureWorker(
+                capture,
+                self._frames,
+                name=f"camera-capture-{self.camera_id}",
+                paced_fps=_file_source_fps(capture),
+                keep_fps=STREAM_FPS if GRAB_SKIP_ENABLED else None,
+            ).start()
+            inference_capture = self._start_inference_stream(camera)
+            last_seq = 0
+            owner_checked_at = time.monotonic()
+            try:
+                while self._running:
+                    if not get_config_snapshot().is_camera_active(self.camera_id):
+                        logger.info("Camera %s: stream stopped because camera was removed or deactivated", self.camera_id)
+                        return False
+                    if time.monotonic() - owner_checked_at >= _OWNER_CHECK_SECONDS:
+                        owner_checked_at = time.monotonic()
+                        if spool.owned_elsewhere(self.camera_id):
+                            logger.info("Camera %s: a monitor worker took over, relaying its output", self.camera_id)
+                            return True
+                    if worker.failed:
+                        logger.warning("Camera %s: lost too many frames, reconnecting", source)
+                        break
+
+                    # Always render the newest frame; older ones were dropped by the ring.
+                    frame_ref = self._frames.wait_for_frame(last_seq, timeout=1.0)
+                    if frame_ref is None:
+                        continue
+                    started = time.monotonic()
+                    with frame_ref:
+                        last_seq = frame_ref.seq
+                        self._record_drift(started - frame_ref.timestamp)
+                        views, detections = self._render_views(camera, frame_ref)
+                    self._publish(views, detections, self._display_shape)
+                    self._notify_listeners(views, detections)
+                    if self._rendered % STREAM_FPS == 0:
+                        mark_capture_stats(self.camera_id, self._capture_stats(worker))
+
+                    # Throttle to a stable FPS so encode/send does not overwhelm the event loop.
+                    time.sleep(max(0.0, STREAM_FRAME_DELAY - (time.monotonic() - started)))
+            finally:
+                worker.stop()
+                capture.release()
+                if inference_capture is not None:
+                    self._inference_worker.stop()
+                    self._inference_worker = None
+                    inference_capture.release()
+
+        if self._running:
+            logger.error("Camera %s: giving up after %d attempts", source, _MAX_OPEN_ATTEMPTS)
+            self._publish(no_signal_views)
+        return False
+
+    def _start_inference_stream(self, camera):
+        """Open the camera's inference sub-stream, if it has one.
+
+        Returns the opened capture (its worker is ``self._inference_worker``)
+        or ``None``, in which case inference reads the main stream.
+        """
+        from .services import _open_capture, _to_capture_source
+
+        if not camera.inference_source_url:
+            return None
+        capture = _open_capture(_to_capture_source(camera.inference_source_url))
+        if capture is None:
+            logger.warning("Camera %s: inference sub-stream unavailable, inferring on the main stream", self.camera_id)
+            return None
+        self._inference_worker = CaptureWorker(
+            capture,
+            self._inference_frames,
+            name=f"camera-capture-{self.camera_id}-inference",
+            paced_fps=_file_source_fps(capture),
+            keep_fps=INFERENCE_STREAM_FPS if GRAB_SKIP_ENABLED else None,
+        ).start()
+        return capture
+
+    def _record_drift(self, drift_seconds):
+        drift_ms = max(0.0, drift_seconds * 1000.0)
+        self._rendered += 1
+        self._last_drift_ms = drift_ms
+        self._max_drift_ms = max(self._max_drift_ms, drift_ms)
+        self._total_drift_ms += drift_ms
+
+    def _capture_stats(self, worker):
+        stats = worker.stats()
+        stats["rendered"] = self._rendered
+        stats["last_drift_ms"] = round(self._last_drift_ms, 1)
+        stats["max_drift_ms"] = round(self._max_drift_ms, 1)
+        stats["avg_drift_ms"] = round(self._total_drift_ms / self._rendered, 1) if self._rendered else 0.0
+        stats["encoded_by_tier"] = dict(self._encoded)
+        inference_worker = self._inference_worker
+        if inference_worker is not None:
+            stats["inference_stream"] = inference_worker.stats()
+        return stats
+
+    def _render_views(self, camera, frame_ref):
+        from annotation import draw_annotations
+        from .inference_status import mark_error
+
+        frame = frame_ref.frame
+        self._display_shape = frame.shape[:2]
+        requested = self._requested_views()
+        encodings = self._requested_encodings()
+        if requested - {RAW_VIEW}:
+            self._maybe_launch_inference(camera, frame_ref)
+
+        with self._state_lock:
+            if self._tracker is not None and self._cached:
+                cached_snapshot = self._tracker.propagate(self._cached)
+            else:
+                cached_snapshot = dict(self._cached)
+
+        views = {}
+        for view_key in (requested - _UNRENDERED_VIEWS) | {RAW_VIEW}:
+            image = frame
+            if view_key != RAW_VIEW and cached_snapshot:
+                overlays = None if view_key == ALL_OVERLAYS else set(view_key)
+                try:
+                    image = draw_annotations(frame, cached_snapshot, enabled_overlays=overlays)
+                except Exception:
+                    mark_error(self.camera_id, "annotation_exception")
+                    logger.exception("Annotation exception on camera %s", self.camera_id)
+            # Raw tier 0 is always published: listeners and fallbacks rely on it.
+            tiers = {tier for key, tier in encodings if key == view_key}
+            if view_key == RAW_VIEW or not tiers:
+                tiers.add(0)
+            for tier in tiers:
+                jpeg = encode_tier(image, tier)
+                if jpeg is not None:
+                    views[_encoded_key(view_key, tier)] = jpeg
+                    self._encoded[tier] = self._encoded.get(tier, 0) + 1
+        return views, cached_snapshot
+
+    def _relay(self, spool):
+        """Publish a monitor worker's spooled output until this hub stops.
+
+        Returns False if the worker's output goes stale so the caller can fall
+        back to capturing the camera itself.
+        """
+        import numpy as np
+        from annotation import draw_annotations
+        from .inference_status import mark_relayed
+        from .monitor import MONITOR_WATCH_POLL_SECONDS
+
+        last_seq = None
+        marked_at = 0.0
+        while self._running:
+            # Keep the worker exporting every frame (and rendering the
+            # all-overlays view if asked for) while this hub has viewers.
+            now = time.monotonic()
+            if now - marked_at >= MONITOR_WATCH_POLL_SECONDS:
+                spool.mark_watched(self.camera_id, ALL_OVERLAYS in self._requested_views())
+                marked_at = now
+            snapshot = spool.read(self.camera_id)
+            if snapshot is None:
+                return False
+            if snapshot["seq"] != last_seq:
+                last_seq = snapshot["seq"]
+                views = {RAW_VIEW: snapshot["raw"], ALL_OVERLAYS: snapshot["annotated"] or snapshot["raw"]}
+                detections = snapshot["detections"]
+                for view_key in self._requested_views() - {RAW_VIEW, ALL_OVERLAYS} - _UNRENDERED_VIEWS:
+                    frame = cv2.imdecode(np.frombuffer(snapshot["raw"], dtype=np.uint8), cv2.IMREAD_COLOR)
+                    if frame is None:
+                        continue
+                    image = draw_annotations(frame, detections, enabled_overlays=set(view_key))
+                    jpeg = encode_tier(image, 0)
+                    if jpeg is not None:
+                        views[view_key] = jpeg
+                self._publish(views, detections)
+                mark_relayed(self.camera_id, snapshot["status"])
+            time.sleep(STREAM_FRAME_DELAY)
+        return True
+
+    # --- inference cadence ------------------------------------------------------
+
+    def _acquire_inference_frame(self, frame_ref):
+        """Pin the frame to infer on: the newest sub-stream frame while the
+        sub-stream is healthy, else the main-stream frame being rendered."""
+        worker = self._inference_worker
+        if worker is not None and not worker.failed:
+            inference_ref = self._inference_frames.acquire()
+            if inference_ref is not None:
+                return inference_ref
+        return self._frames.acquire(frame_ref.seq)
+
+    def _maybe_launch_inference(self, camera, frame_ref):
+        from detection.services import get_inference_service
+        from .inference_status import mark_loading
+
+        svc = get_inference_service()
+        if not svc.ready:
+            mark_loading(self.camera_id)
+            # Called per rendered frame: one loader per hub, not one per frame.
+            with self._state_lock:
+                if self._preload_started:
+                    return
+                self._preload_started = True
+            threading.Thread(target=self._preload, args=(svc,), daemon=True).start()
+            return
+
+        now = time.monotonic()
+        with self._state_lock:
+            if self._inference_inflight:
+                return
+            due = (now - self._last_inference_ts) >= self._inference_interval
+            # The cycle reads the ring slot in place; its own pin keeps capture
+            # from overwriting it until the cycle finishes.
+            cycle_ref = self._acquire_inference_frame(frame_ref)
+            if cycle_ref is None:
+                return
+            # Fatigue scoring needs every cycle: a drowsy worker barely moves.
+            gated = self._motion_gate is not None and "fatigue" not in self._cached
+            if gated:
+                due = self._motion_gate.decide(cycle_ref.frame, due=due, now=now)
+            if not due:
+                cycle_ref.release()
+                return
+            self._inference_inflight = True
+
+        threading.Thread(
+            target=self._run_inference_cycle,
+            args=(svc, camera, cycle_ref, self._display_shape),
+            daemon=True,
+        ).start()
+
+    def _preload(self, svc):
+        try:
+            svc.preload()
+        except Exception:
+            logger.exception("Model preload failed for camera %s", self.camera_id)
+        finally:
+            # Lets a later frame retry if loading failed.
+            with self._state_lock:
+                self._preload_started = False
+
+    def _next_inference_interval(self, results, detected_count):
+        """Stretch the full-detection interval while tracks are stable.
+
+        Never stretched while a violation is active or when fatigue runs,
+        since its consecutive-frame counters assume the base cadence.
+        """
+        base = INFERENCE_INTERVAL_MS / 1000.0
+        if detected_count or "fatigue" in results or not self._tracker.stable:
+            return base
+        return base * TRACKING_MAX_INTERVAL_FACTOR
+
+    def _run_inference_cycle(self, svc, camera, frame_ref, display_shape=None):
+        from alerts.services import create_alert_from_inference
+        from annotation import scale_detections
+        from detection.services import get_effective_enabled_model_keys
+        from .inference_status import mark_disabled, mark_error, mark_gate_stats, mark_running
+
+        # A timed-out batch is still queued and reads the pinned frame: keep
+        # the ring slot pinned until it finishes, or the capture thread could
+        # decode the next frame into the buffer mid-inference.
+        abandoned = []
+        try:
+            enabled = get_effective_enabled_model_keys(self.camera_id)
+            if not enabled:
+                with self._state_lock:
+                    self._cached.clear()
+                    self._last_inference_ts = time.monotonic()
+                mark_disabled(self.camera_id)
+                return
+
+            new = svc.run_models_on_frame(
+                enabled, frame_ref.frame, camera_id=self.camera_id, on_timeout=abandoned.append
+            )
+            frame_shape = frame_ref.frame.shape[:2]
+            if display_shape is not None and frame_shape != display_shape:
+                # Inferred on the sub-stream: map detections onto the main stream.
+                new = scale_detections(
+                    new,
+                    display_shape[1] / frame_shape[1],
+                    display_shape[0] / frame_shape[0],
+                )
+            detected_count = sum(1 for item in new.values() if bool(item.get("detected")))
+            with self._state_lock:
+                if self._tracker is not None:
+                    # Tags boxes with track/worker IDs before alerts copy the payloads.
+                    self._tracker.observe(new)
+                    self._inference_interval = self._next_inference_interval(new, detected_count)
+                # Publish with the tracker update: raising alerts can block on
+                # the persistence queue, and until then the renderer would
+                # propagate the previous cycle's boxes with the new tracks.
+                self._cached = new
+                self._heartbeat_counter += 1
+                self._last_inference_ts = time.monotonic()
+                heartbeat = self._heartbeat_counter
+                interval_ms = int(self._inference_interval * 1000)
+
+            for key, result in new.items():
+                create_alert_from_inference(camera=camera, model_key=key, result=result)
+
+            mark_running(self.camera_id, model_keys=enabled, detected_count=detected_count)
+            if self._motion_gate is not None:
+                mark_gate_stats(self.camera_id, self._motion_gate.stats())
+
+            if heartbeat % _LOG_EVERY_N_INFERENCE_CYCLES == 0:
+                logger.info(
+                    "Inference heartbeat camera=%s models=%s detections=%s viewers=%s interval_ms=%s",
+                    self.camera_id,
+                    sorted(enabled),
+                    detected_count,
+                    self.subscriber_count,
+                    interval_ms,
+                )
+        except FutureTimeout:
+            mark_error(self.camera_id, "inference_timeout")
+            logger.warning("Inference on camera %s timed out; skipping the cycle", self.camera_id)
+        except Exception:
+            mark_error(self.camera_id, "inference_exception")
+            logger.exception("Inference exception on camera %s", self.camera_id)
+        finally:
+            if abandoned:
+                abandoned[0].add_done_callback(lambda _: frame_ref.release())
+            else:
+                frame_ref.release()
+            with self._state_lock:
+                self._inference_inflight = False
+
+
+def acquire_camera_stream(camera_id, overlays=None, annotated=True, headless=False, vector=False):
+    """Subscribe to ``camera_id``'s hub, starting it if no one is watching yet.
+
+    ``headless`` subscriptions keep capture and inference running without
+    rendering anything for the subscriber; ``vector`` subscriptions receive
+    the raw frame and draw the overlays client-side.
+    """
+    camera_id = int(camera_id)
+    with _hubs_lock:
+        hub = _hubs.get(camera_id)
+        if hub is None or hub.ended:
+            hub = CameraHub(camera_id)
+            _hubs[camera_id] = hub
+        subscription = CameraSubscription(
+            hub, overlays=overlays, annotated=annotated, headless=headless, vector=vector
+        )
+        hub.add_subscriber(subscription)
+    return subscription
+
+
+def _release(hub, subscription):
+    with _hubs_lock:
+        if hub.remove_subscriber(subscription) and _hubs.get(hub.camera_id) is hub:
+            # Unregister right away so a new viewer starts a fresh hub instead
+            # of attaching to one that is shutting down.
+            del _hubs[hub.camera_id]
+
+
+def active_hub_camera_ids():
+    with _hubs_lock:
+        return sorted(_hubs)
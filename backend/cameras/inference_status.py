@@ -62,6 +62,36 @@ def mark_stream_stopped(camera_id: int) -> None:
     _upsert(camera_id, "stopped")
 
 
+def mark_gate_stats(camera_id: int, stats: Dict[str, Any] | None) -> None:
+    """Record the camera's motion-gate counters (runs, skips, skip rate)."""
+    with _LOCK:
+        entry = _STATUS_BY_CAMERA.setdefault(int(camera_id), {"camera_id": int(camera_id), "status": "unknown"})
+        entry["motion_gate"] = dict(stats) if stats else None
+
+
+def mark_capture_stats(camera_id: int, stats: Dict[str, Any] | None) -> None:
+    """Record the capture thread's counters (frames, drops, drift behind live)."""
+    with _LOCK:
+        entry = _STATUS_BY_CAMERA.setdefault(int(camera_id), {"camera_id": int(camera_id), "status": "unknown"})
+        entry["capture"] = dict(stats) if stats else None
+
+
+def mark_relayed(camera_id: int, status: Dict[str, Any] | None) -> None:
+    """Mirror the status reported by a monitor worker running in another process."""
+    status = status or {}
+    _upsert(
+        camera_id,
+        status.get("status", "unknown"),
+        model_keys=status.get("model_keys"),
+        detected_count=status.get("detected_count"),
+        error=status.get("last_error"),
+    )
+    if status.get("motion_gate"):
+        mark_gate_stats(camera_id, status["motion_gate"])
+    if status.get("capture"):
+        mark_capture_stats(camera_id, status["capture"])
+
+
 def get_inference_status(camera_id: int, *, stale_after_seconds: int = 15) -> Dict[str, Any]:
     now = _now_ts()
     with _LOCK:
@@ -78,6 +108,8 @@ def get_inference_status(camera_id: int, *, stale_after_seconds: int = 15) -> Di
             "model_keys": [],
             "detected_count": 0,
             "last_error": None,
+            "motion_gate": None,
+            "capture": None,
         }
 
     updated_ts = raw.get("updated_ts")
@@ -103,4 +135,6 @@ def get_inference_status(camera_id: int, *, stale_after_seconds: int = 15) -> Di
         "model_keys": raw.get("model_keys", []),
         "detected_count": int(raw.get("detected_count", 0) or 0),
         "last_error": raw.get("last_error"),
+        "motion_gate": raw.get("motion_gate"),
+        "capture": raw.get("capture"),
     }
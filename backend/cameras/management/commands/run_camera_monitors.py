@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cameras.monitor import run_worker_process
+
+
+class Command(BaseCommand):
+    help = "Monitor every active camera 24/7 with a supervised pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=int(os.environ.get("CAMERA_MONITOR_WORKERS", "0")) or max(1, (os.cpu_count() or 2) // 2),
+            help="Number of worker processes; cameras are sharded by id across them.",
+        )
+        parser.add_argument(
+            "--restart-delay",
+            type=float,
+            default=2.0,
+            help="Seconds to wait before restarting a worker that exited.",
+        )
+        parser.add_argument(
+            "--allow-in-memory-layer",
+            action="store_true",
+            help="Start even though alerts raised by the workers will not reach dashboards.",
+        )
+
+    def _check_channel_layer(self, allow_in_memory):
+        """Alerts are broadcast from the worker processes, so the web process
+        only sees them through a channel layer shared across processes."""
+        backend = settings.CHANNEL_LAYERS.get("default", {}).get("BACKEND", "")
+        if not backend.endswith("InMemoryChannelLayer"):
+            return
+        message = (
+            "The channel layer is in-memory: alerts raised by monitor workers will be stored "
+            "but never pushed to dashboards. Set CHANNEL_REDIS_URL (pip install channels_redis) "
+            "for both Daphne and this command, or use CAMERA_MONITOR_IN_PROCESS=1."
+        )
+        if not allow_in_memory:
+            raise CommandError(message + " Pass --allow-in-memory-layer to start anyway.")
+        self.stderr.write(self.style.WARNING(message))
+
+    def handle(self, *args, **options):
+        self._check_channel_layer(options["allow_in_memory_layer"])
+        workers = max(1, options["workers"])
+        restart_delay = max(0.0, options["restart_delay"])
+        ctx = multiprocessing.get_context("spawn")
+
+        # Workers are not daemonic: they may spawn inference worker processes
+        # of their own (INFERENCE_PROCESS_WORKERS), which daemons cannot do.
+        # They are stopped explicitly from the signal handler below instead.
+        def start(index):
+            process = ctx.Process(
+                target=run_worker_process,
+                args=(index, workers),
+                name=f"camera-monitor-{index}",
+            )
+            process.start()
+            return process
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+        processes = {index: start(index) for index in range(workers)}
+        self.stdout.write(self.style.SUCCESS(f"Started {workers} camera monitor worker(s)"))
+        try:
+            while not stop.wait(restart_delay or 1.0):
+                for index, process in list(processes.items()):
+                    if not process.is_alive():
+                        self.stderr.write(f"Monitor worker {index} exited ({process.exitcode}); restarting")
+                        processes[index] = start(index)
+        finally:
+            # SIGTERM lets each worker release its cameras and flush queued
+            # alerts; anything still running after the grace period is killed.
+            for process in processes.values():
+                process.terminate()
+            for process in processes.values():
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.kill()
+                    process.join(timeout=5)
+            self.stdout.write("Camera monitor workers stopped")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cameras', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='inference_source_url',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+    ]
@@ -3,6 +3,9 @@ from django.db import models
 class Camera(models.Model):
     name = models.CharField(max_length=255)
     source_url = models.CharField(max_length=500)
+    # Optional lower-resolution sub-stream used for inference only; viewers
+    # keep getting ``source_url``.
+    inference_source_url = models.CharField(max_length=500, blank=True, default='')
     location = models.CharField(max_length=255, blank=True, default='')
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
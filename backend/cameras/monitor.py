@@ -0,0 +1,302 @@
+"""Always-on camera monitoring, independent of browser sessions.
+
+A ``MonitorWorker`` keeps a permanent hub subscription open for every active
+camera in its shard (``camera.id % shard_count == shard_index``) so capture,
+inference and alerting run whether or not anyone is watching. Workers are
+started either in-process (``CAMERA_MONITOR_IN_PROCESS=1``, one shard inside
+the ASGI server) or as a supervised process pool via
+``python manage.py run_camera_monitors --workers N``.
+
+Workers running in their own process export each camera's latest raw JPEG,
+detections and inference status to a ``MonitorSpool`` directory. A camera hub
+in the web process finds a fresh spool entry owned by another process and
+relays it instead of opening the camera a second time.
+
+Nobody may be watching a monitored camera, so workers only render headless
+and refresh the spool every ``MONITOR_IDLE_EXPORT_SECONDS``. A relaying hub
+marks the camera as watched in the spool; the worker then exports every
+frame and, if an annotated view was asked for, subscribes to one until the
+mark goes stale.
+"""
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+
+from config import UPLOADS_DIR
+
+logger = logging.getLogger(__name__)
+
+MONITOR_SPOOL_DIR = Path(os.environ.get("CAMERA_MONITOR_SPOOL_DIR", str(UPLOADS_DIR / "monitor_spool")))
+MONITOR_SYNC_INTERVAL_SECONDS = max(1.0, float(os.environ.get("CAMERA_MONITOR_SYNC_SECONDS", "5")))
+MONITOR_STALE_AFTER_SECONDS = max(1.0, float(os.environ.get("CAMERA_MONITOR_STALE_SECONDS", "5")))
+# Spool refresh rate for cameras nobody is watching; must stay well under the
+# stale threshold so the spool keeps marking the camera as owned.
+MONITOR_IDLE_EXPORT_SECONDS = min(
+    MONITOR_STALE_AFTER_SECONDS / 2,
+    max(0.1, float(os.environ.get("CAMERA_MONITOR_IDLE_EXPORT_SECONDS", "1"))),
+)
+# How often workers and relaying hubs read/refresh the watched mark.
+MONITOR_WATCH_POLL_SECONDS = 1.0
+
+
+class MonitorSpool:
+    """Latest-frame exchange between monitor workers and the web process.
+
+    Each camera has ``<id>.raw.jpg``, ``<id>.annotated.jpg`` and ``<id>.json``
+    (sequence, owner pid, timestamp, detections, status), plus
+    ``<id>.watch.json`` while a relaying hub has viewers. Files are replaced
+    atomically, so readers always see a complete file.
+    """
+
+    def __init__(self, root=None, stale_after_seconds=MONITOR_STALE_AFTER_SECONDS):
+        self.root = Path(root or MONITOR_SPOOL_DIR)
+        self.stale_after_seconds = stale_after_seconds
+        self._seq = {}
+
+    def _path(self, camera_id, suffix):
+        return self.root / f"{int(camera_id)}.{suffix}"
+
+    @staticmethod
+    def _atomic_write(path, data):
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+
+    def write(self, camera_id, raw_jpeg, annotated_jpeg, detections, status):
+        self.root.mkdir(parents=True, exist_ok=True)
+        seq = self._seq.get(camera_id, 0) + 1
+        self._seq[camera_id] = seq
+        self._atomic_write(self._path(camera_id, "raw.jpg"), raw_jpeg)
+        if annotated_jpeg:
+            self._atomic_write(self._path(camera_id, "annotated.jpg"), annotated_jpeg)
+        meta = {
+            "seq": seq,
+            "pid": os.getpid(),
+            "updated_ts": time.time(),
+            "has_annotated": bool(annotated_jpeg),
+            "detections": detections or {},
+            "status": status or {},
+        }
+        self._atomic_write(self._path(camera_id, "json"), json.dumps(meta, default=str).encode("utf-8"))
+
+    def _read_meta(self, camera_id):
+        try:
+            meta = json.loads(self._path(camera_id, "json").read_bytes())
+        except (OSError, ValueError):
+            return None
+        if time.time() - float(meta.get("updated_ts", 0)) > self.stale_after_seconds:
+            return None
+        return meta
+
+    def owned_elsewhere(self, camera_id):
+        """True if another live process is publishing this camera."""
+        meta = self._read_meta(camera_id)
+        return meta is not None and meta.get("pid") != os.getpid()
+
+    def read(self, camera_id):
+        """Latest spooled output for ``camera_id``, or ``None`` if missing or stale."""
+        meta = self._read_meta(camera_id)
+        if meta is None:
+            return None
+        try:
+            raw = self._path(camera_id, "raw.jpg").read_bytes()
+            annotated = self._path(camera_id, "annotated.jpg").read_bytes() if meta.get("has_annotated") else None
+        except OSError:
+            return None
+        return {
+            "seq": meta["seq"],
+            "raw": raw,
+            "annotated": annotated,
+            "detections": meta.get("detections", {}),
+            "status": meta.get("status", {}),
+        }
+
+    def mark_watched(self, camera_id, annotated):
+        """Tell the owning worker this camera has viewers (``annotated``: one
+        of them wants the all-overlays view). Expires after the stale threshold."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        meta = {"annotated": bool(annotated), "updated_ts": time.time()}
+        self._atomic_write(self._path(camera_id, "watch.json"), json.dumps(meta).encode("utf-8"))
+
+    def watched(self, camera_id):
+        """The current watch mark (``{"annotated": bool}``), or ``None``."""
+        try:
+            meta = json.loads(self._path(camera_id, "watch.json").read_bytes())
+        except (OSError, ValueError):
+            return None
+        if time.time() - float(meta.get("updated_ts", 0)) > self.stale_after_seconds:
+            return None
+        return meta
+
+    def clear(self, camera_id):
+        for suffix in ("json", "raw.jpg", "annotated.jpg", "watch.json"):
+            try:
+                self._path(camera_id, suffix).unlink()
+            except FileNotFoundError:
+                pass
+
+
+_spool = None
+_spool_lock = threading.Lock()
+
+
+def get_monitor_spool():
+    global _spool
+    with _spool_lock:
+        if _spool is None:
+            _spool = MonitorSpool()
+        return _spool
+
+
+def shard_camera_ids(camera_ids, shard_index, shard_count):
+    """Camera ids owned by ``shard_index`` out of ``shard_count`` workers."""
+    shard_count = max(1, int(shard_count))
+    return sorted(cid for cid in camera_ids if int(cid) % shard_count == int(shard_index))
+
+
+class MonitorWorker:
+    """Keep every active camera in a shard streaming and inferring.
+
+    Subscriptions are headless either way. With ``spool`` set, frames are
+    exported so another process can attach to them: every frame while the
+    camera is marked watched, else every ``MONITOR_IDLE_EXPORT_SECONDS``.
+    Without it, web viewers in the same process share the worker's hubs.
+    """
+
+    def __init__(self, shard_index=0, shard_count=1, spool=None, sync_interval=MONITOR_SYNC_INTERVAL_SECONDS):
+        self.shard_index = int(shard_index)
+        self.shard_count = max(1, int(shard_count))
+        self.spool = spool
+        self.sync_interval = sync_interval
+        self._subscriptions = {}
+        # Annotated subscriptions held for watched cameras, and per-camera
+        # (last export, last watch check, watched) timestamps/state. Both are
+        # touched from the hub threads that call ``_export``.
+        self._viewers = {}
+        self._export_state = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _watch(self, camera_id, now):
+        """Refresh the camera's watch mark at most every poll interval and
+        hold an annotated subscription only while one is requested."""
+        from .hub import acquire_camera_stream
+
+        with self._lock:
+            if camera_id not in self._subscriptions:
+                return False
+            exported_at, checked_at, watched = self._export_state.get(camera_id, (0.0, 0.0, False))
+            if now - checked_at < MONITOR_WATCH_POLL_SECONDS:
+                return watched
+            mark = self.spool.watched(camera_id)
+            watched = mark is not None
+            self._export_state[camera_id] = (exported_at, now, watched)
+            viewer = self._viewers.get(camera_id)
+            if watched and mark.get("annotated") and viewer is None:
+                self._viewers[camera_id] = acquire_camera_stream(camera_id, overlays=None, annotated=True)
+            elif viewer is not None and not (watched and mark.get("annotated")):
+                del self._viewers[camera_id]
+                viewer.close()
+        return watched
+
+    def _export(self, camera_id, views, detections):
+        from .hub import ALL_OVERLAYS, RAW_VIEW
+        from .inference_status import get_inference_status
+
+        raw = views.get(RAW_VIEW)
+        if raw is None:
+            return
+        now = time.monotonic()
+        watched = self._watch(camera_id, now)
+        with self._lock:
+            if camera_id not in self._subscriptions:
+                return
+            exported_at, checked_at, _ = self._export_state.get(camera_id, (0.0, 0.0, False))
+            if not watched and now - exported_at < MONITOR_IDLE_EXPORT_SECONDS:
+                return
+            self._export_state[camera_id] = (now, checked_at, watched)
+        self.spool.write(camera_id, raw, views.get(ALL_OVERLAYS), detections, get_inference_status(camera_id))
+
+    def sync(self):
+        """Subscribe to newly active cameras in this shard and drop removed ones."""
+        from django.db import close_old_connections
+        from .hub import acquire_camera_stream
+        from .models import Camera
+
+        close_old_connections()
+        active_ids = Camera.objects.filter(is_active=True).values_list("id", flat=True)
+        owned = set(shard_camera_ids(active_ids, self.shard_index, self.shard_count))
+
+        for camera_id in list(self._subscriptions):
+            subscription = self._subscriptions[camera_id]
+            if camera_id not in owned or subscription.ended:
+                self._drop(camera_id)
+
+        for camera_id in sorted(owned - set(self._subscriptions)):
+            subscription = acquire_camera_stream(camera_id, headless=True)
+            with self._lock:
+                self._subscriptions[camera_id] = subscription
+            if self.spool is not None:
+                subscription.hub.add_listener(self._export)
+            logger.info("Monitor shard %s/%s watching camera %s", self.shard_index, self.shard_count, camera_id)
+        return sorted(self._subscriptions)
+
+    def _drop(self, camera_id):
+        with self._lock:
+            subscription = self._subscriptions.pop(camera_id)
+            viewer = self._viewers.pop(camera_id, None)
+            self._export_state.pop(camera_id, None)
+        if self.spool is not None:
+            subscription.hub.remove_listener(self._export)
+        if viewer is not None:
+            viewer.close()
+        subscription.close()
+        logger.info("Monitor shard %s/%s released camera %s", self.shard_index, self.shard_count, camera_id)
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Monitor shard %s/%s sync failed", self.shard_index, self.shard_count)
+            self._stop.wait(self.sync_interval)
+        for camera_id in list(self._subscriptions):
+            self._drop(camera_id)
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def camera_ids(self):
+        return sorted(self._subscriptions)
+
+
+def start_in_process_monitor():
+    """Run a single monitor shard on a daemon thread in this process."""
+    worker = MonitorWorker()
+    threading.Thread(target=worker.run_forever, name="camera-monitor", daemon=True).start()
+    return worker
+
+
+def run_worker_process(shard_index, shard_count):
+    """Entry point for a spawned monitor process (see ``run_camera_monitors``)."""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sentinel.settings")
+    django.setup()
+    logging.basicConfig(level=logging.INFO, format=f"[monitor {shard_index}/{shard_count}] %(levelname)s %(message)s")
+    from alerts.persistence import get_persistence_queue
+
+    worker = MonitorWorker(shard_index, shard_count, spool=get_monitor_spool())
+    # The supervisor stops workers with SIGTERM; release the cameras and
+    # flush queued detections/alerts instead of dying mid-batch. Ctrl+C in
+    # the supervisor's terminal is left to the supervisor to propagate.
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    worker.run_forever()
+    get_persistence_queue().close()
@@ -4,5 +4,5 @@ from .models import Camera
 class CameraSerializer(serializers.ModelSerializer):
     class Meta:
         model = Camera
-        fields = ['id', 'name', 'source_url', 'location', 'is_active', 'created_at']
+        fields = ['id', 'name', 'source_url', 'inference_source_url', 'location', 'is_active', 'created_at']
         read_only_fields = ['id', 'created_at']
@@ -10,6 +10,8 @@ import cv2
 import numpy as np
 from datetime import datetime, timezone
 
+from .encoding import encode_jpeg
+
 logger = logging.getLogger(__name__)
 
 _IS_WINDOWS = sys.platform == "win32"
@@ -217,11 +219,11 @@ class DjangoCameraService:
                         except Exception:
                             logger.exception("Annotation error on camera %s", source)
 
-                    _, jpeg = cv2.imencode('.jpg', frame)
+                    jpeg = encode_jpeg(frame)
                     if jpeg is None:
                         yield placeholder
                         continue
-                    yield jpeg.tobytes()
+                    yield jpeg
             finally:
                 capture.release()
 
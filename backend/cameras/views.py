@@ -1,4 +1,3 @@
-import threading
 import cv2
 from django.http import StreamingHttpResponse
 from rest_framework import viewsets
@@ -9,62 +8,6 @@ from .serializers import CameraSerializer
 from .services import get_camera_service
 
 
-def _make_annotator(camera_id, overlays_csv):
-    """Return a function(frame)->frame that runs inference and draws
-    annotations.  Results are cached and re-run every INFERENCE_INTERVAL
-    frames.  Returns None while models are still loading (non-blocking)."""
-    from detection.services import get_inference_service, get_effective_enabled_model_keys
-    from cameras.models import Camera
-    from alerts.services import create_alert_from_inference
-    from annotation import draw_annotations
-    from .inference_status import mark_loading, mark_disabled, mark_running, mark_error
-
-    overlay_set = set(filter(None, overlays_csv.split(','))) if overlays_csv else None
-
-    svc = get_inference_service()
-    camera = Camera.objects.filter(pk=camera_id).first()
-
-    # Kick off model loading in background so live frames are never blocked
-    if not svc.ready:
-        mark_loading(camera_id)
-        threading.Thread(target=svc.preload, daemon=True).start()
-
-    cached = {}
-    counter = [0]
-    INFERENCE_INTERVAL = 5
-
-    def annotate(frame):
-        # While models are still loading, return raw frame
-        if not svc.ready:
-            mark_loading(camera_id)
-            return frame
-
-        counter[0] += 1
-        try:
-            if counter[0] % INFERENCE_INTERVAL == 1 or not cached:
-                enabled = get_effective_enabled_model_keys(camera_id)
-                if not enabled:
-                    cached.clear()
-                    mark_disabled(camera_id)
-                    return frame
-                new = {}
-                for key in enabled:
-                    new[key] = svc.run_inference_on_frame(key, frame, camera_id=camera_id)
-                if camera is not None:
-                    for key, result in new.items():
-                        create_alert_from_inference(camera=camera, model_key=key, result=result)
-                detected_count = sum(1 for item in new.values() if bool(item.get('detected')))
-                mark_running(camera_id, model_keys=enabled, detected_count=detected_count)
-                cached.clear()
-                cached.update(new)
-            return draw_annotations(frame, cached, enabled_overlays=overlay_set)
-        except Exception:
-            mark_error(camera_id, 'inference_exception')
-            return frame  # raw frame on any inference error
-
-    return annotate
-
-
 class CameraViewSet(viewsets.ModelViewSet):
     queryset = Camera.objects.all()
     serializer_class = CameraSerializer
@@ -122,19 +65,29 @@ class CameraViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'])
     def stream(self, request, pk=None):
+        from .hub import acquire_camera_stream
+
         camera = self.get_object()
         annotated = request.query_params.get('annotated', '0') == '1'
         overlays = request.query_params.get('overlays', '')
-        svc = get_camera_service()
-
-        annotate_fn = None
-        if annotated:
-            annotate_fn = _make_annotator(camera.id, overlays)
+        overlay_set = set(filter(None, overlays.split(','))) if overlays else None
+        tier = request.query_params.get('tier', '0')
 
         def generate():
-            for frame_bytes in svc.stream_frames(camera.source_url, camera.id, annotate_fn=annotate_fn):
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            # Attach to the camera's shared hub instead of opening another capture.
+            subscription = acquire_camera_stream(camera.id, overlays=overlay_set, annotated=annotated)
+            if tier.isdigit():
+                subscription.set_tier(int(tier))
+            try:
+                while True:
+                    frame_bytes = subscription.next_frame(timeout=1.0)
+                    if frame_bytes is not None:
+                        yield (b'--frame\r\n'
+                               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+                    if subscription.ended:
+                        return
+            finally:
+                subscription.close()
 
         response = StreamingHttpResponse(
             generate(),
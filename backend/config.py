@@ -106,10 +106,103 @@ MODEL_DEFINITIONS = {
     },
 }
 
+# Execution backend for the YOLO detectors: "torch" runs the .pt weights,
+# "onnx" (ONNX Runtime) and "openvino" run a graph exported next to them (see
+# model_export.py). Override per model with <KEY>_MODEL_BACKEND, e.g.
+# HELMET_MODEL_BACKEND=openvino; MODEL_RUNTIME_INT8 selects the quantized export.
+MODEL_RUNTIME_BACKENDS = ("torch", "onnx", "openvino")
+MODEL_RUNTIME_BACKEND = os.environ.get("MODEL_RUNTIME_BACKEND", "torch").strip().lower()
+MODEL_RUNTIME_INT8 = os.environ.get("MODEL_RUNTIME_INT8", "").strip().lower() in ("1", "true", "yes")
+
+# Detector input size (longest side). Set MODEL_INFERENCE_IMGSZ for every
+# detector, or <KEY>_MODEL_IMGSZ / PERSON_MODEL_IMGSZ for one; unset, a model
+# uses the size it was trained at. Each frame is letterboxed once per distinct
+# size and the tensor is shared by every detector running at that size.
+MODEL_INFERENCE_IMGSZ = os.environ.get("MODEL_INFERENCE_IMGSZ", "").strip()
+PERSON_MODEL_IMGSZ = int(os.environ.get("PERSON_MODEL_IMGSZ", MODEL_INFERENCE_IMGSZ) or 0) or None
+
+for _model_key, _definition in MODEL_DEFINITIONS.items():
+    if not _definition["weights_path"].endswith(".pt"):
+        continue
+    _definition.setdefault(
+        "backend",
+        os.environ.get(f"{_model_key.upper()}_MODEL_BACKEND", MODEL_RUNTIME_BACKEND).strip().lower(),
+    )
+    _definition.setdefault("int8", MODEL_RUNTIME_INT8)
+    _definition.setdefault(
+        "imgsz", int(os.environ.get(f"{_model_key.upper()}_MODEL_IMGSZ", MODEL_INFERENCE_IMGSZ) or 0) or None
+    )
+
+# Person-crop (ROI) mode for the PPE models matched against person boxes:
+# people are detected once per frame and the PPE detector runs on a batch of
+# padded person crops at PPE_ROI_CROP_IMGSZ instead of the full frame, which
+# helps small, distant workers in wide shots. Enable for all three with
+# PPE_ROI_CROP=1 or per model with e.g. VEST_ROI_CROP=1.
+PPE_ROI_CROP_MODELS = ("vest", "faceshield", "safetysuit")
+PPE_ROI_CROP = os.environ.get("PPE_ROI_CROP", "").strip().lower() in ("1", "true", "yes")
+PPE_ROI_CROP_IMGSZ = max(32, int(os.environ.get("PPE_ROI_CROP_IMGSZ", "320")))
+PPE_ROI_CROP_PADDING = max(0.0, float(os.environ.get("PPE_ROI_CROP_PADDING", "0.15")))
+
+for _model_key in PPE_ROI_CROP_MODELS:
+    _definition = MODEL_DEFINITIONS[_model_key]
+    _definition.setdefault(
+        "roi_crop",
+        os.environ.get(f"{_model_key.upper()}_ROI_CROP", "1" if PPE_ROI_CROP else "").strip().lower()
+        in ("1", "true", "yes"),
+    )
+    _definition.setdefault("roi_crop_imgsz", PPE_ROI_CROP_IMGSZ)
+    _definition.setdefault("roi_crop_padding", PPE_ROI_CROP_PADDING)
+
 DEFAULT_ALERT_CONFIDENCE_THRESHOLD = 0.45
+# Camera/model/severity configuration is served from an in-process snapshot
+# (detection/config_snapshot.py) that signals invalidate on change; this TTL
+# bounds how stale it can get in processes that never see those signals.
+CONFIG_SNAPSHOT_TTL_SECONDS = max(0.0, float(os.environ.get("CONFIG_SNAPSHOT_TTL_SECONDS", "5")))
+# Write-behind persistence of detections and alerts (alerts/persistence.py):
+# rows are bulk-inserted once a batch fills or the flush interval passes. When
+# the queue is full, inference waits up to the block time before dropping.
+# A flush interval of 0 writes every row through immediately.
+PERSIST_BATCH_SIZE = max(1, int(os.environ.get("PERSIST_BATCH_SIZE", "64")))
+PERSIST_FLUSH_INTERVAL_MS = max(0, int(os.environ.get("PERSIST_FLUSH_INTERVAL_MS", "250")))
+PERSIST_MAX_PENDING = max(1, int(os.environ.get("PERSIST_MAX_PENDING", "2048")))
+PERSIST_BLOCK_MS = max(0, int(os.environ.get("PERSIST_BLOCK_MS", "50")))
+# New alerts reaching dashboards within this window share one WebSocket frame
+# (alerts/fanout.py); 0 sends each flush immediately.
+ALERT_BROADCAST_WINDOW_MS = max(0, int(os.environ.get("ALERT_BROADCAST_WINDOW_MS", "200")))
+
+# Multi-camera inference batching: frames submitted within the wait window are
+# stacked into one pass per model (capped at the max batch size).
+INFERENCE_BATCH_MAX_SIZE = max(1, int(os.environ.get("INFERENCE_BATCH_MAX_SIZE", "8")))
+INFERENCE_BATCH_MAX_WAIT_MS = max(0, int(os.environ.get("INFERENCE_BATCH_MAX_WAIT_MS", "20")))
+# A camera gives up waiting on its batch after this long and counts the cycle
+# as failed, so a stuck batch or dead worker cannot hang its inference thread.
+INFERENCE_CYCLE_TIMEOUT_SECONDS = max(1.0, float(os.environ.get("INFERENCE_CYCLE_TIMEOUT_SECONDS", "30")))
+# Adapters of one frame run concurrently on a pool of this many threads
+# (model_executor.py); 1 runs them one after another.
+INFERENCE_MODEL_WORKERS = max(1, int(os.environ.get("INFERENCE_MODEL_WORKERS", "1")))
+# Out-of-process inference (inference_workers.py): N spawned worker processes,
+# each fed through shared-memory frame slots; 0 runs in-process.
+INFERENCE_PROCESS_WORKERS = max(0, int(os.environ.get("INFERENCE_PROCESS_WORKERS", "0")))
+INFERENCE_PROCESS_SLOTS = max(1, int(os.environ.get("INFERENCE_PROCESS_SLOTS", "4")))
+INFERENCE_PROCESS_SLOT_MB = max(1, int(os.environ.get("INFERENCE_PROCESS_SLOT_MB", "8")))
 FATIGUE_CONSECUTIVE_FRAMES_THRESHOLD = 8
 HEAD_TILT_ALERT_DEGREES = 15.0
 
+# Swin fatigue classifier runtime: backend "torch", "torchscript" or "onnx";
+# precision "fp32", "bf16" (torch/torchscript) or "int8" (onnx only). Face
+# crops from concurrently scheduled cameras are classified in one batch.
+FATIGUE_CLASSIFIER_BACKEND = os.environ.get("FATIGUE_CLASSIFIER_BACKEND", "torch").strip().lower()
+FATIGUE_CLASSIFIER_PRECISION = os.environ.get("FATIGUE_CLASSIFIER_PRECISION", "fp32").strip().lower()
+FATIGUE_CLASSIFIER_MAX_BATCH = max(1, int(os.environ.get("FATIGUE_CLASSIFIER_MAX_BATCH", "8")))
+# Adaptive Swin skipping: between classifier runs the last probability for a
+# camera/face is reused unless N frames have passed, it is older than the
+# staleness limit, or EAR/MAR/head pose moved past the engine's change
+# thresholds. 1 runs the classifier on every frame.
+FATIGUE_CLASSIFIER_EVERY_N_FRAMES = max(1, int(os.environ.get("FATIGUE_CLASSIFIER_EVERY_N_FRAMES", "1")))
+FATIGUE_CLASSIFIER_MAX_STALENESS_SECONDS = max(
+    0.0, float(os.environ.get("FATIGUE_CLASSIFIER_MAX_STALENESS_SECONDS", "2.0"))
+)
+
 
 def ensure_ml_models_layout() -> None:
     ML_MODELS_DIR.mkdir(parents=True, exist_ok=True)
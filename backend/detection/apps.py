@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class DetectionConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'detection'
+
+    def ready(self):
+        from .config_snapshot import connect_signals
+
+        connect_signals()
@@ -0,0 +1,103 @@
+"""In-process snapshot of the configuration read on every frame.
+
+Cameras (active flag and name), global and per-camera model enablement and
+per-camera alert severity overrides are loaded together (four queries) and then served from
+memory, so the camera stream and inference loops never query the database
+for them. Saving or deleting any of those rows invalidates the snapshot
+through Django signals (connected when the ``detection`` app is ready); the
+next read reloads it.
+
+Signals only reach the process that made the change, so a snapshot also
+expires after ``CONFIG_SNAPSHOT_TTL_SECONDS`` for other processes such as
+camera monitor workers.
+"""
+import threading
+import time
+
+from django.db.models.signals import post_delete, post_save
+
+from config import CONFIG_SNAPSHOT_TTL_SECONDS
+
+_snapshot = None
+_generation = 0
+_lock = threading.Lock()
+
+
+class ConfigSnapshot:
+    def __init__(self, active_camera_ids, enabled_model_keys, disabled_overrides, severity_overrides, camera_names=None):
+        self.active_camera_ids = frozenset(active_camera_ids)
+        self.camera_names = dict(camera_names or {})
+        self.enabled_model_keys = frozenset(enabled_model_keys)
+        self._disabled_overrides = disabled_overrides
+        self._severity_overrides = severity_overrides
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls):
+        from alerts.models import CameraAlertSeverity
+        from cameras.models import Camera
+
+        from .models import CameraModel, ModelSetting
+
+        cameras = list(Camera.objects.values_list('id', 'name', 'is_active'))
+        disabled_overrides = {}
+        for camera_id, model_key in CameraModel.objects.filter(is_enabled=False).values_list('camera_id', 'model_setting_id'):
+            disabled_overrides.setdefault(camera_id, set()).add(model_key)
+        return cls(
+            active_camera_ids=[camera_id for camera_id, _, is_active in cameras if is_active],
+            enabled_model_keys=ModelSetting.objects.filter(is_enabled=True).values_list('key', flat=True),
+            disabled_overrides=disabled_overrides,
+            severity_overrides={
+                (camera_id, model_key): severity
+                for camera_id, model_key, severity in CameraAlertSeverity.objects.values_list('camera_id', 'model_key', 'severity')
+            },
+            camera_names={camera_id: name for camera_id, name, _ in cameras},
+        )
+
+    def is_camera_active(self, camera_id):
+        return int(camera_id) in self.active_camera_ids
+
+    def camera_name(self, camera_id):
+        return self.camera_names.get(int(camera_id), '')
+
+    def effective_model_keys(self, camera_id):
+        """Globally enabled models minus the camera's disabled overrides."""
+        return set(self.enabled_model_keys - self._disabled_overrides.get(int(camera_id), set()))
+
+    def alert_severity(self, camera_id, model_key):
+        """The camera's severity override for ``model_key``, or ``None``."""
+        return self._severity_overrides.get((int(camera_id), model_key))
+
+
+def get_config_snapshot():
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - snapshot.loaded_at < CONFIG_SNAPSHOT_TTL_SECONDS:
+        return snapshot
+    with _lock:
+        generation = _generation
+    snapshot = ConfigSnapshot.load()
+    with _lock:
+        # A change committed while loading may be missing from this snapshot:
+        # serve it once but do not keep it.
+        if generation == _generation:
+            _snapshot = snapshot
+    return snapshot
+
+
+def invalidate_config_snapshot(**kwargs):
+    global _snapshot, _generation
+    with _lock:
+        _generation += 1
+        _snapshot = None
+
+
+def connect_signals():
+    from alerts.models import CameraAlertSeverity
+    from cameras.models import Camera
+
+    from .models import CameraModel, ModelSetting
+
+    for model in (Camera, ModelSetting, CameraModel, CameraAlertSeverity):
+        for name, signal in (("save", post_save), ("delete", post_delete)):
+            signal.connect(invalidate_config_snapshot, sender=model, dispatch_uid=f"config_snapshot_{name}_{model.__name__}")
@@ -7,7 +7,15 @@ backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
-from config import MODEL_DEFINITIONS
+from config import (
+    INFERENCE_BATCH_MAX_SIZE,
+    INFERENCE_BATCH_MAX_WAIT_MS,
+    INFERENCE_CYCLE_TIMEOUT_SECONDS,
+    INFERENCE_PROCESS_SLOT_MB,
+    INFERENCE_PROCESS_SLOTS,
+    INFERENCE_PROCESS_WORKERS,
+    MODEL_DEFINITIONS,
+)
 
 _inference_service = None
 
@@ -20,6 +28,7 @@ class _DjangoInferenceAdapter:
 
     def __init__(self):
         self._real = None
+        self._scheduler = None
         self._lock = threading.Lock()
 
     # --- loading helpers ---------------------------------------------------
@@ -27,9 +36,30 @@ class _DjangoInferenceAdapter:
     def _ensure_loaded(self):
         if self._real is None:
             with self._lock:
+                if self._real is None and INFERENCE_PROCESS_WORKERS:
+                    # Worker processes load the models and batch across
+                    # cameras; the pool stands in for both service and scheduler.
+                    from inference_workers import InferenceWorkerPool
+                    pool = InferenceWorkerPool(
+                        workers=INFERENCE_PROCESS_WORKERS,
+                        slots_per_worker=INFERENCE_PROCESS_SLOTS,
+                        slot_bytes=INFERENCE_PROCESS_SLOT_MB * 1024 * 1024,
+                        model_names={key: info['display_name'] for key, info in MODEL_DEFINITIONS.items()},
+                        slot_timeout=INFERENCE_CYCLE_TIMEOUT_SECONDS,
+                    )
+                    self._scheduler = pool
+                    self._real = pool
                 if self._real is None:          # double-check
-                    from inference_service import InferenceService as _IS
-                    self._real = _IS(MODEL_DEFINITIONS)
+                    from inference_service import InferenceService as _IS, batch_pass_failure_stats
+                    from inference_scheduler import InferenceScheduler
+                    real = _IS(MODEL_DEFINITIONS)
+                    self._scheduler = InferenceScheduler(
+                        real.run_models_batch,
+                        max_batch_size=INFERENCE_BATCH_MAX_SIZE,
+                        max_wait_ms=INFERENCE_BATCH_MAX_WAIT_MS,
+                        pass_failure_stats=batch_pass_failure_stats,
+                    )
+                    self._real = real
 
     @property
     def ready(self):
@@ -81,6 +111,36 @@ class _DjangoInferenceAdapter:
             'payload': {'error': 'No result returned'},
         }
 
+    def run_models_on_frame(self, model_keys, frame, camera_id=0, on_timeout=None):
+        """Run several models on one frame in a single pass so shared stages
+        (e.g. person detection) are computed once.  Frames from concurrent
+        callers are batched by the central scheduler.  Returns {model_key: result};
+        raises ``concurrent.futures.TimeoutError`` after
+        ``INFERENCE_CYCLE_TIMEOUT_SECONDS``, first passing the abandoned
+        future to ``on_timeout`` (the frame is read until it completes)."""
+        self._ensure_loaded()
+        results = self._scheduler.run(
+            frame,
+            list(model_keys),
+            camera_id=camera_id,
+            timeout=INFERENCE_CYCLE_TIMEOUT_SECONDS,
+            on_timeout=on_timeout,
+        )
+        return {result['model_key']: result for result in results}
+
+    def batching_stats(self):
+        """Scheduler counters, or None while models are still loading."""
+        return self._scheduler.stats() if self._scheduler is not None else None
+
+    def execution_stats(self):
+        """Per-model wall time and pool queue wait, or None while models are still loading."""
+        if self._real is None:
+            return None
+        if hasattr(self._real, 'execution_stats'):
+            return self._real.execution_stats()
+        from inference_service import model_execution_stats
+        return model_execution_stats()
+
 
 def get_inference_service():
     global _inference_service
@@ -94,17 +154,10 @@ def get_model_definitions():
 
 
 def get_globally_enabled_model_keys():
-    from .models import ModelSetting
-    return set(ModelSetting.objects.filter(is_enabled=True).values_list('key', flat=True))
+    from .config_snapshot import get_config_snapshot
+    return set(get_config_snapshot().enabled_model_keys)
 
 
 def get_effective_enabled_model_keys(camera_id):
-    from .models import CameraModel
-
-    enabled = get_globally_enabled_model_keys()
-    overrides = CameraModel.objects.filter(camera_id=camera_id).select_related('model_setting')
-    for override in overrides:
-        key = override.model_setting_id
-        if not override.is_enabled:
-            enabled.discard(key)
-    return enabled
+    from .config_snapshot import get_config_snapshot
+    return get_config_snapshot().effective_model_keys(camera_id)
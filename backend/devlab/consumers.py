@@ -73,9 +73,7 @@ class VideoAnalysisConsumer(WebsocketConsumer):
                     break
 
                 if frame_idx % sample_every == 0:
-                    detections = {}
-                    for key in enabled:
-                        detections[key] = svc.run_inference_on_frame(key, frame, camera_id=0)
+                    detections = svc.run_models_on_frame(enabled, frame, camera_id=0) if enabled else {}
 
                     self._send({
                         'type': 'frame',
@@ -12,6 +12,7 @@ from rest_framework.response import Response
 from .models import DevVideo
 from .serializers import DevVideoSerializer, ThresholdSerializer
 from detection.services import get_inference_service, get_model_definitions
+from motion_gate import MotionGate
 
 UPLOAD_DIR = os.path.join(settings.MEDIA_ROOT, 'dev_videos')
 
@@ -83,6 +84,7 @@ def video_stream(request, video_id):
         enabled = set()
         frame_idx = 0
         INFER_EVERY = 3
+        gate = MotionGate()
 
         while cap.isOpened():
             frame_start = time.monotonic()
@@ -95,12 +97,14 @@ def video_stream(request, video_id):
 
             if annotated and svc and svc.ready:
                 try:
-                    if frame_idx % INFER_EVERY == 0 or not cached:
+                    due = frame_idx % INFER_EVERY == 0 or not cached
+                    # Same motion gate as live cameras; fatigue needs every cycle.
+                    if 'fatigue' not in enabled:
+                        due = gate.decide(frame, due=due)
+                    if due:
                         enabled = get_globally_enabled_model_keys()
                         if enabled:
-                            new = {}
-                            for key in enabled:
-                                new[key] = svc.run_inference_on_frame(key, frame, camera_id=0)
+                            new = svc.run_models_on_frame(enabled, frame, camera_id=0)
                             cached.clear()
                             cached.update(new)
                         else:
@@ -150,10 +154,7 @@ def video_analyze(request, video_id):
         if frame_idx % sample_every == 0:
             from detection.services import get_globally_enabled_model_keys
             enabled = get_globally_enabled_model_keys()
-            frame_results = {}
-            for key in enabled:
-                result = svc.run_inference_on_frame(key, frame, camera_id=0)
-                frame_results[key] = result
+            frame_results = svc.run_models_on_frame(enabled, frame, camera_id=0) if enabled else {}
             results.append({'frame': frame_idx, 'detections': frame_results})
             samples += 1
         frame_idx += 1
@@ -242,6 +243,11 @@ def _gpu_stats():
 
 @api_view(['GET'])
 def performance_view(request):
+    from alerts.engine import get_alert_engine
+    from alerts.fanout import get_alert_fanout
+    from alerts.persistence import get_persistence_queue
+    from annotation import overlay_cache_stats
+
     process = psutil.Process()
     mem = process.memory_info()
     gpu = _gpu_stats()
@@ -249,5 +255,11 @@ def performance_view(request):
     return Response({
         'cpu_percent': psutil.cpu_percent(interval=0),
         'memory_mb': round(mem.rss / 1024 / 1024, 1),
+        'inference_batching': get_inference_service().batching_stats(),
+        'model_execution': get_inference_service().execution_stats(),
+        'overlay_cache': overlay_cache_stats(),
+        'alert_engine': get_alert_engine().stats(),
+        'alert_persistence': get_persistence_queue().stats(),
+        'alert_fanout': get_alert_fanout().stats(),
         **gpu,
     })
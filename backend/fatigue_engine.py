@@ -1,4 +1,8 @@
-from typing import Dict
+import logging
+import os
+import threading
+import time
+from typing import Dict, List
 
 import cv2
 from mediapipe import Image as MpImage
@@ -9,15 +13,204 @@ import numpy as np
 import torch
 import torch.nn as nn
 import torchvision.models as models
-from PIL import Image
 from scipy.spatial import distance as dist
-from torchvision import transforms
+
+logger = logging.getLogger(__name__)
+
+CLASSIFIER_INPUT_SIZE = 224
+CLASSIFIER_BACKENDS = ("torch", "torchscript", "onnx")
+CLASSIFIER_PRECISIONS = ("fp32", "bf16", "int8")
+_IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
 
 
 def _clamp(value: float, low: float, high: float) -> float:
     return max(low, min(value, high))
 
 
+def create_face_landmarker(face_landmarker_path: str, num_faces: int = 1):
+    base_options = mp_python.BaseOptions(model_asset_path=face_landmarker_path)
+    options = mp_vision.FaceLandmarkerOptions(
+        base_options=base_options,
+        running_mode=mp_vision.RunningMode.IMAGE,
+        num_faces=num_faces,
+        min_face_detection_confidence=0.35,
+        min_face_presence_confidence=0.35,
+        min_tracking_confidence=0.35,
+    )
+    return mp_vision.FaceLandmarker.create_from_options(options)
+
+
+def detect_face_landmarks(face_landmarker, frame_rgb):
+    """Run ``face_landmarker`` on an RGB frame and return one landmark list per face."""
+    image = MpImage(image_format=ImageFormat.SRGB, data=frame_rgb)
+    result = face_landmarker.detect(image)
+    return list(result.face_landmarks or [])
+
+
+def preprocess_face_crops(crops_rgb) -> np.ndarray:
+    """Resize and normalize RGB face crops into one ``(N, 3, 224, 224)`` float32 batch.
+
+    Matches the training transform (resize, scale to [0, 1], ImageNet
+    normalization) with OpenCV/NumPy instead of a PIL round-trip per crop.
+    """
+    size = (CLASSIFIER_INPUT_SIZE, CLASSIFIER_INPUT_SIZE)
+    batch = np.empty((len(crops_rgb), CLASSIFIER_INPUT_SIZE, CLASSIFIER_INPUT_SIZE, 3), dtype=np.float32)
+    for index, crop in enumerate(crops_rgb):
+        interpolation = cv2.INTER_AREA if crop.shape[0] > size[1] or crop.shape[1] > size[0] else cv2.INTER_LINEAR
+        batch[index] = cv2.resize(crop, size, interpolation=interpolation)
+    batch *= 1.0 / 255.0
+    batch -= _IMAGENET_MEAN
+    batch /= _IMAGENET_STD
+    return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+
+def _fresh_artifact(artifact_path: str, source_path: str) -> bool:
+    return os.path.exists(artifact_path) and os.path.getmtime(artifact_path) >= os.path.getmtime(source_path)
+
+
+class SwinFatigueClassifier:
+    """Batched Swin-V2 fatigue classifier with a selectable CPU runtime.
+
+    ``backend`` is ``"torch"`` (eager), ``"torchscript"`` (traced and frozen,
+    cached as ``<weights>.torchscript``) or ``"onnx"`` (ONNX Runtime, exported
+    to ``<weights>.onnx``). ``precision`` is ``"fp32"``, ``"bf16"`` (CPU
+    autocast, torch/torchscript only) or ``"int8"`` (ONNX Runtime dynamic
+    quantization, cached as ``<weights>.int8.onnx``). A runtime that cannot
+    be prepared falls back to eager FP32 and records ``runtime_error``.
+    """
+
+    def __init__(self, model_path: str, device, backend: str = "torch", precision: str = "fp32", max_batch_size: int = 8):
+        self.model_path = model_path
+        self.device = device
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.runtime_error = None
+
+        self.model = models.swin_v2_s(weights=None)
+        self.model.head = nn.Sequential(
+            nn.Dropout(p=0.5),
+            nn.Linear(in_features=768, out_features=1, bias=True),
+        )
+        state = torch.load(model_path, map_location=self.device)
+        if isinstance(state, dict) and "model_state_dict" in state:
+            state = state["model_state_dict"]
+        self.model.load_state_dict(state, strict=False)
+        self.model.to(self.device)
+        self.model.eval()
+
+        self.backend = "torch"
+        self.precision = "fp32"
+        self._runner = self.model
+        self._onnx_session = None
+        try:
+            self._prepare_runtime(backend, precision)
+        except Exception as exc:
+            self.runtime_error = f"{backend}/{precision} unavailable: {exc}"
+            logger.warning("Fatigue classifier falling back to torch/fp32: %s", exc)
+            self.backend, self.precision = "torch", "fp32"
+            self._runner, self._onnx_session = self.model, None
+
+        # predict() runs on every camera's inference thread; stats() on request threads.
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "faces": 0, "total_ms": 0.0, "last_batch_size": 0, "last_batch_ms": 0.0}
+
+    def _example_input(self):
+        return torch.zeros((2, 3, CLASSIFIER_INPUT_SIZE, CLASSIFIER_INPUT_SIZE), device=self.device)
+
+    def _prepare_runtime(self, backend, precision):
+        if backend not in CLASSIFIER_BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}")
+        if precision not in CLASSIFIER_PRECISIONS:
+            raise ValueError(f"unknown precision {precision!r}")
+        if backend == "onnx":
+            if precision == "bf16":
+                raise ValueError("bf16 is not supported on the ONNX Runtime path")
+            self._onnx_session = self._load_onnx(int8=precision == "int8")
+        elif precision == "int8":
+            raise ValueError("int8 requires the onnx backend")
+        elif backend == "torchscript":
+            self._runner = self._load_torchscript()
+        self.backend, self.precision = backend, precision
+
+    def _load_torchscript(self):
+        cache_path = f"{os.path.splitext(self.model_path)[0]}.torchscript"
+        if _fresh_artifact(cache_path, self.model_path):
+            return torch.jit.load(cache_path, map_location=self.device)
+        with torch.no_grad():
+            traced = torch.jit.freeze(torch.jit.trace(self.model, self._example_input(), check_trace=False))
+        torch.jit.save(traced, cache_path)
+        return traced
+
+    def _load_onnx(self, int8: bool):
+        import onnxruntime as ort
+
+        stem = os.path.splitext(self.model_path)[0]
+        fp32_path = f"{stem}.onnx"
+        if not _fresh_artifact(fp32_path, self.model_path):
+            torch.onnx.export(
+                self.model,
+                self._example_input(),
+                fp32_path,
+                input_names=["input"],
+                output_names=["logit"],
+                dynamic_axes={"input": {0: "batch"}, "logit": {0: "batch"}},
+                opset_version=17,
+            )
+        session_path = fp32_path
+        if int8:
+            session_path = f"{stem}.int8.onnx"
+            if not _fresh_artifact(session_path, fp32_path):
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+
+                quantize_dynamic(fp32_path, session_path, weight_type=QuantType.QInt8)
+        return ort.InferenceSession(session_path, providers=["CPUExecutionProvider"])
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        if self._onnx_session is not None:
+            logits = self._onnx_session.run(None, {"input": batch})[0]
+            return 1.0 / (1.0 + np.exp(-logits.reshape(-1)))
+        tensor = torch.from_numpy(batch).to(self.device)
+        with torch.no_grad():
+            if self.precision == "bf16":
+                with torch.autocast(device_type=self.device.type, dtype=torch.bfloat16):
+                    logits = self._runner(tensor)
+            else:
+                logits = self._runner(tensor)
+        return torch.sigmoid(logits.float()).reshape(-1).cpu().numpy()
+
+    def predict(self, crops_rgb) -> List[float]:
+        """Fatigue probability for each RGB face crop, in chunks of ``max_batch_size``."""
+        probabilities = []
+        for start in range(0, len(crops_rgb), self.max_batch_size):
+            chunk = crops_rgb[start:start + self.max_batch_size]
+            started = time.perf_counter()
+            probabilities.extend(float(p) for p in self._forward(preprocess_face_crops(chunk)))
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            with self._stats_lock:
+                self._stats["batches"] += 1
+                self._stats["faces"] += len(chunk)
+                self._stats["total_ms"] += elapsed_ms
+                self._stats["last_batch_size"] = len(chunk)
+                self._stats["last_batch_ms"] = round(elapsed_ms, 2)
+        return probabilities
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        batches = snapshot["batches"]
+        return {
+            "backend": self.backend,
+            "precision": self.precision,
+            "max_batch_size": self.max_batch_size,
+            "runtime_error": self.runtime_error,
+            "batches": batches,
+            "faces": snapshot["faces"],
+            "last_batch_size": snapshot["last_batch_size"],
+            "last_batch_ms": snapshot["last_batch_ms"],
+            "avg_batch_ms": round(snapshot["total_ms"] / batches, 2) if batches else 0.0,
+        }
+
+
 class FatigueHybridEngine:
     def __init__(
         self,
@@ -25,6 +218,13 @@ class FatigueHybridEngine:
         face_landmarker_path: str,
         head_tilt_alert_degrees: float = 15.0,
         fatigue_threshold: float = 0.55,
+        face_landmarker=None,
+        classifier_backend: str = "torch",
+        classifier_precision: str = "fp32",
+        classifier_max_batch_size: int = 8,
+        classifier_every_n_frames: int = 1,
+        classifier_max_staleness_seconds: float = 2.0,
+        max_faces: int = 6,
     ):
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.head_tilt_alert_degrees = float(head_tilt_alert_degrees)
@@ -34,34 +234,37 @@ class FatigueHybridEngine:
         self.ear_force_fatigue_threshold = 0.22
         self.mar_narrow_threshold = 0.28
 
-        self.model = models.swin_v2_s(weights=None)
-        self.model.head = nn.Sequential(
-            nn.Dropout(p=0.5),
-            nn.Linear(in_features=768, out_features=1, bias=True),
+        self.classifier = SwinFatigueClassifier(
+            model_path,
+            self.device,
+            backend=classifier_backend,
+            precision=classifier_precision,
+            max_batch_size=classifier_max_batch_size,
         )
+        self.model = self.classifier.model
 
-        state = torch.load(model_path, map_location=self.device)
-        if isinstance(state, dict) and "model_state_dict" in state:
-            state = state["model_state_dict"]
-        self.model.load_state_dict(state, strict=False)
-        self.model.to(self.device)
-        self.model.eval()
+        # Landmark-only fast path: reuse the last Swin probability per
+        # camera/face until it is N frames or max-staleness old, or until the
+        # cheap landmark features change enough to warrant a fresh pass.
+        self.classifier_every_n_frames = max(1, int(classifier_every_n_frames))
+        self.classifier_max_staleness_seconds = float(classifier_max_staleness_seconds)
+        self.skip_ear_delta = 0.03
+        self.skip_mar_delta = 0.08
+        self.skip_pose_delta_degrees = 6.0
+        self._ml_cache = {}
+        self._ml_cache_lock = threading.Lock()
+        self._skipped_faces = 0
 
-        base_options = mp_python.BaseOptions(model_asset_path=face_landmarker_path)
-        options = mp_vision.FaceLandmarkerOptions(
-            base_options=base_options,
-            running_mode=mp_vision.RunningMode.IMAGE,
-            num_faces=1,
-            min_face_detection_confidence=0.35,
-            min_face_presence_confidence=0.35,
-            min_tracking_confidence=0.35,
-        )
+        # A landmarker shared with the per-frame landmark stage can be passed
+        # in so the process holds a single FaceLandmarker graph.
         self.face_landmarker_error = None
-        try:
-            self.face_landmarker = mp_vision.FaceLandmarker.create_from_options(options)
-        except Exception as exc:
-            self.face_landmarker = None
-            self.face_landmarker_error = str(exc)
+        self.face_landmarker = face_landmarker
+        if self.face_landmarker is None:
+            try:
+                self.face_landmarker = create_face_landmarker(face_landmarker_path, num_faces=max_faces)
+            except Exception as exc:
+                self.face_landmarker = None
+                self.face_landmarker_error = str(exc)
 
         self.left_eye_indices = [33, 160, 158, 133, 153, 144]
         self.right_eye_indices = [362, 385, 387, 263, 373, 380]
@@ -78,17 +281,6 @@ class FatigueHybridEngine:
             dtype=np.float64,
         )
 
-        self.transform = transforms.Compose(
-            [
-                transforms.Resize((224, 224)),
-                transforms.ToTensor(),
-                transforms.Normalize(
-                    mean=[0.485, 0.456, 0.406],
-                    std=[0.229, 0.224, 0.225],
-                ),
-            ]
-        )
-
     def _eye_aspect_ratio(self, eye) -> float:
         a = dist.euclidean(eye[1], eye[5])
         b = dist.euclidean(eye[2], eye[4])
@@ -121,6 +313,11 @@ class FatigueHybridEngine:
         y2 = int(np.max(landmarks[:, 1]))
         return {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
 
+    def face_box_from_landmarks(self, face_landmarks, frame_h: int, frame_w: int):
+        """Pixel ``(x1, y1, x2, y2)`` of one face's normalized landmarks (for tracking)."""
+        box = self._face_box(self._landmarks_to_pixels(face_landmarks, frame_h, frame_w))
+        return (box["x1"], box["y1"], box["x2"], box["y2"])
+
     def _head_pose(self, landmarks, frame_h, frame_w):
         image_points = np.array(
             [
@@ -167,28 +364,90 @@ class FatigueHybridEngine:
             line_end = (int(nose[0] - line_dx), int(nose[1] - line_dy))
         return pitch, yaw, roll, nose, line_end
 
-    def _fatigue_ml_probability(self, frame, face_box) -> float:
+    @staticmethod
+    def _face_crop(frame, face_box, frame_rgb=None):
         frame_h, frame_w = frame.shape[:2]
         pad = 12
         x1 = max(0, int(face_box["x1"]) - pad)
         y1 = max(0, int(face_box["y1"]) - pad)
         x2 = min(frame_w, int(face_box["x2"]) + pad)
         y2 = min(frame_h, int(face_box["y2"]) + pad)
+        if frame_rgb is not None:
+            return frame_rgb[y1:y2, x1:x2]
         face = frame[y1:y2, x1:x2]
-        if face.size == 0:
+        return cv2.cvtColor(face, cv2.COLOR_BGR2RGB) if face.size else face
+
+    def _fatigue_ml_probability(self, frame, face_box, frame_rgb=None) -> float:
+        face_rgb = self._face_crop(frame, face_box, frame_rgb)
+        if face_rgb.size == 0:
             return 0.0
+        return self.classifier.predict([face_rgb])[0]
 
-        face_rgb = cv2.cvtColor(face, cv2.COLOR_BGR2RGB)
-        image = Image.fromarray(face_rgb)
-        tensor = self.transform(image).unsqueeze(0).to(self.device)
-        with torch.no_grad():
-            output = self.model(tensor)
-            prob = torch.sigmoid(output).item()
-        return float(prob)
+    def classifier_stats(self) -> Dict:
+        stats = dict(self.classifier.stats())
+        stats["every_n_frames"] = self.classifier_every_n_frames
+        stats["skipped_faces"] = self._skipped_faces
+        return stats
+
+    def _cached_probability(self, cache_key, measured: Dict, now: float):
+        """Reusable ML probability for ``cache_key`` or ``None`` if Swin must run."""
+        if cache_key is None or self.classifier_every_n_frames <= 1:
+            return None
+        with self._ml_cache_lock:
+            cached = self._ml_cache.get(cache_key)
+            if cached is None:
+                return None
+            if cached["frames_since"] + 1 >= self.classifier_every_n_frames:
+                return None
+            if now - cached["ts"] > self.classifier_max_staleness_seconds:
+                return None
+            pitch, yaw, roll = measured["pose"][:3]
+            if (
+                abs(measured["ear"] - cached["ear"]) > self.skip_ear_delta
+                or abs(measured["mar"] - cached["mar"]) > self.skip_mar_delta
+                or max(abs(pitch - cached["pitch"]), abs(yaw - cached["yaw"]), abs(roll - cached["roll"]))
+                > self.skip_pose_delta_degrees
+            ):
+                return None
+            cached["frames_since"] += 1
+            self._skipped_faces += 1
+            return cached
+
+    def _remember_probability(self, cache_key, measured: Dict, probability: float, now: float) -> None:
+        if cache_key is None or self.classifier_every_n_frames <= 1:
+            return
+        pitch, yaw, roll = measured["pose"][:3]
+        with self._ml_cache_lock:
+            self._ml_cache[cache_key] = {
+                "probability": probability,
+                "ts": now,
+                "frames_since": 0,
+                "ear": measured["ear"],
+                "mar": measured["mar"],
+                "pitch": pitch,
+                "yaw": yaw,
+                "roll": roll,
+            }
 
-    def analyze(self, frame) -> Dict:
+    def forget(self, cache_key) -> None:
+        """Drop the cached ML probability for a camera/face that went away."""
+        with self._ml_cache_lock:
+            self._ml_cache.pop(cache_key, None)
+
+    @staticmethod
+    def _largest_face(face_landmarks_list):
+        def extent(face):
+            xs = [lm.x for lm in face]
+            ys = [lm.y for lm in face]
+            return (max(xs) - min(xs)) * (max(ys) - min(ys))
+
+        return max(face_landmarks_list, key=extent)
+
+    def _measure(self, frame, face_landmarks=None, frame_rgb=None) -> Dict:
+        """Landmark geometry and the face crop for the classifier, or a final
+        ``no_face`` result when there is nothing to classify."""
         frame_h, frame_w = frame.shape[:2]
-        if self.face_landmarker is None:
+        if face_landmarks is None and self.face_landmarker is None:
             return {
                 "status": "no_face",
                 "fatigue_probability": 0.0,
@@ -207,10 +466,11 @@ class FatigueHybridEngine:
                 "landmark_error": self.face_landmarker_error,
             }
 
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image = MpImage(image_format=ImageFormat.SRGB, data=frame_rgb)
-        result = self.face_landmarker.detect(image)
-        if not result.face_landmarks:
+        if face_landmarks is None:
+            if frame_rgb is None:
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            face_landmarks = detect_face_landmarks(self.face_landmarker, frame_rgb)
+        if not face_landmarks:
             return {
                 "status": "no_face",
                 "fatigue_probability": 0.0,
@@ -227,7 +487,7 @@ class FatigueHybridEngine:
                 "pose_line": None,
             }
 
-        landmarks = self._landmarks_to_pixels(result.face_landmarks[0], frame_h, frame_w)
+        landmarks = self._landmarks_to_pixels(self._largest_face(face_landmarks), frame_h, frame_w)
         face_box = self._face_box(landmarks)
         left_ear = self._eye_aspect_ratio(landmarks[self.left_eye_indices])
         right_ear = self._eye_aspect_ratio(landmarks[self.right_eye_indices])
@@ -238,7 +498,27 @@ class FatigueHybridEngine:
         head_tilt_degrees = max(abs(pitch), abs(roll))
         head_tilt_exceeded = head_tilt_degrees > self.head_tilt_alert_degrees
 
-        ml_prob = self._fatigue_ml_probability(frame, face_box)
+        return {
+            "status": "measured",
+            "landmarks": landmarks,
+            "face_box": face_box,
+            "ear": ear,
+            "mar": mar,
+            "pose": (pitch, yaw, roll, nose, line_end),
+            "head_tilt_degrees": head_tilt_degrees,
+            "head_tilt_exceeded": head_tilt_exceeded,
+            "face_crop": self._face_crop(frame, face_box, frame_rgb),
+        }
+
+    def _score(self, measured: Dict, ml_prob: float) -> Dict:
+        landmarks = measured["landmarks"]
+        face_box = measured["face_box"]
+        ear = measured["ear"]
+        mar = measured["mar"]
+        pitch, yaw, roll, nose, line_end = measured["pose"]
+        head_tilt_degrees = measured["head_tilt_degrees"]
+        head_tilt_exceeded = measured["head_tilt_exceeded"]
+
         ear_score = _clamp((self.ear_threshold - ear) / self.ear_threshold, 0.0, 1.0)
         mar_score = _clamp(mar / self.mar_scale_max, 0.0, 1.0)
         hybrid_score = (0.65 * ml_prob) + (0.3 * ear_score) + (0.05 * mar_score)
@@ -279,3 +559,74 @@ class FatigueHybridEngine:
                 "end": [int(line_end[0]), int(line_end[1])],
             },
         }
+
+    def analyze_batch(self, items) -> List[Dict]:
+        """Analyze several frames with one batched classifier pass.
+
+        ``items`` is a list of ``{"frame", "face_landmarks", "frame_rgb",
+        "cache_key"}`` (all but ``frame`` optional, as for ``analyze``). Face
+        crops from all frames, typically different cameras, go through the
+        Swin classifier together; each result reports that batch's size and
+        latency and whether its ML probability was freshly computed.
+        """
+        now = time.monotonic()
+        measured = [
+            self._measure(item["frame"], item.get("face_landmarks"), item.get("frame_rgb"))
+            for item in items
+        ]
+        probabilities = {}
+        reused = {}
+        pending = []
+        for index, (item, entry) in enumerate(zip(items, measured)):
+            cache_key = item.get("cache_key")
+            if entry["status"] != "measured":
+                if cache_key is not None:
+                    self.forget(cache_key)
+                continue
+            if not entry["face_crop"].size:
+                continue
+            cached = self._cached_probability(cache_key, entry, now)
+            if cached is not None:
+                probabilities[index] = cached["probability"]
+                reused[index] = cached
+            else:
+                pending.append(index)
+
+        batch_ms = 0.0
+        if pending:
+            started = time.perf_counter()
+            predictions = self.classifier.predict([measured[index]["face_crop"] for index in pending])
+            batch_ms = round((time.perf_counter() - started) * 1000.0, 2)
+            for index, probability in zip(pending, predictions):
+                probabilities[index] = probability
+                self._remember_probability(items[index].get("cache_key"), measured[index], probability, now)
+
+        results = []
+        for index, entry in enumerate(measured):
+            if entry["status"] != "measured":
+                results.append(entry)
+                continue
+            result = self._score(entry, probabilities.get(index, 0.0))
+            result["classifier_batch_size"] = len(pending)
+            result["classifier_latency_ms"] = batch_ms
+            if index in reused:
+                result["ml_probability_source"] = "cached"
+                result["ml_probability_age_ms"] = round((now - reused[index]["ts"]) * 1000.0, 1)
+            else:
+                result["ml_probability_source"] = "model"
+                result["ml_probability_age_ms"] = 0.0
+            results.append(result)
+        return results
+
+    def analyze(self, frame, face_landmarks=None, frame_rgb=None, cache_key=None) -> Dict:
+        """Score fatigue for the most prominent face in ``frame``.
+
+        ``face_landmarks`` and ``frame_rgb`` may be supplied by the shared
+        per-frame landmark stage; when omitted the engine runs its own
+        FaceLandmarker on the frame. ``cache_key`` (e.g. ``(camera_id,
+        track_id)``) enables the adaptive Swin skipping configured on the
+        engine.
+        """
+        return self.analyze_batch(
+            [{"frame": frame, "face_landmarks": face_landmarks, "frame_rgb": frame_rgb, "cache_key": cache_key}]
+        )[0]
@@ -0,0 +1,146 @@
+"""Central scheduler that batches inference requests from many cameras.
+
+Camera threads submit ``(frame, model_keys, camera_id)`` and block on the
+returned future. A single worker thread drains the queue into batches of up
+to ``max_batch_size`` frames, waiting at most ``max_wait_ms`` for a batch to
+fill, and hands each batch to ``run_batch`` (``InferenceService.run_models_batch``)
+so every YOLO model runs once on the stacked frames instead of once per camera.
+``pass_failure_stats`` (``inference_service.batch_pass_failure_stats``) adds
+the batch passes that failed and fell back to per-frame inference to ``stats``.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable, Dict, List
+
+
+class _PendingRequest:
+    __slots__ = ("request", "future", "submitted_at")
+
+    def __init__(self, request: Dict):
+        self.request = request
+        self.future = Future()
+        self.submitted_at = time.monotonic()
+
+
+class InferenceScheduler:
+    def __init__(
+        self,
+        run_batch: Callable[[List[Dict]], List[List[Dict]]],
+        max_batch_size: int = 8,
+        max_wait_ms: int = 20,
+        pass_failure_stats: Callable[[], Dict] = None,
+    ):
+        self._run_batch = run_batch
+        self._pass_failure_stats = pass_failure_stats
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_seconds = max(0, int(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self._stats = {
+            "batches": 0,
+            "frames": 0,
+            "last_batch_size": 0,
+            "largest_batch_size": 0,
+            "last_batch_ms": 0.0,
+            "last_queue_wait_ms": 0.0,
+            "errors": 0,
+            "timeouts": 0,
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="inference-scheduler", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, frame, model_keys, camera_id: int = 0) -> Future:
+        pending = _PendingRequest(
+            {"frame": frame, "model_keys": list(model_keys), "camera_id": camera_id}
+        )
+        self._ensure_started()
+        self._queue.put(pending)
+        return pending.future
+
+    def run(
+        self, frame, model_keys, camera_id: int = 0, timeout: float = None, on_timeout: Callable = None
+    ) -> List[Dict]:
+        """Submit one frame and wait for its results (same shape as ``run_models``).
+
+        On timeout the batch still completes later and still reads ``frame``;
+        ``on_timeout(future)`` lets the caller keep the frame alive until then.
+        """
+        future = self.submit(frame, model_keys, camera_id=camera_id)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            with self._stats_lock:
+                self._stats["timeouts"] += 1
+            if on_timeout is not None:
+                on_timeout(future)
+            raise
+
+    def _collect(self) -> List[_PendingRequest]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            try:
+                outputs = self._run_batch([item.request for item in batch])
+            except Exception as exc:
+                with self._stats_lock:
+                    self._stats["errors"] += 1
+                for item in batch:
+                    item.future.set_exception(exc)
+                continue
+
+            elapsed_ms = (time.monotonic() - started) * 1000.0
+            queue_wait_ms = max((started - item.submitted_at) * 1000.0 for item in batch)
+            for item, output in zip(batch, outputs):
+                item.future.set_result(output)
+
+            with self._stats_lock:
+                self._stats["batches"] += 1
+                self._stats["frames"] += len(batch)
+                self._stats["last_batch_size"] = len(batch)
+                self._stats["largest_batch_size"] = max(self._stats["largest_batch_size"], len(batch))
+                self._stats["last_batch_ms"] = round(elapsed_ms, 1)
+                self._stats["last_queue_wait_ms"] = round(queue_wait_ms, 1)
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = int(self.max_wait_seconds * 1000)
+        stats["pending"] = self._queue.qsize()
+        if self._pass_failure_stats is not None:
+            stats["pass_failures"] = self._pass_failure_stats()
+        stats["mean_batch_size"] = (
+            round(stats["frames"] / stats["batches"], 2) if stats["batches"] else 0.0
+        )
+        return stats
@@ -1,5 +1,6 @@
 import base64
 import bz2
+import logging
 import os
 import re
 import threading
@@ -9,18 +10,31 @@ from typing import Dict, List
 
 import cv2
 import numpy as np
+import torch
 from PIL import Image
 from ultralytics import YOLO
 
 from config import (
+    FATIGUE_CLASSIFIER_BACKEND,
+    FATIGUE_CLASSIFIER_EVERY_N_FRAMES,
+    FATIGUE_CLASSIFIER_MAX_BATCH,
+    FATIGUE_CLASSIFIER_MAX_STALENESS_SECONDS,
+    FATIGUE_CLASSIFIER_PRECISION,
     FATIGUE_CONSECUTIVE_FRAMES_THRESHOLD,
     HEAD_TILT_ALERT_DEGREES,
+    INFERENCE_MODEL_WORKERS,
+    PERSON_MODEL_IMGSZ,
 )
+from model_executor import ModelExecutor
+from model_export import resolve_runtime_weights
+from tracking import IoUTracker
 fatigue_import_error = None
 try:
-    from fatigue_engine import FatigueHybridEngine
+    from fatigue_engine import FatigueHybridEngine, create_face_landmarker, detect_face_landmarks
 except Exception as fatigue_import_error:  # pragma: no cover
     FatigueHybridEngine = None
+    create_face_landmarker = None
+    detect_face_landmarks = None
 
 mediapipe_import_error = None
 try:
@@ -28,12 +42,21 @@ try:
 except Exception as mediapipe_import_error:  # pragma: no cover
     mp = None
 
+logger = logging.getLogger(__name__)
 
 _LEFT_EYE_LANDMARKS = [33, 133, 159, 145, 153, 144, 163, 7]
 _RIGHT_EYE_LANDMARKS = [362, 263, 386, 374, 380, 381, 382, 398]
 _FEATURE_MISSING_CONFIDENCE = 0.7
 _PERSON_FALLBACK_MISSING_CONFIDENCE = 0.72
 _FOOT_LANDMARK_VISIBILITY_THRESHOLD = 0.35
+_PERSON_DETECTION_CONFIDENCE = 0.35
+_LANDMARK_MAX_FACES = 6
+_LANDMARK_MAX_HANDS = 6
+# Ultralytics' predict size when a checkpoint does not record its own, and the
+# stride every letterboxed input is padded to.
+_DEFAULT_IMGSZ = 640
+_LETTERBOX_STRIDE = 32
+_MISSING = object()
 _FOOTWEAR_LABEL_HINTS = {
     "boot",
     "shoe",
@@ -82,6 +105,454 @@ def _download_any(download_urls: List[str], destination_path: str) -> str:
     return last_error or "No downloadable URL succeeded"
 
 
+_shared_person_models = {}
+_shared_person_models_lock = threading.Lock()
+
+
+def _load_yolo(weights_path: str, backend: str = "torch", int8: bool = False):
+    """Load a detector on the requested runtime; returns ``(model, backend)``.
+
+    Non-torch backends load the exported graph cached next to the weights and
+    fall back to the ``.pt`` file if the runtime or export is unavailable.
+    """
+    path, resolved_backend = resolve_runtime_weights(weights_path, backend, int8)
+    if resolved_backend == "torch":
+        return YOLO(path), resolved_backend
+    return YOLO(path, task="detect"), resolved_backend
+
+
+def _get_shared_person_model(person_model_path: str, backend: str = "torch", int8: bool = False):
+    """Return the process-wide person detector for ``person_model_path``.
+
+    Helmet and every person-overlap PPE adapter point at the same COCO
+    weights, so they share one loaded instance instead of each holding a copy.
+    """
+    cache_key = person_model_path if backend == "torch" else (person_model_path, backend, int8)
+    with _shared_person_models_lock:
+        model = _shared_person_models.get(cache_key)
+        if model is None:
+            model, _ = _load_yolo(person_model_path, backend, int8)
+            _shared_person_models[cache_key] = model
+        return model
+
+
+def _model_imgsz(model, configured=None):
+    """Input size to run ``model`` at: ``configured``, else the size the
+    checkpoint was trained at. ``None`` for objects that are not Ultralytics
+    models, which then get the raw frame."""
+    if configured:
+        return int(configured)
+    overrides = getattr(model, "overrides", None)
+    if overrides is None:
+        return None
+    imgsz = overrides.get("imgsz") or _DEFAULT_IMGSZ
+    return int(max(imgsz)) if isinstance(imgsz, (list, tuple)) else int(imgsz)
+
+
+class Letterbox:
+    """A frame resized and padded for one detector input size.
+
+    Matches Ultralytics' own single-image preprocessing (aspect-preserving
+    resize, minimal padding to the stride, RGB, 0-1 float, BCHW), so passing
+    ``tensor`` to a model gives the same detections as passing the frame,
+    in letterbox coordinates; ``restore`` maps a result back to the frame.
+    """
+
+    def __init__(self, frame, imgsz: int, stride: int = _LETTERBOX_STRIDE):
+        height, width = frame.shape[:2]
+        self.frame_shape = (height, width)
+        self.ratio = min(imgsz / height, imgsz / width)
+        new_width, new_height = int(round(width * self.ratio)), int(round(height * self.ratio))
+        pad_w = ((imgsz - new_width) % stride) / 2
+        pad_h = ((imgsz - new_height) % stride) / 2
+        if (new_width, new_height) != (width, height):
+            frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+        self.top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+        self.left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+        padded = cv2.copyMakeBorder(
+            frame, self.top, bottom, self.left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114)
+        )
+        chw = np.ascontiguousarray(padded[..., ::-1].transpose(2, 0, 1))
+        self.tensor = torch.from_numpy(chw).unsqueeze(0).float().div_(255.0)
+
+    def restore(self, result):
+        """Map ``result``'s boxes from letterbox to frame coordinates in place."""
+        boxes = result.boxes
+        if boxes is not None and len(boxes):
+            height, width = self.frame_shape
+            # Results are inference-mode tensors, so build a new one.
+            data = boxes.data.clone()
+            data[:, 0:4:2] = ((data[:, 0:4:2] - self.left) / self.ratio).clamp(0, width)
+            data[:, 1:4:2] = ((data[:, 1:4:2] - self.top) / self.ratio).clamp(0, height)
+            boxes.data = data
+            boxes.orig_shape = self.frame_shape
+        result.orig_shape = self.frame_shape
+        return result
+
+
+def _stacked_letterboxes(letterboxes):
+    """One batch tensor for letterboxes of equal shape, else ``None``."""
+    shapes = {tuple(letterbox.tensor.shape) for letterbox in letterboxes}
+    if len(shapes) != 1:
+        return None
+    return torch.cat([letterbox.tensor for letterbox in letterboxes])
+
+
+def _person_boxes_from_result(person_result):
+    return [
+        tuple(map(int, box.xyxy[0])) + (float(box.conf[0]),)
+        for box in person_result.boxes
+    ]
+
+
+def _detect_persons(person_model, frame, letterbox: Letterbox = None):
+    if letterbox is None:
+        person_results = person_model(
+            frame, classes=[0], conf=_PERSON_DETECTION_CONFIDENCE, verbose=False
+        )
+        return _person_boxes_from_result(person_results[0])
+    person_results = person_model(
+        letterbox.tensor, classes=[0], conf=_PERSON_DETECTION_CONFIDENCE, verbose=False
+    )
+    return _person_boxes_from_result(letterbox.restore(person_results[0]))
+
+
+def _detect_persons_batch(person_model, contexts):
+    imgsz = _model_imgsz(person_model, PERSON_MODEL_IMGSZ)
+    if imgsz:
+        letterboxes = [context.letterbox(imgsz, consumer="person") for context in contexts]
+        stacked = _stacked_letterboxes(letterboxes)
+        if stacked is not None:
+            person_results = person_model(
+                stacked, classes=[0], conf=_PERSON_DETECTION_CONFIDENCE, verbose=False
+            )
+            return [
+                _person_boxes_from_result(letterbox.restore(result))
+                for letterbox, result in zip(letterboxes, person_results)
+            ]
+    person_results = person_model(
+        [context.frame for context in contexts],
+        classes=[0],
+        conf=_PERSON_DETECTION_CONFIDENCE,
+        verbose=False,
+    )
+    return [_person_boxes_from_result(result) for result in person_results]
+
+
+def _padded_crop_regions(person_boxes, width, height, padding):
+    """Person boxes grown by ``padding`` (fraction of each side) and clipped to the frame."""
+    regions = []
+    for px1, py1, px2, py2, _ in person_boxes:
+        dx = int((px2 - px1) * padding)
+        dy = int((py2 - py1) * padding)
+        x1, y1 = max(0, int(px1) - dx), max(0, int(py1) - dy)
+        x2, y2 = min(width, int(px2) + dx), min(height, int(py2) + dy)
+        if x2 - x1 >= 8 and y2 - y1 >= 8:
+            regions.append((x1, y1, x2, y2))
+    return regions
+
+
+class _CropBox:
+    """Detection box in frame coordinates, shaped like an Ultralytics box."""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = [xyxy]
+        self.conf = [conf]
+        self.cls = [cls]
+
+
+class _CropDetections:
+    """Stand-in for an Ultralytics result merged from several person crops."""
+
+    def __init__(self, boxes, names, crop_count):
+        self.boxes = boxes
+        self.names = names
+        self.crop_count = crop_count
+
+
+def _merge_crop_results(crop_results, regions, names, iou_threshold=0.5):
+    """Map crop detections back to the frame and drop duplicates from overlapping crops."""
+    candidates = []
+    for result, (ox, oy, _, _) in zip(crop_results, regions):
+        for box in result.boxes or []:
+            x1, y1, x2, y2 = (float(v) for v in box.xyxy[0])
+            candidates.append(
+                _CropBox((x1 + ox, y1 + oy, x2 + ox, y2 + oy), float(box.conf[0]), int(box.cls[0]))
+            )
+
+    kept = []
+    for candidate in sorted(candidates, key=lambda b: -b.conf[0]):
+        if any(
+            other.cls[0] == candidate.cls[0] and _iou(other.xyxy[0], candidate.xyxy[0]) > iou_threshold
+            for other in kept
+        ):
+            continue
+        kept.append(candidate)
+    return _CropDetections(kept, names, len(regions))
+
+
+class _LockedFaceLandmarker:
+    """Serializes ``detect`` calls on a MediaPipe FaceLandmarker shared across threads."""
+
+    def __init__(self, landmarker):
+        self._landmarker = landmarker
+        self._lock = threading.Lock()
+
+    def detect(self, image):
+        with self._lock:
+            return self._landmarker.detect(image)
+
+
+class SharedLandmarkModels:
+    """Process-wide MediaPipe models behind the per-frame landmark stage.
+
+    Face, hand and pose models are each created on first use, so only the
+    landmark types that loaded adapters need are ever instantiated. Faces use
+    the Tasks FaceLandmarker when a ``.task`` file is configured (the fatigue
+    model provides one) and fall back to the legacy FaceMesh solution.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._face_landmarker_path = None
+        self._models = {}
+        self._model_locks = {kind: threading.Lock() for kind in ("face", "hands", "pose")}
+        self.errors = {}
+
+    def set_face_landmarker_path(self, face_landmarker_path: str) -> None:
+        with self._lock:
+            if self._face_landmarker_path == face_landmarker_path:
+                return
+            self._face_landmarker_path = face_landmarker_path
+            self._models.pop("face", None)
+            self.errors.pop("face", None)
+
+    def _create(self, kind: str):
+        if kind == "face":
+            path = self._face_landmarker_path
+            if create_face_landmarker is not None and path and os.path.exists(path):
+                return "tasks", _LockedFaceLandmarker(
+                    create_face_landmarker(path, num_faces=_LANDMARK_MAX_FACES)
+                )
+            if mp is None:
+                raise RuntimeError(f"MediaPipe unavailable: {mediapipe_import_error}")
+            return "face_mesh", mp.solutions.face_mesh.FaceMesh(
+                static_image_mode=False,
+                max_num_faces=_LANDMARK_MAX_FACES,
+                refine_landmarks=True,
+                min_detection_confidence=0.35,
+                min_tracking_confidence=0.35,
+            )
+        if mp is None:
+            raise RuntimeError(f"MediaPipe unavailable: {mediapipe_import_error}")
+        if kind == "hands":
+            return "hands", mp.solutions.hands.Hands(
+                static_image_mode=False,
+                max_num_hands=_LANDMARK_MAX_HANDS,
+                min_detection_confidence=0.35,
+                min_tracking_confidence=0.35,
+            )
+        return "pose", mp.solutions.pose.Pose(
+            static_image_mode=False,
+            model_complexity=1,
+            min_detection_confidence=0.35,
+            min_tracking_confidence=0.35,
+        )
+
+    def ensure(self, kind: str):
+        """Load the ``kind`` model if needed; returns ``(backend, model)`` or ``None``."""
+        with self._lock:
+            if kind in self._models:
+                return self._models[kind]
+            if kind in self.errors:
+                return None
+            try:
+                self._models[kind] = self._create(kind)
+            except Exception as exc:
+                self.errors[kind] = str(exc)
+                return None
+            return self._models[kind]
+
+    def face_landmarker(self):
+        """Return the shared Tasks FaceLandmarker, or ``None`` if faces use FaceMesh."""
+        loaded = self.ensure("face")
+        if loaded is None or loaded[0] != "tasks":
+            return None
+        return loaded[1]
+
+    def detect_faces(self, frame_rgb):
+        loaded = self.ensure("face")
+        if loaded is None:
+            return None
+        backend, model = loaded
+        if backend == "tasks":
+            return detect_face_landmarks(model, frame_rgb)
+        with self._model_locks["face"]:
+            res = model.process(frame_rgb)
+        return [face.landmark for face in (res.multi_face_landmarks or [])]
+
+    def detect_hands(self, frame_rgb):
+        loaded = self.ensure("hands")
+        if loaded is None:
+            return None
+        with self._model_locks["hands"]:
+            res = loaded[1].process(frame_rgb)
+        return [hand.landmark for hand in (res.multi_hand_landmarks or [])]
+
+    def detect_pose(self, frame_rgb):
+        loaded = self.ensure("pose")
+        if loaded is None:
+            return None
+        with self._model_locks["pose"]:
+            res = loaded[1].process(frame_rgb)
+        return res.pose_landmarks.landmark if res.pose_landmarks else None
+
+
+_shared_landmark_models = SharedLandmarkModels()
+
+
+class FrameContext:
+    """Per-frame cache for stages shared by several adapters.
+
+    ``run_models`` builds one context per frame and hands it to every adapter.
+    A stage is computed the first time an adapter asks for it and reused by
+    the rest, so e.g. the person pass runs once no matter how many PPE models
+    need person boxes, and the BGR->RGB conversion and each MediaPipe graph
+    run at most once per frame.
+    """
+
+    def __init__(self, frame, landmark_models: SharedLandmarkModels = None, camera_id: int = 0):
+        self.frame = frame
+        self.camera_id = camera_id
+        self.landmark_models = landmark_models or _shared_landmark_models
+        self._lock = threading.Lock()
+        self._stage_locks = {}
+        self._stage_values = {}
+        self._stage_runs = {}
+        self._stage_consumers = {}
+        self._stage_batch_sizes = {}
+        self._prefilled = []
+
+    def _record(self, stage: str, consumer: str, computed: bool) -> None:
+        if computed:
+            self._stage_runs[stage] = self._stage_runs.get(stage, 0) + 1
+        if consumer:
+            self._stage_consumers.setdefault(stage, []).append(consumer)
+
+    def _stage(self, stage: str, key, compute, consumer: str = ""):
+        """Compute ``stage`` once per key and return the cached value afterwards.
+
+        Failures are cached too, so later consumers see the same error
+        without re-running the model.
+        """
+        with self._lock:
+            stage_lock = self._stage_locks.setdefault((stage, key), threading.Lock())
+        with stage_lock:
+            cached = self._stage_values.get((stage, key), _MISSING)
+            computed = cached is _MISSING
+            if computed:
+                try:
+                    cached = (compute(), None)
+                except Exception as exc:
+                    cached = (None, exc)
+                self._stage_values[(stage, key)] = cached
+        with self._lock:
+            self._record(stage, consumer, computed)
+        value, error = cached
+        if error is not None:
+            raise error
+        return value
+
+    def prefill(self, stage: str, key, value, batch_size: int = 1) -> None:
+        """Store a stage value computed outside the context (e.g. in a batch
+        spanning several cameras) so consumers reuse it instead of recomputing."""
+        with self._lock:
+            self._stage_values[(stage, key)] = (value, None)
+            self._stage_runs[stage] = self._stage_runs.get(stage, 0) + 1
+            self._stage_batch_sizes[stage] = int(batch_size)
+            self._prefilled.append((stage, key))
+
+    def prefill_mark(self) -> int:
+        with self._lock:
+            return len(self._prefilled)
+
+    def discard_prefills(self, mark: int) -> None:
+        """Drop the stage values prefilled since ``prefill_mark`` returned
+        ``mark`` (e.g. by a batch pass that failed part-way), so consumers
+        compute them again instead of mixing batch and per-frame results."""
+        with self._lock:
+            while len(self._prefilled) > mark:
+                stage, key = self._prefilled.pop()
+                self._stage_values.pop((stage, key), None)
+                self._stage_runs[stage] = max(0, self._stage_runs.get(stage, 0) - 1)
+                self._stage_batch_sizes.pop(stage, None)
+
+    def model_result(self, model, compute, consumer: str = ""):
+        """Return the raw Ultralytics result of ``model`` on this frame."""
+        return self._stage("model", id(model), compute, consumer)
+
+    def crop_result(self, model, compute, consumer: str = ""):
+        """Return ``model``'s detections merged from this frame's person crops."""
+        return self._stage("roi_model", id(model), compute, consumer)
+
+    def letterbox(self, imgsz: int, consumer: str = "") -> Letterbox:
+        """The frame letterboxed for ``imgsz``, shared by every model at that size."""
+        return self._stage("letterbox", int(imgsz), lambda: Letterbox(self.frame, int(imgsz)), consumer)
+
+    def person_boxes(self, person_model, consumer: str = ""):
+        """Return ``[(x1, y1, x2, y2, conf), ...]`` for people in the frame."""
+
+        def detect():
+            imgsz = _model_imgsz(person_model, PERSON_MODEL_IMGSZ)
+            letterbox = self.letterbox(imgsz, consumer="person") if imgsz else None
+            return _detect_persons(person_model, self.frame, letterbox)
+
+        boxes = self._stage("person", id(person_model), detect, consumer)
+        return list(boxes)
+
+    def rgb(self, consumer: str = ""):
+        return self._stage(
+            "rgb", None, lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB), consumer
+        )
+
+    def face_landmarks(self, consumer: str = ""):
+        """Normalized landmark lists, one per face; ``None`` if no face model is available."""
+        return self._stage(
+            "face_landmarks",
+            None,
+            lambda: self.landmark_models.detect_faces(self.rgb("face_landmarks")),
+            consumer,
+        )
+
+    def hand_landmarks(self, consumer: str = ""):
+        return self._stage(
+            "hand_landmarks",
+            None,
+            lambda: self.landmark_models.detect_hands(self.rgb("hand_landmarks")),
+            consumer,
+        )
+
+    def pose_landmarks(self, consumer: str = ""):
+        return self._stage(
+            "pose_landmarks",
+            None,
+            lambda: self.landmark_models.detect_pose(self.rgb("pose_landmarks")),
+            consumer,
+        )
+
+    def stage_summary(self) -> Dict:
+        with self._lock:
+            summary = {}
+            for stage, consumers in self._stage_consumers.items():
+                summary[stage] = {
+                    "runs": self._stage_runs.get(stage, 0),
+                    "consumers": list(consumers),
+                }
+                if stage in self._stage_batch_sizes:
+                    summary[stage]["batch_size"] = self._stage_batch_sizes[stage]
+            return summary
+
+
 def _iou(box_a, box_b) -> float:
     ax1, ay1, ax2, ay2 = box_a
     bx1, by1, bx2, by2 = box_b
@@ -145,6 +616,13 @@ class PPEModelAdapter:
         self._absence_uses_person_overlap = model_key in {"vest", "faceshield", "safetysuit"}
         self.person_model_path = model_info.get("person_model_path")
         self.person_download_urls = model_info.get("person_download_urls", [])
+        self.backend = model_info.get("backend", "torch")
+        self.int8 = bool(model_info.get("int8", False))
+        self.runtime_backend = None
+        self.imgsz = model_info.get("imgsz")
+        self.roi_crop = bool(model_info.get("roi_crop", False)) and self._absence_uses_person_overlap
+        self.roi_crop_imgsz = int(model_info.get("roi_crop_imgsz", 320))
+        self.roi_crop_padding = float(model_info.get("roi_crop_padding", 0.15))
 
         self.available = False
         self.load_error = None
@@ -153,13 +631,13 @@ class PPEModelAdapter:
         self._model = None
         self._person_model = None
         self._supports_explicit_missing_classes = False
-        self._mp_hands = None
-        self._mp_face_mesh = None
-        self._mp_pose = None
-        self._feature_lock = threading.Lock()
+        self._landmark_kind = {"gloves": "hands", "goggles": "face", "boots": "pose"}.get(model_key)
         self.model_classes = []
         self.matched_labels = []
         self._qr_detector = cv2.QRCodeDetector() if self.supports_qr else None
+        # Boots runs its detector on foot crops, so its full-frame pass cannot
+        # be shared in a multi-camera batch.
+        self.supports_frame_batching = model_key != "boots"
         self._load()
 
     def _download_weights_if_missing(self):
@@ -183,7 +661,8 @@ class PPEModelAdapter:
             return
 
         try:
-            self._model = YOLO(self.weights_path)
+            self._model, self.runtime_backend = _load_yolo(self.weights_path, self.backend, self.int8)
+            self.imgsz = _model_imgsz(self._model, self.imgsz)
             names = self._model.names or {}
             self.model_classes = sorted(
                 {
@@ -219,29 +698,10 @@ class PPEModelAdapter:
                     self.load_error = (
                         f"{self.load_error}; " if self.load_error else ""
                     ) + f"MediaPipe unavailable: {mediapipe_import_error}"
-                else:
-                    if self.model_key == "gloves":
-                        self._mp_hands = mp.solutions.hands.Hands(
-                            static_image_mode=False,
-                            max_num_hands=6,
-                            min_detection_confidence=0.35,
-                            min_tracking_confidence=0.35,
-                        )
-                    elif self.model_key == "goggles":
-                        self._mp_face_mesh = mp.solutions.face_mesh.FaceMesh(
-                            static_image_mode=False,
-                            max_num_faces=6,
-                            refine_landmarks=True,
-                            min_detection_confidence=0.35,
-                            min_tracking_confidence=0.35,
-                        )
-                    elif self.model_key == "boots":
-                        self._mp_pose = mp.solutions.pose.Pose(
-                            static_image_mode=False,
-                            model_complexity=1,
-                            min_detection_confidence=0.35,
-                            min_tracking_confidence=0.35,
-                        )
+                elif _shared_landmark_models.ensure(self._landmark_kind) is None:
+                    self.load_error = (
+                        f"{self.load_error}; " if self.load_error else ""
+                    ) + f"Landmark model unavailable: {_shared_landmark_models.errors.get(self._landmark_kind)}"
 
             if self._absence_uses_person_overlap:
                 self._load_person_model_for_absence()
@@ -267,50 +727,42 @@ class PPEModelAdapter:
         y2 = min(height - 1, y2 + dy)
         return (x1, y1, x2, y2)
 
-    def _detect_feature_regions(self, frame):
+    def _detect_feature_regions(self, context: FrameContext):
         if not self._absence_uses_features:
             return []
 
         if self.model_key == "gloves":
-            return self._detect_hand_regions(frame)
+            return self._detect_hand_regions(context)
         if self.model_key == "goggles":
-            return self._detect_eye_regions(frame)
+            return self._detect_eye_regions(context)
         if self.model_key == "boots":
-            return self._detect_foot_regions(frame)
+            return self._detect_foot_regions(context)
         return []
 
-    def _detect_hand_regions(self, frame):
-        if self._mp_hands is None:
-            return []
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        with self._feature_lock:
-            res = self._mp_hands.process(frame_rgb)
-        if not res.multi_hand_landmarks:
+    def _detect_hand_regions(self, context: FrameContext):
+        hands = context.hand_landmarks(consumer=self.model_key)
+        if not hands:
             return []
 
-        h, w = frame.shape[:2]
+        h, w = context.frame.shape[:2]
         out = []
-        for hand in res.multi_hand_landmarks:
-            points = [(lm.x, lm.y) for lm in hand.landmark]
+        for hand in hands:
+            points = [(lm.x, lm.y) for lm in hand]
             bbox = self._points_to_bbox(points, w, h, pad=0.15)
             if bbox is not None:
                 out.append(bbox)
         return out
 
-    def _detect_eye_regions(self, frame):
-        if self._mp_face_mesh is None:
-            return []
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        with self._feature_lock:
-            res = self._mp_face_mesh.process(frame_rgb)
-        if not res.multi_face_landmarks:
+    def _detect_eye_regions(self, context: FrameContext):
+        faces = context.face_landmarks(consumer=self.model_key)
+        if not faces:
             return []
 
-        h, w = frame.shape[:2]
+        h, w = context.frame.shape[:2]
         out = []
-        for face in res.multi_face_landmarks:
-            left_points = [(face.landmark[idx].x, face.landmark[idx].y) for idx in _LEFT_EYE_LANDMARKS]
-            right_points = [(face.landmark[idx].x, face.landmark[idx].y) for idx in _RIGHT_EYE_LANDMARKS]
+        for face in faces:
+            left_points = [(face[idx].x, face[idx].y) for idx in _LEFT_EYE_LANDMARKS]
+            right_points = [(face[idx].x, face[idx].y) for idx in _RIGHT_EYE_LANDMARKS]
             left_bbox = self._points_to_bbox(left_points, w, h, pad=0.25)
             right_bbox = self._points_to_bbox(right_points, w, h, pad=0.25)
             if left_bbox is not None:
@@ -319,18 +771,12 @@ class PPEModelAdapter:
                 out.append(right_bbox)
         return out
 
-    def _detect_foot_regions(self, frame):
-        if self._mp_pose is None:
+    def _detect_foot_regions(self, context: FrameContext):
+        landmarks = context.pose_landmarks(consumer=self.model_key)
+        if not landmarks or mp is None:
             return []
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        with self._feature_lock:
-            res = self._mp_pose.process(frame_rgb)
 
-        if not res.pose_landmarks:
-            return []
-
-        h, w = frame.shape[:2]
-        landmarks = res.pose_landmarks.landmark
+        h, w = context.frame.shape[:2]
         left_triplet = (
             mp.solutions.pose.PoseLandmark.LEFT_ANKLE.value,
             mp.solutions.pose.PoseLandmark.LEFT_HEEL.value,
@@ -394,8 +840,8 @@ class PPEModelAdapter:
                 return True, confidence, class_name
         return False, best_confidence, best_label
 
-    def _infer_boots_with_feature_regions(self, frame, camera_id: int = 0) -> Dict:
-        feature_boxes = self._detect_foot_regions(frame)
+    def _infer_boots_with_feature_regions(self, frame, context: FrameContext, camera_id: int = 0) -> Dict:
+        feature_boxes = self._detect_foot_regions(context)
 
         annotation_boxes = []
         present_confidences = []
@@ -489,25 +935,97 @@ class PPEModelAdapter:
                 return
             self.downloaded = True
         try:
-            self._person_model = YOLO(self.person_model_path)
+            self._person_model = _get_shared_person_model(
+                self.person_model_path, self.backend, self.int8
+            )
         except Exception as exc:
             self.load_error = (
                 f"{self.load_error}; " if self.load_error else ""
             ) + f"Person fallback model load failed: {exc}"
 
-    def _detect_person_regions(self, frame):
+    def _detect_person_regions(self, context: FrameContext):
         if self._person_model is None:
             return []
         try:
-            person_results = self._person_model(frame, classes=[0], conf=0.35, verbose=False)
-            out = []
-            for box in person_results[0].boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                out.append((x1, y1, x2, y2, float(box.conf[0])))
-            return out
+            return context.person_boxes(self._person_model, consumer=self.model_key)
         except Exception:
             return []
 
+    def _uses_roi_crop(self) -> bool:
+        return self.roi_crop and self._person_model is not None
+
+    def _predict_crops(self, contexts: List[FrameContext]):
+        """Run the detector on one batch of padded person crops from every
+        context and return one frame-coordinate result per context."""
+        frame_regions = []
+        crops = []
+        for context in contexts:
+            height, width = context.frame.shape[:2]
+            regions = _padded_crop_regions(
+                self._detect_person_regions(context), width, height, self.roi_crop_padding
+            )
+            frame_regions.append(regions)
+            crops.extend(context.frame[y1:y2, x1:x2] for x1, y1, x2, y2 in regions)
+
+        results = (
+            self._model(crops, imgsz=self.roi_crop_imgsz, conf=self.inference_confidence, verbose=False)
+            if crops
+            else []
+        )
+        names = self._model.names or {}
+        merged = []
+        offset = 0
+        for regions in frame_regions:
+            merged.append(_merge_crop_results(results[offset:offset + len(regions)], regions, names))
+            offset += len(regions)
+        return merged
+
+    def _predict(self, frame, context: FrameContext):
+        """Detector result for the frame (full frame, or merged person crops in
+        ROI mode), reused from ``context`` when a batch pass already produced it."""
+        if self._uses_roi_crop():
+            return context.crop_result(
+                self._model,
+                lambda: self._predict_crops([context])[0],
+                consumer=self.model_key,
+            )
+
+        def predict():
+            if not self.imgsz:
+                return self._model(frame, conf=self.inference_confidence, verbose=False)[0]
+            letterbox = context.letterbox(self.imgsz, consumer=self.model_key)
+            return letterbox.restore(
+                self._model(letterbox.tensor, conf=self.inference_confidence, verbose=False)[0]
+            )
+
+        return context.model_result(self._model, predict, consumer=self.model_key)
+
+    def predict_batch(self, contexts: List[FrameContext]) -> None:
+        """Run the detector once over several frames and prefill each context."""
+        if not self.available or not self.supports_frame_batching or not contexts:
+            return
+        if self._uses_roi_crop():
+            for context, result in zip(contexts, self._predict_crops(contexts)):
+                context.prefill("roi_model", id(self._model), result, batch_size=len(contexts))
+            return
+        if self.imgsz:
+            letterboxes = [context.letterbox(self.imgsz, consumer=self.model_key) for context in contexts]
+            stacked = _stacked_letterboxes(letterboxes)
+            if stacked is not None:
+                results = self._model(stacked, conf=self.inference_confidence, verbose=False)
+                for context, letterbox, result in zip(contexts, letterboxes, results):
+                    context.prefill("model", id(self._model), letterbox.restore(result), batch_size=len(contexts))
+                return
+        size = {"imgsz": self.imgsz} if self.imgsz else {}
+        results = self._model(
+            [context.frame for context in contexts],
+            conf=self.inference_confidence,
+            verbose=False,
+            **size,
+        )
+        for context, result in zip(contexts, results):
+            context.prefill("model", id(self._model), result, batch_size=len(contexts))
+
     def _extract_qr(self, frame, boxes) -> str:
         if self._qr_detector is None or len(boxes) == 0:
             return ""
@@ -529,7 +1047,9 @@ class PPEModelAdapter:
         data, _, _ = self._qr_detector.detectAndDecode(frame)
         return data or ""
 
-    def infer(self, frame, camera_id: int = 0) -> Dict:
+    def infer(self, frame, camera_id: int = 0, context: FrameContext = None) -> Dict:
+        if context is None:
+            context = FrameContext(frame)
         if not self.available:
             return {
                 "status": "unavailable",
@@ -542,12 +1062,12 @@ class PPEModelAdapter:
             }
 
         if self.model_key == "boots":
-            return self._infer_boots_with_feature_regions(frame, camera_id=camera_id)
+            return self._infer_boots_with_feature_regions(frame, context, camera_id=camera_id)
 
         try:
-            results = self._model(frame, conf=self.inference_confidence, verbose=False)
-            boxes = results[0].boxes or []
-            names = results[0].names or {}
+            result = self._predict(frame, context)
+            boxes = result.boxes or []
+            names = result.names or {}
             selected_confidences = []
             selected_boxes = []
             selected_box_coords = []
@@ -595,7 +1115,7 @@ class PPEModelAdapter:
             used_person_overlap_fallback = False
 
             if self._absence_uses_features:
-                feature_boxes = self._detect_feature_regions(frame)
+                feature_boxes = self._detect_feature_regions(context)
                 feature_count = len(feature_boxes)
 
                 ppe_present_boxes = [
@@ -634,7 +1154,7 @@ class PPEModelAdapter:
             )
 
             if should_run_person_fallback:
-                person_boxes = self._detect_person_regions(frame)
+                person_boxes = self._detect_person_regions(context)
                 person_count = len(person_boxes)
                 if person_boxes:
                     used_person_overlap_fallback = True
@@ -707,6 +1227,8 @@ class PPEModelAdapter:
             if self.supports_qr:
                 vest_qr = self._extract_qr(frame, selected_boxes) if count > 0 else ""
                 payload["vest_id"] = vest_qr or None
+            if isinstance(result, _CropDetections):
+                payload["roi_crop"] = {"crops": result.crop_count, "imgsz": self.roi_crop_imgsz}
             payload["camera_id"] = camera_id
 
             return {
@@ -752,12 +1274,16 @@ class HelmetModelAdapter(PPEModelAdapter):
             self.downloaded = True
 
         try:
-            self._person_model = YOLO(self.person_model_path)
+            self._person_model = _get_shared_person_model(
+                self.person_model_path, self.backend, self.int8
+            )
         except Exception as exc:
             self.available = False
             self.load_error = f"Failed to load person model: {exc}"
 
-    def infer(self, frame, camera_id: int = 0) -> Dict:
+    def infer(self, frame, camera_id: int = 0, context: FrameContext = None) -> Dict:
+        if context is None:
+            context = FrameContext(frame)
         if not self.available or self._person_model is None:
             return {
                 "status": "unavailable",
@@ -767,21 +1293,17 @@ class HelmetModelAdapter(PPEModelAdapter):
             }
 
         try:
-            helmet_results = self._model(frame, conf=self.inference_confidence, verbose=False)
-            person_results = self._person_model(frame, classes=[0], conf=0.35, verbose=False)
+            helmet_result = self._predict(frame, context)
             model_class_names = getattr(self._model, "names", None) or {}
             helmet_boxes = []
-            for box in helmet_results[0].boxes:
+            for box in helmet_result.boxes:
                 class_name = _normalize_label(str(model_class_names.get(int(box.cls[0]), "")))
                 # Keep only positive helmet/hardhat classes; explicit absence
                 # classes (e.g. "no-hardhat") must not count as worn helmets.
                 if model_class_names and not _is_positive_helmet_label(class_name):
                     continue
                 helmet_boxes.append(tuple(map(int, box.xyxy[0])) + (float(box.conf[0]),))
-            person_boxes = [
-                tuple(map(int, box.xyxy[0])) + (float(box.conf[0]),)
-                for box in person_results[0].boxes
-            ]
+            person_boxes = context.person_boxes(self._person_model, consumer=self.model_key)
 
             no_helmet_conf = []
             missing_boxes = []
@@ -870,7 +1392,12 @@ class FatigueModelAdapter:
         self.download_error = None
         self.downloaded = False
         self._engine = None
+        self.runtime_backend = None
         self._fatigue_consecutive_by_camera = {}
+        self._face_trackers = {}
+        self._face_trackers_lock = threading.Lock()
+        # Face crops from several cameras share one Swin classifier pass.
+        self.supports_frame_batching = True
         self._load()
 
     def _download_dependencies_if_missing(self):
@@ -908,17 +1435,119 @@ class FatigueModelAdapter:
             return
 
         try:
+            # The engine reuses the landmark stage's FaceLandmarker so faces
+            # are detected once per frame for fatigue and goggles alike.
+            _shared_landmark_models.set_face_landmarker_path(self.face_landmarker_path)
             self._engine = FatigueHybridEngine(
                 model_path=self.weights_path,
                 face_landmarker_path=self.face_landmarker_path,
                 head_tilt_alert_degrees=HEAD_TILT_ALERT_DEGREES,
+                face_landmarker=_shared_landmark_models.face_landmarker(),
+                classifier_backend=FATIGUE_CLASSIFIER_BACKEND,
+                classifier_precision=FATIGUE_CLASSIFIER_PRECISION,
+                classifier_max_batch_size=FATIGUE_CLASSIFIER_MAX_BATCH,
+                classifier_every_n_frames=FATIGUE_CLASSIFIER_EVERY_N_FRAMES,
+                classifier_max_staleness_seconds=FATIGUE_CLASSIFIER_MAX_STALENESS_SECONDS,
             )
+            self.runtime_backend = self._engine.classifier_stats()["backend"]
             self.available = True
         except Exception as exc:
             self.available = False
             self.load_error = str(exc)
 
-    def infer(self, frame, camera_id: int = 0) -> Dict:
+    def _face_tracker(self, camera_id: int) -> IoUTracker:
+        with self._face_trackers_lock:
+            tracker = self._face_trackers.get(camera_id)
+            if tracker is None:
+                tracker = IoUTracker()
+                self._face_trackers[camera_id] = tracker
+            return tracker
+
+    def _analyze_tracked(self, contexts: List[FrameContext]) -> List[List]:
+        """Analyze every face in each context; returns ``[(track_id, analysis), ...]`` per context.
+
+        Faces are tracked per camera so consecutive-frame state follows each
+        worker, and the crops of all faces in all contexts go through the
+        classifier in one batch.
+        """
+        items, owners = [], []
+        for position, context in enumerate(contexts):
+            camera_id = context.camera_id
+            frame_rgb = context.rgb(consumer=self.model_key)
+            faces = context.face_landmarks(consumer=self.model_key)
+            if not faces:
+                # No shared face model (None): the engine runs its own landmarker
+                # and scores the largest face. No faces: a plain no_face result.
+                if faces is not None:
+                    self._expire_tracks(camera_id, self._face_tracker(camera_id), [])
+                items.append(
+                    {"frame": context.frame, "face_landmarks": faces, "frame_rgb": frame_rgb, "cache_key": (camera_id, 0)}
+                )
+                owners.append((position, 0))
+                continue
+
+            frame_h, frame_w = context.frame.shape[:2]
+            boxes = [self._engine.face_box_from_landmarks(face, frame_h, frame_w) for face in faces]
+            tracker = self._face_tracker(camera_id)
+            track_ids = self._expire_tracks(camera_id, tracker, boxes)
+            for face, track_id in zip(faces, track_ids):
+                items.append(
+                    {
+                        "frame": context.frame,
+                        "face_landmarks": [face],
+                        "frame_rgb": frame_rgb,
+                        "cache_key": (camera_id, track_id),
+                    }
+                )
+                owners.append((position, track_id))
+
+        grouped = [[] for _ in contexts]
+        for (position, track_id), analysis in zip(owners, self._engine.analyze_batch(items)):
+            grouped[position].append((track_id, analysis))
+        return grouped
+
+    def _expire_tracks(self, camera_id: int, tracker: IoUTracker, boxes) -> List[int]:
+        track_ids = tracker.update(boxes)
+        for track_id in tracker.expired:
+            self._engine.forget((camera_id, track_id))
+        return track_ids
+
+    def predict_batch(self, contexts: List[FrameContext]) -> None:
+        """Classify the faces of several frames in one pass and prefill each context."""
+        if not self.available or self._engine is None or not contexts:
+            return
+        for context, tracked in zip(contexts, self._analyze_tracked(contexts)):
+            context.prefill("model", id(self._engine), tracked, batch_size=len(contexts))
+
+    def runtime_stats(self) -> Dict:
+        return self._engine.classifier_stats() if self._engine is not None else None
+
+    @staticmethod
+    def _face_state(analysis: Dict, previous: int):
+        """Advance one face's consecutive-fatigue count; returns ``(count, detected, reasons)``."""
+        forced_fatigue_state = bool(analysis.get("forced_fatigue_state"))
+        if analysis["is_fatigued"] or forced_fatigue_state:
+            previous += 1
+        else:
+            previous = 0
+
+        sustained_fatigue = previous >= FATIGUE_CONSECUTIVE_FRAMES_THRESHOLD
+        head_tilt_exceeded = bool(analysis["head_tilt_exceeded"])
+        # Forced fatigue (hard eye closure) triggers immediately; otherwise sustained hybrid fatigue.
+        detected = forced_fatigue_state or sustained_fatigue
+
+        reason = []
+        if forced_fatigue_state:
+            reason.append("forced_eye_closure")
+        if sustained_fatigue:
+            reason.append("sustained_fatigue")
+        if head_tilt_exceeded:
+            reason.append("head_tilt")
+        if not reason:
+            reason.append("monitoring")
+        return previous, detected, reason
+
+    def infer(self, frame, camera_id: int = 0, context: FrameContext = None) -> Dict:
         if not self.available or self._engine is None:
             return {
                 "status": "unavailable",
@@ -928,9 +1557,19 @@ class FatigueModelAdapter:
             }
 
         try:
-            analysis = self._engine.analyze(frame)
-            if analysis["status"] != "ok":
-                self._fatigue_consecutive_by_camera[camera_id] = 0
+            if context is None:
+                tracked = [(0, self._engine.analyze(frame))]
+            else:
+                tracked = context.model_result(
+                    self._engine,
+                    lambda: self._analyze_tracked([context])[0],
+                    consumer=self.model_key,
+                )
+
+            scored = [(track_id, analysis) for track_id, analysis in tracked if analysis["status"] == "ok"]
+            if not scored:
+                analysis = tracked[0][1]
+                self._fatigue_consecutive_by_camera[camera_id] = {}
                 return {
                     "status": analysis["status"],
                     "detected": False,
@@ -938,41 +1577,39 @@ class FatigueModelAdapter:
                     "payload": analysis,
                 }
 
-            previous = self._fatigue_consecutive_by_camera.get(camera_id, 0)
-            forced_fatigue_state = bool(analysis.get("forced_fatigue_state"))
-            if analysis["is_fatigued"] or forced_fatigue_state:
-                previous += 1
-            else:
-                previous = 0
-            self._fatigue_consecutive_by_camera[camera_id] = previous
-
-            sustained_fatigue = previous >= FATIGUE_CONSECUTIVE_FRAMES_THRESHOLD
-            head_tilt_exceeded = bool(analysis["head_tilt_exceeded"])
-            # Forced fatigue (hard eye closure) triggers immediately; otherwise sustained hybrid fatigue.
-            detected = forced_fatigue_state or sustained_fatigue
-
-            reason = []
-            if forced_fatigue_state:
-                reason.append("forced_eye_closure")
-            if sustained_fatigue:
-                reason.append("sustained_fatigue")
-            if head_tilt_exceeded:
-                reason.append("head_tilt")
-            if not reason:
-                reason.append("monitoring")
-
-            confidence = analysis["hybrid_score"]
+            # Counters are kept per face track and only for faces seen in this
+            # frame, so a worker who leaves or blinks out restarts at zero.
+            previous_counts = self._fatigue_consecutive_by_camera.get(camera_id) or {}
+            counts = {}
+            faces = []
+            for track_id, analysis in scored:
+                count, detected, reason = self._face_state(analysis, previous_counts.get(track_id, 0))
+                counts[track_id] = count
+                faces.append(
+                    {
+                        **analysis,
+                        "track_id": track_id,
+                        "detected": detected,
+                        "consecutive_fatigue_frames": count,
+                        "trigger_reason": reason,
+                    }
+                )
+            self._fatigue_consecutive_by_camera[camera_id] = counts
 
+            # The headline face is the most severe detected one, else the
+            # highest-scoring face; its fields stay at the payload top level.
+            primary = max(faces, key=lambda face: (face["detected"], face["hybrid_score"]))
             payload = {
-                **analysis,
-                "consecutive_fatigue_frames": previous,
+                **primary,
                 "fatigue_frame_threshold": FATIGUE_CONSECUTIVE_FRAMES_THRESHOLD,
-                "trigger_reason": reason,
+                "face_count": len(faces),
             }
+            if len(faces) > 1:
+                payload["faces"] = faces
             return {
                 "status": "ok",
-                "detected": detected,
-                "confidence": round(float(confidence), 4),
+                "detected": any(face["detected"] for face in faces),
+                "confidence": round(float(primary["hybrid_score"]), 4),
                 "payload": payload,
             }
         except Exception as exc:
@@ -984,6 +1621,42 @@ class FatigueModelAdapter:
             }
 
 
+_model_executor = ModelExecutor(INFERENCE_MODEL_WORKERS)
+
+
+def model_execution_stats() -> Dict:
+    """Per-model wall time and queue wait of the shared adapter pool."""
+    return _model_executor.stats()
+
+
+_batch_pass_failures = {}
+_batch_pass_lock = threading.Lock()
+
+
+def batch_pass_failure_stats() -> Dict:
+    """Failed cross-camera batch passes by stage (``person`` or a model key)."""
+    with _batch_pass_lock:
+        return dict(_batch_pass_failures)
+
+
+def _run_batch_pass(stage: str, contexts: List[FrameContext], run) -> bool:
+    """Run one batch pass; on failure undo its prefills so each frame falls
+    back to single-frame inference from a clean context."""
+    marks = [context.prefill_mark() for context in contexts]
+    try:
+        run()
+        return True
+    except Exception:
+        logger.exception(
+            "Batched %s pass over %d frames failed; falling back to per-frame inference", stage, len(contexts)
+        )
+        for context, mark in zip(contexts, marks):
+            context.discard_prefills(mark)
+        with _batch_pass_lock:
+            _batch_pass_failures[stage] = _batch_pass_failures.get(stage, 0) + 1
+        return False
+
+
 class InferenceService:
     def __init__(self, model_definitions: Dict):
         self._adapters = {}
@@ -1006,13 +1679,25 @@ class InferenceService:
             "model_classes": list(getattr(adapter, "model_classes", []) or []),
             "matched_target_labels": list(getattr(adapter, "matched_labels", []) or []),
             "configured_target_labels": sorted(getattr(adapter, "normalized_target_labels", []) or []),
+            "runtime_backend": getattr(adapter, "runtime_backend", None),
+            "imgsz": getattr(adapter, "imgsz", None),
+            "runtime_stats": adapter.runtime_stats() if hasattr(adapter, "runtime_stats") else None,
         }
 
-    def run_models(self, frame, model_keys: List[str], camera_id: int = 0) -> List[Dict]:
+    def run_models(
+        self, frame, model_keys: List[str], camera_id: int = 0, context: FrameContext = None
+    ) -> List[Dict]:
+        if context is None:
+            context = FrameContext(frame, camera_id=camera_id)
+        adapters = [(model_key, self._adapters[model_key]) for model_key in model_keys]
+        outputs = _model_executor.run(
+            [
+                (model_key, lambda adapter=adapter: adapter.infer(frame, camera_id=camera_id, context=context))
+                for model_key, adapter in adapters
+            ]
+        )
         results = []
-        for model_key in model_keys:
-            adapter = self._adapters[model_key]
-            inference = adapter.infer(frame, camera_id=camera_id)
+        for (model_key, adapter), (inference, timing) in zip(adapters, outputs):
             results.append(
                 {
                     "model_key": model_key,
@@ -1021,6 +1706,74 @@ class InferenceService:
                     "detected": bool(inference["detected"]),
                     "confidence": float(inference["confidence"]),
                     "payload": inference["payload"],
+                    "timing": timing,
                 }
             )
+
+        # Shared stages are reported once the whole frame has been processed so
+        # every result carries the same per-frame view (e.g. person runs == 1).
+        frame_stages = context.stage_summary()
+        for result in results:
+            result["frame_stages"] = frame_stages
         return results
+
+    def run_models_batch(self, requests: List[Dict]) -> List[List[Dict]]:
+        """Run several frames (typically from different cameras) together.
+
+        ``requests`` is a list of ``{"frame", "model_keys", "camera_id"}``.
+        Each batchable YOLO model and the shared person detector run once on
+        the stacked frames that need them; per-frame post-processing then
+        reuses those results through each frame's context. A failed batch
+        pass is logged and counted (``batch_pass_failure_stats``), its partial
+        prefills are discarded, and the affected frames fall back to
+        single-frame inference.
+        """
+        contexts = [
+            FrameContext(request["frame"], camera_id=request.get("camera_id", 0)) for request in requests
+        ]
+
+        person_users = {}
+        model_users = {}
+        for index, request in enumerate(requests):
+            for model_key in request["model_keys"]:
+                adapter = self._adapters[model_key]
+                if not adapter.available:
+                    continue
+                if getattr(adapter, "supports_frame_batching", False):
+                    model_users.setdefault(model_key, []).append(index)
+                person_model = getattr(adapter, "_person_model", None)
+                if person_model is not None:
+                    person_users.setdefault(id(person_model), (person_model, set()))[1].add(index)
+
+        for person_model, indexes in person_users.values():
+            indexes = sorted(indexes)
+            if len(indexes) < 2:
+                continue
+            batch_contexts = [contexts[i] for i in indexes]
+
+            def prefill_persons(person_model=person_model, batch_contexts=batch_contexts):
+                batch = _detect_persons_batch(person_model, batch_contexts)
+                for context, boxes in zip(batch_contexts, batch):
+                    context.prefill("person", id(person_model), boxes, batch_size=len(batch_contexts))
+
+            _run_batch_pass("person", batch_contexts, prefill_persons)
+
+        for model_key, indexes in model_users.items():
+            if len(indexes) < 2:
+                continue
+            batch_contexts = [contexts[i] for i in indexes]
+            _run_batch_pass(
+                model_key,
+                batch_contexts,
+                lambda adapter=self._adapters[model_key], batch_contexts=batch_contexts: adapter.predict_batch(batch_contexts),
+            )
+
+        return [
+            self.run_models(
+                request["frame"],
+                request["model_keys"],
+                camera_id=request.get("camera_id", 0),
+                context=context,
+            )
+            for request, context in zip(requests, contexts)
+        ]
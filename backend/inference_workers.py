@@ -0,0 +1,375 @@
+"""Out-of-process inference workers fed through shared-memory frame slots.
+
+``InferenceWorkerPool`` starts ``workers`` spawned processes. Each one loads
+its own ``InferenceService`` and batches the frames it receives across
+cameras with a local ``InferenceScheduler``, so model inference, MediaPipe
+and result building no longer compete for the web process's GIL.
+
+Frames are not pickled: every worker owns ``SharedFrameSlots``, a
+``multiprocessing.shared_memory`` block split into fixed-size slots. The
+parent copies a frame into a free slot and sends only ``(slot, shape,
+dtype)``; the worker reads the frame in place and the slot is released
+once the result comes back. Frames larger than a slot are sent inline.
+When every slot of a worker stays in flight for ``slot_timeout`` seconds
+(a hung worker), ``submit`` raises ``concurrent.futures.TimeoutError``
+rather than blocking the caller.
+Results come back compact (the per-frame stage summary once, not once per
+model) and are expanded to the ``run_models`` shape in the parent.
+
+A supervisor thread restarts workers that exit; requests in flight on a
+crashed worker fail with ``WorkerCrashed`` instead of hanging.
+
+Usage::
+
+    pool = InferenceWorkerPool(workers=2)
+    results = pool.run(frame, ["helmet", "vest"], camera_id=3)
+"""
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+class SharedFrameSlots:
+    """Fixed-size frame slots in one shared-memory block (unrelated to the
+    capture-side ``cameras.frame_ring.FrameRing``)."""
+
+    def __init__(self, slots: int, slot_bytes: int, name: str = None):
+        self.slots = int(slots)
+        self.slot_bytes = int(slot_bytes)
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            # Spawned workers share the parent's resource tracker, so the
+            # block is only unlinked by its owner (or at parent exit).
+            self._owner = False
+        self.name = self._shm.name
+
+    def fits(self, frame) -> bool:
+        return frame.nbytes <= self.slot_bytes
+
+    def write(self, slot: int, frame) -> None:
+        view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+        np.copyto(view, frame)
+
+    def view(self, slot: int, shape, dtype):
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=self._shm.buf, offset=slot * self.slot_bytes)
+
+    def close(self) -> None:
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _default_service_factory():
+    from config import INFERENCE_BATCH_MAX_SIZE, INFERENCE_BATCH_MAX_WAIT_MS, MODEL_DEFINITIONS
+    from inference_scheduler import InferenceScheduler
+    from inference_service import InferenceService, batch_pass_failure_stats
+
+    service = InferenceService(MODEL_DEFINITIONS)
+    scheduler = InferenceScheduler(
+        service.run_models_batch,
+        max_batch_size=INFERENCE_BATCH_MAX_SIZE,
+        max_wait_ms=INFERENCE_BATCH_MAX_WAIT_MS,
+        pass_failure_stats=batch_pass_failure_stats,
+    )
+    return service, scheduler
+
+
+def _compact(results: List[Dict]) -> Dict:
+    frame_stages = results[0].get("frame_stages") if results else None
+    return {
+        "frame_stages": frame_stages,
+        "results": [{k: v for k, v in result.items() if k not in ("frame_stages", "model_name")} for result in results],
+    }
+
+
+def _worker_main(index: int, slots_name: str, slots: int, slot_bytes: int, requests, responses, service_factory):
+    """Entry point of a spawned worker process."""
+    logging.basicConfig(level=logging.INFO, format=f"[inference worker {index}] %(levelname)s %(message)s")
+    frame_slots = SharedFrameSlots(slots, slot_bytes, name=slots_name)
+    service, scheduler = service_factory()
+
+    def respond(request_id, future):
+        try:
+            responses.put((request_id, "ok", _compact(future.result())))
+        except Exception as exc:
+            responses.put((request_id, "error", f"{type(exc).__name__}: {exc}"))
+
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        request_id, kind, body = message
+        try:
+            if kind == "run":
+                slot, shape, dtype, inline, model_keys, camera_id = body
+                frame = inline if inline is not None else frame_slots.view(slot, shape, dtype)
+                future = scheduler.submit(frame, model_keys, camera_id=camera_id)
+                future.add_done_callback(lambda done, request_id=request_id: respond(request_id, done))
+            elif kind == "health":
+                responses.put((request_id, "ok", service.get_model_health(body)))
+            elif kind == "stats":
+                from inference_service import model_execution_stats
+
+                responses.put((request_id, "ok", {"batching": scheduler.stats(), "execution": model_execution_stats()}))
+            else:
+                responses.put((request_id, "error", f"Unknown request {kind!r}"))
+        except Exception as exc:
+            responses.put((request_id, "error", f"{type(exc).__name__}: {exc}"))
+    frame_slots.close()
+
+
+class _Worker:
+    def __init__(self, index: int, slots: int, slot_bytes: int):
+        self.index = index
+        self.frame_slots = SharedFrameSlots(slots, slot_bytes)
+        self.free_slots = queue.Queue()
+        for slot in range(slots):
+            self.free_slots.put(slot)
+        self.process = None
+        self.requests = None
+        self.responses = None
+        self.pending = {}
+        self.restarts = 0
+        self.generation = 0
+
+
+class InferenceWorkerPool:
+    """Drop-in for ``InferenceService`` + ``InferenceScheduler`` running in worker processes.
+
+    Exposes ``run``/``submit``/``stats`` like the scheduler and
+    ``run_models``/``get_model_health`` like the service.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        slots_per_worker: int = 4,
+        slot_bytes: int = 8 * 1024 * 1024,
+        model_names: Dict[str, str] = None,
+        service_factory: Callable = _default_service_factory,
+        restart_delay: float = 1.0,
+        health_timeout: float = 120.0,
+        slot_timeout: float = 30.0,
+    ):
+        self._context = multiprocessing.get_context("spawn")
+        self._service_factory = service_factory
+        self._model_names = dict(model_names or {})
+        self.restart_delay = float(restart_delay)
+        self.health_timeout = float(health_timeout)
+        self.slot_timeout = float(slot_timeout)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._round_robin = itertools.count()
+        self._stats = {"frames": 0, "inline_frames": 0, "errors": 0, "crashes": 0, "timeouts": 0, "slot_timeouts": 0}
+        self._workers = [_Worker(index, slots_per_worker, slot_bytes) for index in range(max(1, int(workers)))]
+        for worker in self._workers:
+            self._start(worker)
+        self._supervisor = threading.Thread(target=self._supervise, name="inference-worker-supervisor", daemon=True)
+        self._supervisor.start()
+
+    # --- process management -------------------------------------------------
+
+    def _start(self, worker: _Worker) -> None:
+        worker.generation += 1
+        worker.requests = self._context.Queue()
+        worker.responses = self._context.Queue()
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(
+                worker.index,
+                worker.frame_slots.name,
+                worker.frame_slots.slots,
+                worker.frame_slots.slot_bytes,
+                worker.requests,
+                worker.responses,
+                self._service_factory,
+            ),
+            name=f"inference-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        threading.Thread(
+            target=self._listen,
+            args=(worker, worker.generation, worker.responses),
+            name=f"inference-worker-{worker.index}-results",
+            daemon=True,
+        ).start()
+
+    def _listen(self, worker: _Worker, generation: int, responses) -> None:
+        while not self._closed and worker.generation == generation:
+            try:
+                request_id, status, body = responses.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                entry = worker.pending.pop(request_id, None)
+            if entry is None:
+                continue
+            future, slot, finish = entry
+            if slot is not None:
+                worker.free_slots.put(slot)
+            if status == "ok":
+                future.set_result(finish(body))
+            else:
+                with self._lock:
+                    self._stats["errors"] += 1
+                future.set_exception(RuntimeError(body))
+
+    def _supervise(self) -> None:
+        while not self._closed:
+            time.sleep(0.5)
+            for worker in self._workers:
+                if self._closed or worker.process.is_alive():
+                    continue
+                self._recover(worker)
+
+    def _recover(self, worker: _Worker) -> None:
+        exitcode = worker.process.exitcode
+        logger.warning("Inference worker %s exited (code %s); restarting", worker.index, exitcode)
+        time.sleep(self.restart_delay)
+        # Swap in the new process and queues under the lock so a concurrent
+        # submit lands either in the failed batch or on the new worker.
+        with self._lock:
+            pending, worker.pending = worker.pending, {}
+            self._stats["crashes"] += 1
+            if not self._closed:
+                worker.restarts += 1
+                self._start(worker)
+        for future, slot, _ in pending.values():
+            if slot is not None:
+                worker.free_slots.put(slot)
+            future.set_exception(WorkerCrashed(f"Inference worker {worker.index} exited with code {exitcode}"))
+
+    # --- requests -------------------------------------------------------------
+
+    def _send(self, worker: _Worker, kind: str, body, slot=None, finish=None) -> Future:
+        future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            worker.pending[request_id] = (future, slot, finish or (lambda value: value))
+            worker.requests.put((request_id, kind, body))
+        return future
+
+    def _pick_worker(self) -> _Worker:
+        # Prefer the least busy worker, rotating between ties.
+        start = next(self._round_robin) % len(self._workers)
+        ordered = self._workers[start:] + self._workers[:start]
+        return min(ordered, key=lambda worker: len(worker.pending))
+
+    def _expand(self, body: Dict) -> List[Dict]:
+        results = []
+        for result in body["results"]:
+            result = dict(result)
+            result["model_name"] = self._model_names.get(result["model_key"], result["model_key"])
+            result["frame_stages"] = body["frame_stages"]
+            results.append(result)
+        return results
+
+    def submit(self, frame, model_keys, camera_id: int = 0) -> Future:
+        worker = self._pick_worker()
+        frame = np.ascontiguousarray(frame)
+        slot = None
+        inline = frame
+        if worker.frame_slots.fits(frame):
+            # Waits only while every slot of this worker is in flight.
+            try:
+                slot = worker.free_slots.get(timeout=self.slot_timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._stats["slot_timeouts"] += 1
+                raise FutureTimeout(f"No free frame slot on inference worker {worker.index}") from None
+            worker.frame_slots.write(slot, frame)
+            inline = None
+        with self._lock:
+            self._stats["frames"] += 1
+            if inline is not None:
+                self._stats["inline_frames"] += 1
+        body = (slot, frame.shape, frame.dtype.str, inline, list(model_keys), camera_id)
+        return self._send(worker, "run", body, slot=slot, finish=self._expand)
+
+    def run(
+        self, frame, model_keys, camera_id: int = 0, timeout: float = None, on_timeout: Callable = None
+    ) -> List[Dict]:
+        future = None
+        try:
+            future = self.submit(frame, model_keys, camera_id=camera_id)
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            with self._lock:
+                self._stats["timeouts"] += 1
+            # Inline frames are pickled by the request queue's feeder thread
+            # after submit returns, so the caller's frame must outlive it too.
+            if on_timeout is not None and future is not None:
+                on_timeout(future)
+            raise
+
+    def run_models(self, frame, model_keys: List[str], camera_id: int = 0) -> List[Dict]:
+        return self.run(frame, model_keys, camera_id=camera_id)
+
+    def get_model_health(self, model_key: str) -> Dict:
+        return self._send(self._workers[0], "health", model_key).result(timeout=self.health_timeout)
+
+    def execution_stats(self) -> Dict:
+        """Batching and per-model execution stats reported by each worker."""
+        futures = [self._send(worker, "stats", None) for worker in self._workers]
+        workers = []
+        for future in futures:
+            try:
+                workers.append(future.result(timeout=5))
+            except Exception as exc:
+                workers.append({"error": str(exc)})
+        return {"workers": workers}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = sum(len(worker.pending) for worker in self._workers)
+        stats["workers"] = [
+            {
+                "index": worker.index,
+                "pid": worker.process.pid,
+                "alive": worker.process.is_alive(),
+                "restarts": worker.restarts,
+                "pending": len(worker.pending),
+                "free_slots": worker.free_slots.qsize(),
+            }
+            for worker in self._workers
+        ]
+        return stats
+
+    def close(self) -> None:
+        self._closed = True
+        for worker in self._workers:
+            try:
+                worker.requests.put(None)
+            except Exception:
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.frame_slots.close()
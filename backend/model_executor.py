@@ -0,0 +1,101 @@
+"""Bounded worker pool for running a frame's model adapters concurrently.
+
+``InferenceService.run_models`` hands the adapters of one frame to
+``ModelExecutor.run``. With ``max_workers`` above 1 they run on a shared,
+size-limited thread pool (Torch, ONNX Runtime, OpenVINO and OpenCV release
+the GIL during the heavy work); otherwise they run one after another in the
+caller's thread. Stages shared between adapters (person boxes, letterbox,
+landmarks) are computed once by ``FrameContext``: the first adapter to need
+a stage runs it and the others wait on the stage's lock.
+
+Per-model wall time and queue wait are recorded so the pool can be sized for
+the host's core count::
+
+    INFERENCE_MODEL_WORKERS=4
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+class ModelExecutor:
+    def __init__(self, max_workers: int = 1):
+        self.max_workers = max(1, int(max_workers))
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._models = {}
+        self._runs = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="model-worker")
+            return self._pool
+
+    def _timed(self, key: str, task: Callable, submitted_at: float) -> Tuple[object, Dict]:
+        started = time.monotonic()
+        with self._stats_lock:
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            result = task()
+        finally:
+            wall_ms = (time.monotonic() - started) * 1000.0
+            queue_ms = (started - submitted_at) * 1000.0
+            with self._stats_lock:
+                self._in_flight -= 1
+            self._record(key, wall_ms, queue_ms)
+        return result, {"wall_ms": round(wall_ms, 2), "queue_ms": round(queue_ms, 2)}
+
+    def _record(self, key: str, wall_ms: float, queue_ms: float) -> None:
+        with self._stats_lock:
+            stats = self._models.setdefault(
+                key,
+                {"runs": 0, "total_wall_ms": 0.0, "max_wall_ms": 0.0, "total_queue_ms": 0.0, "max_queue_ms": 0.0},
+            )
+            stats["runs"] += 1
+            stats["total_wall_ms"] += wall_ms
+            stats["max_wall_ms"] = max(stats["max_wall_ms"], wall_ms)
+            stats["total_queue_ms"] += queue_ms
+            stats["max_queue_ms"] = max(stats["max_queue_ms"], queue_ms)
+            stats["last_wall_ms"] = wall_ms
+            stats["last_queue_ms"] = queue_ms
+
+    def run(self, tasks: Sequence[Tuple[str, Callable]]) -> List[Tuple[object, Dict]]:
+        """Run ``(key, callable)`` tasks; returns ``(result, timing)`` in task order.
+
+        ``timing`` holds the task's ``wall_ms`` and ``queue_ms`` (time spent
+        waiting for a free worker). An exception from a task is re-raised.
+        """
+        with self._stats_lock:
+            self._runs += 1
+        if self.max_workers <= 1 or len(tasks) <= 1:
+            return [self._timed(key, task, time.monotonic()) for key, task in tasks]
+        pool = self._ensure_pool()
+        futures = [pool.submit(self._timed, key, task, time.monotonic()) for key, task in tasks]
+        return [future.result() for future in futures]
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            models = {}
+            for key, stats in self._models.items():
+                runs = stats["runs"]
+                models[key] = {
+                    "runs": runs,
+                    "avg_wall_ms": round(stats["total_wall_ms"] / runs, 2),
+                    "max_wall_ms": round(stats["max_wall_ms"], 2),
+                    "last_wall_ms": round(stats["last_wall_ms"], 2),
+                    "avg_queue_ms": round(stats["total_queue_ms"] / runs, 2),
+                    "max_queue_ms": round(stats["max_queue_ms"], 2),
+                    "last_queue_ms": round(stats["last_queue_ms"], 2),
+                }
+            return {
+                "max_workers": self.max_workers,
+                "frames": self._runs,
+                "peak_concurrent_models": self._peak_in_flight,
+                "models": models,
+            }
@@ -0,0 +1,100 @@
+"""Export YOLO weights to ONNX / OpenVINO and resolve the graph to run.
+
+Exported graphs are cached next to the ``.pt`` weights and reused until the
+weights change:
+
+    best.pt -> best.onnx, best.int8.onnx
+            -> best_openvino_model/, best_int8_openvino_model/
+
+ONNX INT8 uses ONNX Runtime dynamic (weight-only) quantization; OpenVINO INT8
+uses Ultralytics' NNCF post-training quantization, which needs a calibration
+dataset (``data``). Both runtimes are optional dependencies::
+
+    pip install onnx onnxruntime      # backend "onnx"
+    pip install openvino              # backend "openvino"
+
+Usage::
+
+    python scripts/export_models.py --backend onnx --int8
+"""
+import logging
+import os
+import shutil
+from pathlib import Path
+
+from config import MODEL_RUNTIME_BACKENDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_IMGSZ = 640
+
+
+def exported_model_path(weights_path, backend, int8=False):
+    """Cache location of ``weights_path`` exported for ``backend``."""
+    weights = Path(weights_path)
+    if backend == "torch":
+        return weights
+    if backend == "onnx":
+        return weights.with_name(f"{weights.stem}{'.int8' if int8 else ''}.onnx")
+    if backend == "openvino":
+        return weights.with_name(f"{weights.stem}{'_int8' if int8 else ''}_openvino_model")
+    raise ValueError(f"Unknown model backend {backend!r}; expected one of {', '.join(MODEL_RUNTIME_BACKENDS)}")
+
+
+def _is_fresh(exported, weights):
+    return exported.exists() and exported.stat().st_mtime >= weights.stat().st_mtime
+
+
+def export_model(weights_path, backend, int8=False, imgsz=DEFAULT_EXPORT_IMGSZ, data=None, force=False):
+    """Export ``weights_path`` for ``backend`` unless a fresh export exists.
+
+    Returns the exported path. Raises on missing runtimes or export failure.
+    """
+    weights = Path(weights_path)
+    target = exported_model_path(weights, backend, int8)
+    if backend == "torch" or (not force and _is_fresh(target, weights)):
+        return target
+
+    from ultralytics import YOLO
+
+    model = YOLO(str(weights))
+    if backend == "onnx":
+        # Dynamic axes keep multi-camera batches working on the exported graph.
+        fp32_path = Path(model.export(format="onnx", imgsz=imgsz, dynamic=True, verbose=False))
+        if not int8:
+            if fp32_path != target:
+                shutil.move(str(fp32_path), target)
+            return target
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(fp32_path), str(target), weight_type=QuantType.QUInt8)
+        return target
+
+    export_kwargs = {"format": "openvino", "imgsz": imgsz, "dynamic": True, "int8": int8, "verbose": False}
+    if int8 and data:
+        export_kwargs["data"] = data
+    exported = Path(model.export(**export_kwargs))
+    if exported != target:
+        if target.exists():
+            shutil.rmtree(target)
+        shutil.move(str(exported), target)
+    return target
+
+
+def resolve_runtime_weights(weights_path, backend="torch", int8=False):
+    """Return ``(path, backend)`` to load for a model definition.
+
+    Exports on first use and falls back to the ``.pt`` weights (backend
+    ``"torch"``) if the requested runtime is unavailable.
+    """
+    if not backend or backend == "torch":
+        return str(weights_path), "torch"
+    try:
+        return str(export_model(weights_path, backend, int8=int8)), backend
+    except Exception as exc:
+        logger.warning(
+            "Could not prepare %s %s export of %s (%s); using PyTorch weights",
+            backend, "INT8" if int8 else "FP32", os.path.basename(str(weights_path)), exc,
+        )
+        return str(weights_path), "torch"
+
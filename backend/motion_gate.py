@@ -0,0 +1,108 @@
+"""Cheap motion gate in front of per-camera inference.
+
+``MotionGate`` compares a downscaled, blurred grayscale copy of each frame
+with the frame that last went through inference. When nothing changed the
+expensive models are skipped (or run only every ``idle_seconds``); when
+motion appears after a still period a full cycle runs immediately, without
+waiting for the normal cadence.
+
+Usage::
+
+    gate = MotionGate()
+    if gate.decide(frame, due=interval_elapsed):
+        run_models(frame)
+"""
+import threading
+import time
+from typing import Dict
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    def __init__(
+        self,
+        width: int = 160,
+        pixel_threshold: int = 25,
+        min_changed_fraction: float = 0.004,
+        idle_seconds: float = 2.0,
+    ):
+        self.width = int(width)
+        self.pixel_threshold = int(pixel_threshold)
+        self.min_changed_fraction = float(min_changed_fraction)
+        self.idle_seconds = float(idle_seconds)
+        self._reference = None
+        self._motion = False
+        self._last_run_ts = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "checks": 0,
+            "motion_checks": 0,
+            "runs": 0,
+            "motion_triggered_runs": 0,
+            "idle_runs": 0,
+            "skipped": 0,
+        }
+        self.last_changed_fraction = 0.0
+
+    def _small_gray(self, frame) -> np.ndarray:
+        height, width = frame.shape[:2]
+        scale = self.width / float(width) if width > self.width else 1.0
+        small = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _changed_fraction(self, small: np.ndarray) -> float:
+        if self._reference is None or self._reference.shape != small.shape:
+            return 1.0
+        diff = cv2.absdiff(small, self._reference)
+        return float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+
+    def decide(self, frame, due: bool, now: float = None) -> bool:
+        """Whether to run inference on ``frame``.
+
+        ``due`` is the caller's normal cadence (interval elapsed, Nth frame).
+        Motion onset runs immediately; continued motion follows the cadence;
+        a still scene runs at most every ``idle_seconds``. A ``True`` result
+        makes ``frame`` the new reference, so the caller must run it.
+        """
+        now = time.monotonic() if now is None else now
+        small = self._small_gray(frame)
+        with self._lock:
+            changed = self._changed_fraction(small)
+            motion = changed >= self.min_changed_fraction
+            onset = motion and not self._motion
+            self._motion = motion
+            self.last_changed_fraction = changed
+            self._stats["checks"] += 1
+            if motion:
+                self._stats["motion_checks"] += 1
+
+            if onset:
+                run = True
+                self._stats["motion_triggered_runs"] += 1
+            elif motion:
+                run = due
+            else:
+                run = due and (now - self._last_run_ts) >= self.idle_seconds
+                if run:
+                    self._stats["idle_runs"] += 1
+
+            if run:
+                self._stats["runs"] += 1
+                self._reference = small
+                self._last_run_ts = now
+            elif due:
+                self._stats["skipped"] += 1
+            return run
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        considered = stats["runs"] + stats["skipped"]
+        stats["skip_rate"] = round(stats["skipped"] / considered, 4) if considered else 0.0
+        stats["motion_rate"] = round(stats["motion_checks"] / stats["checks"], 4) if stats["checks"] else 0.0
+        stats["last_changed_fraction"] = round(self.last_changed_fraction, 5)
+        return stats
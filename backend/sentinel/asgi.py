@@ -10,6 +10,10 @@ from alerts.routing import websocket_urlpatterns as alert_ws
 from cameras.routing import websocket_urlpatterns as camera_ws
 from devlab.routing import websocket_urlpatterns as devlab_ws
 
+if os.environ.get('CAMERA_MONITOR_IN_PROCESS', '').lower() in ('1', 'true', 'yes'):
+    from cameras.monitor import start_in_process_monitor
+    start_in_process_monitor()
+
 application = ProtocolTypeRouter({
     'http': get_asgi_application(),
     'websocket': URLRouter(alert_ws + camera_ws + devlab_ws),
@@ -53,11 +53,23 @@ TEMPLATES = [
 
 ASGI_APPLICATION = 'sentinel.asgi.application'
 
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
-    },
-}
+# Monitor workers (run_camera_monitors) raise alerts in their own processes;
+# dashboards only receive them through a channel layer shared by every
+# process. Set CHANNEL_REDIS_URL (requires channels_redis) when running them.
+CHANNEL_REDIS_URL = os.environ.get('CHANNEL_REDIS_URL', '').strip()
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [CHANNEL_REDIS_URL]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
 
 DATABASES = {
     'default': {
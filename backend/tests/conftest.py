@@ -36,3 +36,20 @@ def blank_frame(fixture_metadata):
     frame = cv2.imread(str(image_path))
     assert frame is not None, f"Could not read fixture image: {image_path}"
     return frame
+
+
+@pytest.fixture(autouse=True)
+def fresh_config_snapshot(monkeypatch):
+    # Test transactions roll back without post_delete signals, so a snapshot
+    # or alert cooldown state loaded in one test would otherwise leak into
+    # the next. Alerts are written and broadcast as soon as they are raised.
+    import alerts.engine
+    import alerts.fanout
+    import alerts.persistence
+    from detection.config_snapshot import invalidate_config_snapshot
+
+    invalidate_config_snapshot()
+    monkeypatch.setattr(alerts.engine, "_engine", None)
+    monkeypatch.setattr(alerts.persistence, "_queue", alerts.persistence.PersistenceQueue(flush_interval_ms=0))
+    monkeypatch.setattr(alerts.fanout, "_fanout", alerts.fanout.AlertFanout(window_ms=0))
+    yield
@@ -97,3 +97,216 @@ def test_detection_analyze_persists_with_fake_inference(client, monkeypatch):
 
     assert response.status_code == 200
     assert Detection.objects.filter(camera=camera, model_key="helmet").exists()
+
+
+@pytest.mark.django_db
+def test_stream_config_is_served_from_a_snapshot_invalidated_by_signals(django_assert_num_queries):
+    from alerts.models import CameraAlertSeverity
+    from alerts.services import _resolve_alert_severity
+    from cameras.models import Camera
+    from detection.config_snapshot import get_config_snapshot
+    from detection.models import CameraModel, ModelSetting
+    from detection.services import get_effective_enabled_model_keys
+
+    camera = Camera.objects.create(name="Gate 1", source_url="0", location="Yard")
+    helmet, _ = ModelSetting.objects.get_or_create(key="helmet", defaults={"is_enabled": True})
+    vest, _ = ModelSetting.objects.get_or_create(key="vest", defaults={"is_enabled": True})
+    CameraModel.objects.create(camera=camera, model_setting=vest, is_enabled=False)
+
+    get_config_snapshot()
+    with django_assert_num_queries(0):
+        for _ in range(50):
+            assert get_config_snapshot().is_camera_active(camera.id)
+            enabled = get_effective_enabled_model_keys(camera.id)
+            assert _resolve_alert_severity(camera.id, "helmet") == "high"
+    assert "helmet" in enabled and "vest" not in enabled
+
+    CameraAlertSeverity.objects.create(camera=camera, model_key="helmet", severity="low")
+    assert _resolve_alert_severity(camera.id, "helmet") == "low"
+
+    camera.is_active = False
+    camera.save()
+    assert not get_config_snapshot().is_camera_active(camera.id)
+
+    CameraModel.objects.filter(camera=camera).delete()
+    assert "vest" in get_effective_enabled_model_keys(camera.id)
+
+
+@pytest.mark.django_db
+def test_alert_engine_coalesces_repeats_per_track_and_rebuilds_from_db(client, django_assert_max_num_queries):
+    import alerts.engine
+    from alerts.models import Alert
+    from alerts.services import create_alert_from_inference
+    from cameras.models import Camera
+
+    camera = Camera.objects.create(name="Gate 1", source_url="0", location="Yard")
+
+    def fatigue(*track_ids):
+        faces = [{"track_id": track_id, "detected": True, "hybrid_score": 0.9} for track_id in track_ids]
+        return {"status": "ok", "detected": True, "confidence": 0.9, "payload": {**faces[0], "faces": faces}}
+
+    helmet = {"status": "ok", "detected": True, "confidence": 0.95, "payload": {"no_helmet_count": 1}}
+
+    first = create_alert_from_inference(camera=camera, model_key="helmet", result=helmet)
+    assert first is not None
+    with django_assert_max_num_queries(3) as captured:
+        assert create_alert_from_inference(camera=camera, model_key="helmet", result=helmet) is None
+    assert not [query for query in captured.captured_queries if query["sql"].startswith("SELECT")]
+    first.refresh_from_db()
+    assert first.occurrence_count == 2 and first.last_seen_at >= first.created_at
+
+    # Each fatigued face track gets its own alert; known tracks are coalesced.
+    assert create_alert_from_inference(camera=camera, model_key="fatigue", result=fatigue(1)) is not None
+    assert create_alert_from_inference(camera=camera, model_key="fatigue", result=fatigue(1)) is None
+    third = create_alert_from_inference(camera=camera, model_key="fatigue", result=fatigue(1, 2))
+    assert third is not None and third.payload["track_ids"] == [2]
+    assert "track_ids" not in third.detection.payload
+    assert Alert.objects.filter(model_key="fatigue").count() == 2
+
+    # An acknowledged alert stops absorbing repeats.
+    response = client.patch(f"/api/v1/alerts/{first.id}/acknowledge/")
+    assert response.status_code == 200
+    second = create_alert_from_inference(camera=camera, model_key="helmet", result=helmet)
+    assert second is not None and second.id != first.id
+
+    # A restarted process picks up open alerts still in their cooldown.
+    alerts.engine._engine = None
+    assert create_alert_from_inference(camera=camera, model_key="helmet", result=helmet) is None
+    assert create_alert_from_inference(camera=camera, model_key="fatigue", result=fatigue(7)) is None
+    second.refresh_from_db()
+    assert second.occurrence_count == 2
+    assert Alert.objects.count() == 4
+
+
+def test_alert_engine_rebuilds_from_db_once_under_concurrent_first_use(monkeypatch):
+    import threading
+    import time
+    from types import SimpleNamespace
+
+    import alerts.persistence
+    from alerts.engine import AlertEngine
+
+    engine = AlertEngine(60)
+    loads = []
+
+    def slow_load():
+        loads.append(threading.current_thread().name)
+        time.sleep(0.05)
+        engine._loaded = True
+
+    monkeypatch.setattr(engine, "load", slow_load)
+    monkeypatch.setattr(alerts.persistence, "get_persistence_queue", lambda: SimpleNamespace(record_occurrence=lambda *args: None))
+    camera = SimpleNamespace(id=1)
+    threads = [
+        threading.Thread(target=engine.observe, args=(camera, "helmet", {}, lambda subjects: object()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+
+
+@pytest.mark.django_db
+def test_persistence_queue_batches_rows_and_drops_when_full(monkeypatch, django_assert_num_queries):
+    import alerts.persistence
+    from alerts.models import Alert
+    from alerts.persistence import PersistenceQueue
+    from alerts.services import create_alert_from_inference
+    from cameras.models import Camera
+    from detection.models import Detection
+
+    queue = PersistenceQueue(batch_size=100, flush_interval_ms=60000, max_pending=3, block_ms=0)
+    monkeypatch.setattr(alerts.persistence, "_queue", queue)
+    camera = Camera.objects.create(name="Gate 1", source_url="0", location="Yard")
+
+    def fatigue(track_id):
+        face = {"track_id": track_id, "detected": True, "hybrid_score": 0.9}
+        return {"status": "ok", "detected": True, "confidence": 0.9, "payload": face}
+
+    try:
+        queued = [create_alert_from_inference(camera=camera, model_key="fatigue", result=fatigue(i)) for i in range(3)]
+        assert all(alert is not None and alert.pk is None for alert in queued)
+        assert not Alert.objects.exists()
+
+        assert create_alert_from_inference(camera=camera, model_key="fatigue", result=fatigue(9)) is None
+        assert create_alert_from_inference(camera=camera, model_key="fatigue", result=fatigue(0)) is None
+
+        with django_assert_num_queries(4):
+            assert queue.flush() == 6
+        assert Detection.objects.filter(camera=camera).count() == 3
+        first = Alert.objects.get(pk=queued[0].pk)
+        assert first.detection_id is not None and first.occurrence_count == 2
+
+        create_alert_from_inference(camera=camera, model_key="fatigue", result=fatigue(0))
+        queue.flush()
+        first.refresh_from_db()
+        assert first.occurrence_count == 3
+
+        stats = queue.stats()
+        assert stats["dropped"] == 1 and stats["blocked"] == 1 and stats["high_water"] == 3
+        assert stats["alerts_written"] == 3 and stats["occurrences_written"] == 1 and stats["pending"] == 0
+    finally:
+        queue.close()
+
+
+@pytest.mark.django_db
+def test_alert_fanout_batches_slim_summaries_and_filters_per_client(monkeypatch, django_assert_num_queries):
+    import json
+
+    import alerts.fanout
+    from alerts.consumers import AlertConsumer
+    from alerts.fanout import AlertFanout
+    from alerts.models import Alert
+    from cameras.models import Camera
+    from detection.config_snapshot import get_config_snapshot
+
+    sent = []
+
+    class FakeChannelLayer:
+        async def group_send(self, group, message):
+            sent.append((group, message))
+
+    monkeypatch.setattr(alerts.fanout, "get_channel_layer", lambda: FakeChannelLayer())
+    gate = Camera.objects.create(name="Gate", source_url="0", location="Yard")
+    dock = Camera.objects.create(name="Dock", source_url="1", location="Yard")
+    landmarks = [[index, index] for index in range(468)]
+    for camera, model_key, severity, payload in (
+        (gate, "fatigue", "high", {"landmarks": landmarks}),
+        (dock, "vest", "medium", {}),
+        (gate, "gloves", "low", {}),
+    ):
+        Alert.objects.create(camera=camera, model_key=model_key, severity=severity, message=model_key, payload=payload)
+    rows = list(Alert.objects.order_by("id"))
+
+    get_config_snapshot()
+    fanout = AlertFanout(window_ms=60000)
+    with django_assert_num_queries(0):
+        fanout.publish(rows[:1])
+        fanout.publish(rows[1:])
+        assert not sent
+        fanout.flush()
+    assert len(sent) == 1 and sent[0][0] == "alerts" and sent[0][1]["type"] == "alert.batch"
+    event = sent[0][1]
+
+    consumer = AlertConsumer()
+    consumer.cameras, consumer.severities = {gate.id}, None
+    frames = []
+    monkeypatch.setattr(consumer, "send", lambda text_data=None, bytes_data=None: frames.append(json.loads(text_data)))
+
+    consumer.alert_batch(event)
+    assert [alert["id"] for alert in frames[-1]["alerts"]] == [rows[0].id, rows[2].id]
+    assert frames[-1]["alerts"][0]["camera_name"] == "Gate" and "payload" not in frames[-1]["alerts"][0]
+
+    consumer.receive(json.dumps({"filter": {"cameras": [gate.id], "severities": ["medium"]}}))
+    consumer.alert_batch(event)
+    assert len(frames) == 1
+    consumer.receive(json.dumps({"filter": {"cameras": None, "severities": ["medium"]}}))
+    consumer.alert_batch(event)
+    assert [alert["id"] for alert in frames[-1]["alerts"]] == [rows[1].id]
+
+    consumer.receive(json.dumps({"action": "detail", "id": rows[0].id}))
+    assert frames[-1]["type"] == "alert.detail"
+    assert len(frames[-1]["alert"]["payload"]["landmarks"]) == 468
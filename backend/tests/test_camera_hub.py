@@ -0,0 +1,463 @@
+import time
+
+
+def _fake_stream(opened):
+    def stream(self):
+        from cameras import hub as hub_module
+
+        opened.append(self.camera_id)
+        while self._running:
+            self._publish({hub_module.RAW_VIEW: b"raw", hub_module.ALL_OVERLAYS: b"annotated"})
+            time.sleep(0.01)
+
+    return stream
+
+
+def test_viewers_share_one_hub_until_the_last_leaves(monkeypatch):
+    from cameras import hub as hub_module
+
+    opened = []
+    monkeypatch.setattr(hub_module.CameraHub, "_stream", _fake_stream(opened))
+
+    annotated = hub_module.acquire_camera_stream(5)
+    raw = hub_module.acquire_camera_stream(5, annotated=False)
+    hub = annotated._hub
+
+    assert raw._hub is hub
+    assert annotated.next_frame(timeout=2) == b"annotated"
+    assert raw.next_frame(timeout=2) == b"raw"
+
+    annotated.close()
+    assert hub_module.active_hub_camera_ids() == [5]
+
+    raw.close()
+    assert 5 not in hub_module.active_hub_camera_ids()
+    hub._thread.join(timeout=2)
+    assert not hub._thread.is_alive()
+    assert opened == [5]
+
+
+def test_model_preload_starts_once_per_hub_while_loading(monkeypatch):
+    import threading
+
+    import detection.services
+    from cameras import hub as hub_module
+
+    release = threading.Event()
+
+    class LoadingService:
+        ready = False
+        preloads = 0
+
+        def preload(self):
+            LoadingService.preloads += 1
+            release.wait(5)
+
+    monkeypatch.setattr(detection.services, "get_inference_service", lambda: LoadingService())
+    hub = hub_module.CameraHub(13)
+    for _ in range(30):
+        hub._maybe_launch_inference(None, None)
+    release.set()
+    deadline = time.monotonic() + 2
+    while hub._preload_started and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert LoadingService.preloads == 1
+    assert not hub._preload_started
+
+
+def test_monitor_spool_round_trip_and_sharding(tmp_path, monkeypatch):
+    from cameras import monitor
+
+    spool = monitor.MonitorSpool(root=tmp_path, stale_after_seconds=5)
+    spool.write(4, b"raw", b"annotated", {"helmet": {"detected": True}}, {"status": "running"})
+
+    snapshot = spool.read(4)
+    assert snapshot["raw"] == b"raw"
+    assert snapshot["annotated"] == b"annotated"
+    assert snapshot["detections"] == {"helmet": {"detected": True}}
+    assert snapshot["status"] == {"status": "running"}
+    assert spool.read(9) is None
+
+    # The writer's own process never relays its output back to itself.
+    assert not spool.owned_elsewhere(4)
+    monkeypatch.setattr(monitor.os, "getpid", lambda: -1)
+    assert spool.owned_elsewhere(4)
+
+    assert monitor.shard_camera_ids([1, 2, 3, 4, 5, 6], 1, 3) == [1, 4]
+    assert monitor.shard_camera_ids([1, 2, 3], 0, 1) == [1, 2, 3]
+
+
+def test_monitors_refuse_to_start_on_the_in_memory_channel_layer():
+    import pytest
+    from django.core.management import call_command
+    from django.core.management.base import CommandError
+
+    with pytest.raises(CommandError, match="CHANNEL_REDIS_URL"):
+        call_command("run_camera_monitors", workers=1)
+
+
+def test_monitor_worker_throttles_idle_exports_and_renders_only_when_watched(tmp_path, monkeypatch):
+    from cameras import hub as hub_module
+    from cameras import monitor
+
+    acquired = []
+
+    class Viewer:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    def acquire(camera_id, **kwargs):
+        acquired.append((camera_id, kwargs))
+        return Viewer()
+
+    monkeypatch.setattr(hub_module, "acquire_camera_stream", acquire)
+    monkeypatch.setattr(monitor, "MONITOR_WATCH_POLL_SECONDS", 0.0)
+    spool = monitor.MonitorSpool(root=tmp_path, stale_after_seconds=5)
+    worker = monitor.MonitorWorker(spool=spool)
+    worker._subscriptions[7] = object()
+    views = {hub_module.RAW_VIEW: b"raw"}
+
+    # Unwatched: one export per idle interval, no annotated subscription.
+    for _ in range(20):
+        worker._export(7, views, {})
+    assert spool.read(7)["seq"] == 1
+    assert acquired == []
+
+    # A relaying hub with an all-overlays viewer: every frame, annotated.
+    spool.mark_watched(7, annotated=True)
+    for _ in range(5):
+        worker._export(7, views, {})
+    assert spool.read(7)["seq"] == 6
+    assert acquired == [(7, {"overlays": None, "annotated": True})]
+
+    # Only raw viewers left: the annotated subscription is released.
+    spool.mark_watched(7, annotated=False)
+    worker._export(7, views, {})
+    assert worker._viewers == {}
+
+
+def test_capturing_hub_hands_over_once_a_monitor_worker_owns_the_camera(monkeypatch):
+    import types
+
+    import numpy as np
+
+    import detection.config_snapshot
+    from cameras import hub as hub_module
+    from cameras import services
+
+    class FakeCapture:
+        released = False
+
+        def get(self, prop):
+            return 0
+
+        def read(self, image=None):
+            time.sleep(0.005)
+            return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+        def grab(self):
+            time.sleep(0.005)
+            return True
+
+        def retrieve(self, image=None):
+            return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+        def release(self):
+            self.released = True
+
+    class Spool:
+        checks = 0
+
+        def owned_elsewhere(self, camera_id):
+            Spool.checks += 1
+            return Spool.checks >= 3
+
+    capture = FakeCapture()
+    monkeypatch.setattr(services, "_open_capture", lambda source: capture)
+    monkeypatch.setattr(
+        detection.config_snapshot,
+        "get_config_snapshot",
+        lambda: types.SimpleNamespace(is_camera_active=lambda camera_id: True),
+    )
+    monkeypatch.setattr(hub_module, "_OWNER_CHECK_SECONDS", 0.0)
+    hub = hub_module.CameraHub(21)
+    hub._running = True
+    camera = types.SimpleNamespace(source_url="rtsp://cam/21", inference_source_url="")
+
+    assert hub._capture(camera, Spool(), {}) is True
+    assert Spool.checks == 3
+    assert capture.released
+
+
+def test_inference_results_are_cached_before_alerts_are_raised(monkeypatch):
+    import types
+
+    import numpy as np
+
+    import alerts.services
+    import detection.services
+    from cameras import hub as hub_module
+
+    new = {"helmet": {"detected": True, "boxes": []}}
+    seen_at_alert = []
+
+    class Service:
+        def run_models_on_frame(self, enabled, frame, camera_id=None, on_timeout=None):
+            return new
+
+    def create_alert(camera, model_key, result):
+        with hub._state_lock:
+            seen_at_alert.append(hub._cached)
+
+    monkeypatch.setattr(detection.services, "get_effective_enabled_model_keys", lambda camera_id: {"helmet"})
+    monkeypatch.setattr(alerts.services, "create_alert_from_inference", create_alert)
+    hub = hub_module.CameraHub(22)
+    frame_ref = types.SimpleNamespace(frame=np.zeros((48, 64, 3), dtype=np.uint8), release=lambda: None)
+
+    hub._run_inference_cycle(Service(), types.SimpleNamespace(id=22), frame_ref)
+
+    assert seen_at_alert == [new]
+
+
+def test_timed_out_inference_keeps_its_frame_pinned_until_the_batch_finishes(monkeypatch):
+    import types
+    from concurrent.futures import Future
+    from concurrent.futures import TimeoutError as FutureTimeout
+
+    import numpy as np
+
+    import detection.services
+    from cameras import hub as hub_module
+    from cameras.frame_ring import FrameRing
+    from cameras.inference_status import get_inference_status
+
+    batch = Future()
+
+    class StuckService:
+        def run_models_on_frame(self, enabled, frame, camera_id=None, on_timeout=None):
+            on_timeout(batch)
+            raise FutureTimeout()
+
+    monkeypatch.setattr(detection.services, "get_effective_enabled_model_keys", lambda camera_id: {"helmet"})
+    ring = FrameRing(slots=2)
+    ring.write(lambda image=None: (True, np.zeros((48, 64, 3), dtype=np.uint8)), time.monotonic())
+    frame_ref = ring.acquire()
+    hub = hub_module.CameraHub(23)
+
+    hub._run_inference_cycle(StuckService(), types.SimpleNamespace(id=23), frame_ref)
+
+    assert get_inference_status(23)["last_error"] == "inference_timeout"
+    assert not hub._inference_inflight
+    assert not frame_ref._released  # the queued batch still reads the frame
+    batch.set_result([])
+    assert frame_ref._released
+
+
+def test_substream_detections_are_scaled_onto_the_main_stream():
+    from annotation import scale_detections
+
+    detections = {
+        "helmet": {"status": "ok", "payload": {"boxes": [{"x1": 10, "y1": 20, "x2": 30, "y2": 40, "label": "No helmet"}]}},
+        "fatigue": {
+            "status": "ok",
+            "payload": {
+                "faces": [
+                    {
+                        "face_box": {"x1": 4, "y1": 6, "x2": 8, "y2": 10},
+                        "landmarks": [[5, 7]],
+                        "pose_line": {"start": [5, 7], "end": [6, 9]},
+                    }
+                ]
+            },
+        },
+        "vest": {"status": "error", "payload": {}},
+    }
+
+    # 640x360 sub-stream onto a 1920x1080 main stream.
+    scaled = scale_detections(detections, 3.0, 3.0)
+
+    assert scaled["helmet"]["payload"]["boxes"][0] == {"x1": 30, "y1": 60, "x2": 90, "y2": 120, "label": "No helmet"}
+    face = scaled["fatigue"]["payload"]["faces"][0]
+    assert face["face_box"] == {"x1": 12, "y1": 18, "x2": 24, "y2": 30}
+    assert face["landmarks"] == [[15, 21]]
+    assert face["pose_line"] == {"start": [15, 21], "end": [18, 27]}
+    assert scaled["vest"] is detections["vest"]
+    # The inference results themselves are left untouched.
+    assert detections["helmet"]["payload"]["boxes"][0]["x1"] == 10
+
+
+def test_each_encoding_tier_is_encoded_once_and_shared_by_its_viewers():
+    import cv2
+    import numpy as np
+
+    from cameras import hub as hub_module
+    from cameras.frame_ring import FrameRing
+
+    hub = hub_module.CameraHub(11)
+    full = hub_module.CameraSubscription(hub, annotated=False)
+    small = [hub_module.CameraSubscription(hub, annotated=False) for _ in range(3)]
+    for subscription in small:
+        subscription.set_tier(2)
+    hub._subscribers.update([full, *small])
+
+    ring = FrameRing(slots=2)
+    ring.write(lambda image=None: (True, np.full((120, 160, 3), 90, dtype=np.uint8)))
+    with ring.acquire() as frame_ref:
+        views, _ = hub._render_views(None, frame_ref)
+    hub._publish(views)
+
+    assert set(views) == {hub_module.RAW_VIEW, (hub_module.RAW_VIEW, 2)}
+    assert hub._encoded == {0: 1, 2: 1}
+    assert full.next_frame(timeout=1) == views[hub_module.RAW_VIEW]
+    shared = {small_sub.next_frame(timeout=1) for small_sub in small}
+    assert shared == {views[(hub_module.RAW_VIEW, 2)]}
+    decoded = cv2.imdecode(np.frombuffer(shared.pop(), dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert decoded.shape == (60, 80, 3)
+
+
+def test_adaptive_tier_follows_send_backpressure():
+    from cameras.encoding import AdaptiveTier
+
+    adaptive = AdaptiveTier(frame_budget=0.03, tiers=3, step_down_after=2, step_up_after=4)
+    assert adaptive.record(0.005) == 0
+    adaptive.record(0.08)
+    assert adaptive.record(0.08) == 1
+    # Missing published frames counts as congestion even when sends are quick.
+    adaptive.record(0.001, missed_frames=2)
+    assert adaptive.record(0.001, missed_frames=1) == 2
+    assert adaptive.record(0.5) == 2
+    for _ in range(4):
+        tier = adaptive.record(0.002)
+    assert tier == 1
+
+
+def test_vector_viewers_get_the_raw_frame_and_overlay_metadata(monkeypatch):
+    import json
+
+    import numpy as np
+
+    from cameras import hub as hub_module
+    from cameras.consumers import CameraStreamConsumer
+    from cameras.frame_ring import FrameRing
+
+    hub = hub_module.CameraHub(12)
+    monkeypatch.setattr(hub, "_maybe_launch_inference", lambda camera, frame_ref: None)
+    hub._cached = {
+        "helmet": {
+            "status": "ok",
+            "detected": True,
+            "payload": {"boxes": [{"x1": 1, "y1": 2, "x2": 30, "y2": 40, "label": "No helmet", "color": "red", "confidence": 0.9}], "roi_crop": None},
+        },
+        "vest": {"status": "error", "payload": {}},
+    }
+    vector = hub_module.CameraSubscription(hub)
+    vector.set_vector(True)
+    hub._subscribers.add(vector)
+
+    ring = FrameRing(slots=2)
+    ring.write(lambda image=None: (True, np.zeros((48, 64, 3), dtype=np.uint8)))
+    with ring.acquire() as frame_ref:
+        views, detections = hub._render_views(None, frame_ref)
+    hub._publish(views, detections, hub._display_shape)
+
+    # Nothing is drawn server-side for vector viewers.
+    assert set(views) == {hub_module.RAW_VIEW}
+    assert vector.next_frame(timeout=1) == views[hub_module.RAW_VIEW]
+    message = json.loads(CameraStreamConsumer._overlay_message(vector))
+    assert message == {
+        "type": "overlay",
+        "seq": vector.seq,
+        "width": 64,
+        "height": 48,
+        "detections": {
+            "helmet": {"status": "ok", "payload": {"boxes": [{"x1": 1, "y1": 2, "x2": 30, "y2": 40, "label": "No helmet", "color": "red"}]}}
+        },
+    }
+    # Serialized once per frame and shared between vector viewers.
+    assert CameraStreamConsumer._overlay_message(vector) is vector.overlay["message"]
+
+
+def test_overlay_layer_is_rendered_once_and_composited_per_frame():
+    import cv2
+    import numpy as np
+
+    import annotation
+
+    detections = {
+        "helmet": {"status": "ok", "payload": {"boxes": [{"x1": 10, "y1": 30, "x2": 60, "y2": 90, "label": "No helmet", "color": "red"}]}},
+        "fatigue": {
+            "status": "ok",
+            "payload": {"face_box": {"x1": 70, "y1": 20, "x2": 110, "y2": 70}, "ear": 0.21, "landmarks": [[80, 40]], "pose_line": {"start": [90, 45], "end": [100, 50]}},
+        },
+    }
+    before = annotation.overlay_cache_stats()
+    first = np.full((120, 160, 3), 40, dtype=np.uint8)
+    second = np.full((120, 160, 3), 200, dtype=np.uint8)
+    out_first = annotation.draw_annotations(first, detections)  # seen once: drawn directly
+    out_second = annotation.draw_annotations(second, detections)  # seen again: layer rendered
+    out_third = annotation.draw_annotations(second, detections)  # layer reused
+    after = annotation.overlay_cache_stats()
+
+    assert after["direct"] - before["direct"] == 1
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+    assert np.array_equal(out_third, out_second)
+    assert int(first.max()) == 40  # the input frame is never drawn on
+
+    # Same pixels as drawing straight onto the frame (anti-aliased edges within rounding).
+    expected = second.copy()
+    cv2.rectangle(expected, (10, 30), (60, 90), annotation._COLORS["red"], 2)
+    box = out_second[30:91, 10:61]
+    assert np.array_equal(box[:, 0], expected[30:91, 10])
+    assert np.array_equal(box[-1], expected[90, 10:61])
+    # The directly drawn first frame matches the composited ones.
+    reference = annotation._render_layer(sum(annotation._display_list(detections, None), ()), first.shape)
+    composited = first.copy()
+    reference.composite(composited)
+    assert int(np.abs(out_first.astype(int) - composited).max()) <= 1
+    # Moving a box reuses the layer; a new fatigue result is drawn directly.
+    detections["helmet"]["payload"]["boxes"][0]["x2"] = 64
+    annotation.draw_annotations(second, detections)
+    assert annotation.overlay_cache_stats()["hits"] - after["hits"] == 1
+    detections["fatigue"]["payload"]["ear"] = 0.3
+    annotation.draw_annotations(second, detections)
+    assert annotation.overlay_cache_stats()["misses"] == after["misses"]
+
+
+def test_moving_boxes_keep_the_static_layer_cached():
+    import numpy as np
+
+    import annotation
+
+    face = {
+        "face_box": {"x1": 900, "y1": 200, "x2": 1100, "y2": 420},
+        "ear": 0.22, "mar": 0.4, "head_tilt_degrees": 3.5, "hybrid_score": 0.3, "track_id": 1,
+        "landmarks": [[900 + (i * 7) % 200, 200 + (i * 13) % 220] for i in range(478)],
+        "pose_line": {"start": [1000, 300], "end": [1040, 320]},
+    }
+    frame = np.full((1080, 1920, 3), 90, dtype=np.uint8)
+    before = annotation.overlay_cache_stats()
+    for step in range(12):
+        # The tracker moves six worker boxes on every frame between inference cycles.
+        boxes = [
+            {"x1": 100 + 250 * i + 3 * step, "y1": 500 + 2 * step, "x2": 300 + 250 * i + 3 * step, "y2": 900 + 2 * step,
+             "label": "No helmet", "color": "red", "worker_id": i}
+            for i in range(6)
+        ]
+        detections = {"helmet": {"status": "ok", "payload": {"boxes": boxes}}, "fatigue": {"status": "ok", "payload": face}}
+        out = annotation.draw_annotations(frame, detections)
+
+        static, moving = annotation._display_list(detections, None)
+        expected = frame.copy()
+        annotation._draw(expected, static)
+        annotation._draw(expected, moving)
+        # Composited anti-aliasing may differ from OpenCV's own blend by a unit.
+        assert int(np.abs(out.astype(int) - expected).max()) <= 1
+    after = annotation.overlay_cache_stats()
+
+    assert after["direct"] - before["direct"] == 1
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 10
@@ -0,0 +1,183 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+
+def _face(offset_x, rng):
+    points = rng.uniform(0.3, 0.5, size=(478, 2))
+    points[:, 0] += offset_x
+    return [SimpleNamespace(x=float(x), y=float(y)) for x, y in points]
+
+
+class _CountingClassifier:
+    def __init__(self, model_path, device, **kwargs):
+        self.model = None
+        self.batch_sizes = []
+
+    def predict(self, crops_rgb):
+        self.batch_sizes.append(len(crops_rgb))
+        return [0.25] * len(crops_rgb)
+
+    def stats(self):
+        return {"backend": "torch"}
+
+
+def test_preprocess_matches_torchvision_normalization():
+    from fatigue_engine import preprocess_face_crops
+
+    crop = np.full((224, 224, 3), 255, dtype=np.uint8)
+    batch = preprocess_face_crops([crop, crop[:100, :80]])
+
+    assert batch.shape == (2, 3, 224, 224)
+    assert batch.dtype == np.float32
+    expected = (1.0 - np.array([0.485, 0.456, 0.406])) / np.array([0.229, 0.224, 0.225])
+    np.testing.assert_allclose(batch[0, :, 0, 0], expected, rtol=1e-5)
+
+
+def test_classifier_stats_stay_consistent_under_concurrent_predictions():
+    import threading
+
+    fatigue_engine = pytest.importorskip("fatigue_engine")
+    classifier = fatigue_engine.SwinFatigueClassifier.__new__(fatigue_engine.SwinFatigueClassifier)
+    classifier.backend, classifier.precision, classifier.runtime_error = "torch", "fp32", None
+    classifier.max_batch_size = 2
+    classifier._stats_lock = threading.Lock()
+    classifier._stats = {"batches": 0, "faces": 0, "total_ms": 0.0, "last_batch_size": 0, "last_batch_ms": 0.0}
+    classifier._forward = lambda batch: np.zeros(len(batch), dtype=np.float32)
+    crops = [np.zeros((8, 8, 3), dtype=np.uint8)] * 3
+
+    def run():
+        for _ in range(50):
+            classifier.predict(crops)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = classifier.stats()
+    assert stats["batches"] == 4 * 50 * 2
+    assert stats["faces"] == 4 * 50 * 3
+
+
+def test_analyze_batch_classifies_all_faces_in_one_pass(monkeypatch):
+    fatigue_engine = pytest.importorskip("fatigue_engine")
+    monkeypatch.setattr(fatigue_engine, "SwinFatigueClassifier", _CountingClassifier)
+    engine = fatigue_engine.FatigueHybridEngine("swin.pth", "face.task", face_landmarker=object())
+
+    rng = np.random.default_rng(0)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    results = engine.analyze_batch(
+        [
+            {"frame": frame, "face_landmarks": [_face(0.0, rng)]},
+            {"frame": frame, "face_landmarks": []},
+            {"frame": frame, "face_landmarks": [_face(0.4, rng)]},
+        ]
+    )
+
+    assert engine.classifier.batch_sizes == [2]
+    assert [result["status"] for result in results] == ["ok", "no_face", "ok"]
+    assert results[0]["fatigue_probability"] == 0.25
+    assert results[2]["classifier_batch_size"] == 2
+
+
+def test_adaptive_mode_reuses_swin_probability_between_runs(monkeypatch):
+    fatigue_engine = pytest.importorskip("fatigue_engine")
+    monkeypatch.setattr(fatigue_engine, "SwinFatigueClassifier", _CountingClassifier)
+    engine = fatigue_engine.FatigueHybridEngine(
+        "swin.pth", "face.task", face_landmarker=object(),
+        classifier_every_n_frames=3, classifier_max_staleness_seconds=60.0,
+    )
+
+    rng = np.random.default_rng(1)
+    steady_face = [_face(0.0, rng)]
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    sources = [
+        engine.analyze(frame, face_landmarks=steady_face, cache_key=(7, 0))["ml_probability_source"]
+        for _ in range(4)
+    ]
+
+    assert sources == ["model", "cached", "cached", "model"]
+    assert engine.classifier.batch_sizes == [1, 1]
+    assert engine.classifier_stats()["skipped_faces"] == 2
+
+    # Another camera never reuses camera 7's probability, and losing the face
+    # drops the cached value so the next face is classified afresh.
+    assert engine.analyze(frame, face_landmarks=steady_face, cache_key=(8, 0))["ml_probability_source"] == "model"
+    engine.analyze(frame, face_landmarks=[], cache_key=(7, 0))
+    assert engine.analyze(frame, face_landmarks=steady_face, cache_key=(7, 0))["ml_probability_source"] == "model"
+
+
+class _TrackedFakeEngine:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def face_box_from_landmarks(self, face, frame_h, frame_w):
+        return face["box"]
+
+    def analyze_batch(self, items):
+        self.batch_sizes.append(len(items))
+        results = []
+        for item in items:
+            face = item["face_landmarks"][0]
+            results.append(
+                {
+                    "status": "ok",
+                    "hybrid_score": face["score"],
+                    "is_fatigued": face["score"] >= 0.55,
+                    "forced_fatigue_state": False,
+                    "head_tilt_exceeded": False,
+                    "face_box": dict(zip(("x1", "y1", "x2", "y2"), face["box"])),
+                }
+            )
+        return results
+
+    def forget(self, cache_key):
+        pass
+
+
+class _FaceLandmarkModels:
+    def __init__(self, faces):
+        self.faces = faces
+
+    def detect_faces(self, frame_rgb):
+        return self.faces
+
+
+def test_fatigue_adapter_counts_consecutive_frames_per_face_track(monkeypatch):
+    import inference_service as inference_module
+    from inference_service import FatigueModelAdapter, FrameContext
+
+    monkeypatch.setattr(inference_module, "FATIGUE_CONSECUTIVE_FRAMES_THRESHOLD", 2)
+    adapter = FatigueModelAdapter.__new__(FatigueModelAdapter)
+    adapter.model_key = "fatigue"
+    adapter.available = True
+    adapter._engine = _TrackedFakeEngine()
+    adapter._fatigue_consecutive_by_camera = {}
+    adapter._face_trackers = {}
+    adapter._face_trackers_lock = inference_module.threading.Lock()
+
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    tired = {"box": (10, 10, 60, 60), "score": 0.9}
+    alert = {"box": (200, 20, 250, 70), "score": 0.1}
+
+    def run(faces):
+        context = FrameContext(frame, landmark_models=_FaceLandmarkModels(faces), camera_id=4)
+        return adapter.infer(frame, camera_id=4, context=context)
+
+    first = run([tired, alert])
+    # The landmarker returns faces in a different order: tracks keep the counts.
+    second = run([alert, tired])
+
+    assert adapter._engine.batch_sizes == [2, 2]
+    assert first["detected"] is False
+    assert second["detected"] is True
+    assert second["payload"]["face_count"] == 2
+    assert second["payload"]["consecutive_fatigue_frames"] == 2
+    by_track = {face["track_id"]: face for face in second["payload"]["faces"]}
+    assert sorted(face["consecutive_fatigue_frames"] for face in by_track.values()) == [0, 2]
+    assert adapter._fatigue_consecutive_by_camera[4] == {
+        track_id: face["consecutive_fatigue_frames"] for track_id, face in by_track.items()
+    }
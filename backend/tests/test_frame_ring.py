@@ -0,0 +1,120 @@
+import time
+
+import numpy as np
+
+
+class _FakeCapture:
+    def __init__(self, shape=(4, 6, 3), frame_delay=0.0):
+        self.shape = shape
+        self.frame_delay = frame_delay
+        self.count = 0
+        self.decoded = 0
+        self.allocations = 0
+
+    def grab(self):
+        if self.frame_delay:
+            time.sleep(self.frame_delay)
+        self.count += 1
+        return True
+
+    def retrieve(self, image=None):
+        self.decoded += 1
+        if image is None or image.shape != self.shape:
+            self.allocations += 1
+            image = np.empty(self.shape, dtype=np.uint8)
+        image[:] = self.count % 256
+        return True, image
+
+    def read(self, image=None):
+        self.count += 1
+        if image is None or image.shape != self.shape:
+            self.allocations += 1
+            image = np.empty(self.shape, dtype=np.uint8)
+        image[:] = self.count % 256
+        return True, image
+
+
+def test_capture_reuses_ring_slots_and_pinned_frames_survive_overwrites():
+    from cameras.frame_ring import FrameRing
+
+    ring = FrameRing(slots=3)
+    capture = _FakeCapture()
+    for _ in range(10):
+        ring.write(capture.read)
+    # Steady state reuses the three preallocated buffers.
+    assert capture.allocations == 3
+
+    pinned = ring.acquire()
+    assert pinned.seq == 10 and int(pinned.frame[0, 0, 0]) == 10
+    for _ in range(6):
+        ring.write(capture.read)
+    assert int(pinned.frame[0, 0, 0]) == 10
+    assert ring.acquire(pinned.seq).seq == 10
+    pinned.release()
+
+    stats = ring.stats()
+    # Frames superseded before anyone pinned them are dropped, not queued.
+    assert stats["frames"] == 16
+    assert stats["dropped"] == 14
+    assert ring.acquire(1) is None
+
+
+def test_ring_discards_frames_instead_of_growing_when_consumers_pin_every_slot():
+    from cameras.frame_ring import FrameRing
+
+    ring = FrameRing(slots=2)
+    capture = _FakeCapture()
+    ring.write(capture.read)
+    first = ring.acquire()
+    ring.write(capture.read)
+    second = ring.acquire()
+
+    ring.write(capture.read)
+    assert ring.latest_seq == second.seq
+    assert ring.stats()["overruns"] == 1
+    first.release()
+    ring.write(capture.read)
+    assert ring.latest_seq == 3
+    second.release()
+
+
+def test_capture_worker_keeps_only_the_newest_frame_for_a_slow_consumer():
+    from cameras.capture import CaptureWorker
+    from cameras.frame_ring import FrameRing
+
+    ring = FrameRing(slots=3)
+    capture = _FakeCapture()
+    worker = CaptureWorker(capture, ring).start()
+    try:
+        first = ring.wait_for_frame(0, timeout=2)
+        first.release()
+        time.sleep(0.1)  # a slow render/encode step
+        latest = ring.wait_for_frame(first.seq, timeout=2)
+        # The consumer jumps to the live edge instead of working through a backlog.
+        assert latest.seq > first.seq + 1
+        latest.release()
+    finally:
+        worker.stop()
+    stats = worker.stats()
+    assert stats["frames"] == capture.count
+    assert stats["dropped"] > 0
+    assert not worker.failed
+
+
+def test_capture_worker_grabs_every_frame_but_decodes_only_at_the_kept_rate():
+    from cameras.capture import CaptureWorker
+    from cameras.frame_ring import FrameRing
+
+    ring = FrameRing(slots=3)
+    capture = _FakeCapture(frame_delay=0.002)
+    worker = CaptureWorker(capture, ring, keep_fps=20).start()
+    time.sleep(0.5)
+    worker.stop()
+
+    stats = worker.stats()
+    # The source is drained at its own rate, but only ~20 fps are decoded.
+    assert capture.count > 100
+    assert capture.decoded == stats["frames"] <= 0.5 * 20 + 3
+    assert stats["skipped"] == capture.count - capture.decoded
+    with ring.acquire() as latest:
+        assert latest.seq == capture.decoded
@@ -0,0 +1,352 @@
+import time
+
+import numpy as np
+import pytest
+import torch
+
+
+class _FakeBox:
+    def __init__(self, xyxy, conf):
+        self.xyxy = [xyxy]
+        self.conf = [conf]
+
+
+class _FakeResult:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class _CountingPersonModel:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, frame, **kwargs):
+        self.calls += 1
+        return [_FakeResult([_FakeBox((10, 20, 110, 220), 0.9)])]
+
+
+class _PersonConsumer:
+    def __init__(self, model_key, person_model):
+        self.model_key = model_key
+        self.display_name = model_key.title()
+        self._person_model = person_model
+
+    def infer(self, frame, camera_id=0, context=None):
+        boxes = context.person_boxes(self._person_model, consumer=self.model_key)
+        return {
+            "status": "ok",
+            "detected": False,
+            "confidence": 0.0,
+            "payload": {"person_count": len(boxes)},
+        }
+
+
+@pytest.mark.regression
+def test_run_models_computes_person_stage_once_per_frame():
+    from inference_service import InferenceService
+
+    person_model = _CountingPersonModel()
+    service = InferenceService.__new__(InferenceService)
+    service._adapters = {
+        key: _PersonConsumer(key, person_model)
+        for key in ("helmet", "vest", "faceshield", "safetysuit")
+    }
+
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    results = service.run_models(frame, list(service._adapters), camera_id=3)
+
+    assert person_model.calls == 1
+    assert [item["payload"]["person_count"] for item in results] == [1, 1, 1, 1]
+    stages = results[0]["frame_stages"]
+    assert stages["person"]["runs"] == 1
+    assert stages["person"]["consumers"] == ["helmet", "vest", "faceshield", "safetysuit"]
+
+
+def test_shared_person_model_is_loaded_once_per_path(monkeypatch):
+    import inference_service as inference_module
+
+    loads = []
+    monkeypatch.setattr(inference_module, "_shared_person_models", {})
+    monkeypatch.setattr(inference_module, "YOLO", lambda path: loads.append(path) or object())
+
+    first = inference_module._get_shared_person_model("yolov8n.pt")
+    second = inference_module._get_shared_person_model("yolov8n.pt")
+
+    assert first is second
+    assert loads == ["yolov8n.pt"]
+
+
+class _CountingLandmarkModels:
+    def __init__(self):
+        self.calls = {"face": 0, "hands": 0, "pose": 0}
+
+    def detect_faces(self, frame_rgb):
+        self.calls["face"] += 1
+        return []
+
+    def detect_hands(self, frame_rgb):
+        self.calls["hands"] += 1
+        return []
+
+    def detect_pose(self, frame_rgb):
+        self.calls["pose"] += 1
+        return None
+
+
+def test_frame_context_runs_each_landmark_stage_at_most_once():
+    from inference_service import FrameContext
+
+    landmark_models = _CountingLandmarkModels()
+    context = FrameContext(np.zeros((48, 64, 3), dtype=np.uint8), landmark_models=landmark_models)
+
+    assert context.face_landmarks(consumer="fatigue") == []
+    assert context.face_landmarks(consumer="goggles") == []
+    assert context.rgb(consumer="fatigue") is context.rgb(consumer="goggles")
+
+    assert landmark_models.calls == {"face": 1, "hands": 0, "pose": 0}
+    stages = context.stage_summary()
+    assert stages["face_landmarks"] == {"runs": 1, "consumers": ["fatigue", "goggles"]}
+    assert stages["rgb"]["runs"] == 1
+    assert "hand_landmarks" not in stages
+
+
+def test_scheduler_batches_concurrent_camera_requests():
+    from inference_scheduler import InferenceScheduler
+
+    batch_sizes = []
+
+    def run_batch(requests):
+        batch_sizes.append(len(requests))
+        return [[{"model_key": "helmet", "camera_id": r["camera_id"]}] for r in requests]
+
+    scheduler = InferenceScheduler(run_batch, max_batch_size=4, max_wait_ms=200)
+    futures = [scheduler.submit(None, ["helmet"], camera_id=camera_id) for camera_id in (1, 2, 3)]
+
+    assert [f.result(timeout=5)[0]["camera_id"] for f in futures] == [1, 2, 3]
+    assert batch_sizes == [3]
+    assert scheduler.stats()["largest_batch_size"] == 3
+
+
+@pytest.mark.regression
+def test_scheduler_run_times_out_instead_of_hanging_on_a_stuck_batch():
+    import threading
+    from concurrent.futures import TimeoutError as FutureTimeout
+
+    from inference_scheduler import InferenceScheduler
+
+    release = threading.Event()
+
+    def run_batch(requests):
+        release.wait(5)
+        return [[] for _ in requests]
+
+    scheduler = InferenceScheduler(run_batch, max_batch_size=1, max_wait_ms=0)
+    try:
+        abandoned = []
+        with pytest.raises(FutureTimeout):
+            scheduler.run(None, ["helmet"], camera_id=1, timeout=0.05, on_timeout=abandoned.append)
+        assert scheduler.stats()["timeouts"] == 1
+        # The caller gets the still-running batch to keep its frame alive.
+        assert len(abandoned) == 1 and not abandoned[0].done()
+        release.set()
+        assert abandoned[0].result(timeout=5) == []
+    finally:
+        release.set()
+
+
+class _BatchPersonModel(_CountingPersonModel):
+    def __call__(self, frames, **kwargs):
+        self.calls += 1
+        count = len(frames) if isinstance(frames, list) else 1
+        return [_FakeResult([_FakeBox((1, 2, 30, 60), 0.8)]) for _ in range(count)]
+
+
+@pytest.mark.regression
+def test_run_models_batch_runs_person_stage_once_for_all_cameras():
+    from inference_service import InferenceService
+
+    person_model = _BatchPersonModel()
+    service = InferenceService.__new__(InferenceService)
+    consumer = _PersonConsumer("helmet", person_model)
+    consumer.available = True
+    service._adapters = {"helmet": consumer}
+
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    outputs = service.run_models_batch(
+        [{"frame": frame, "model_keys": ["helmet"], "camera_id": camera_id} for camera_id in (1, 2, 3)]
+    )
+
+    assert person_model.calls == 1
+    assert [output[0]["payload"]["person_count"] for output in outputs] == [1, 1, 1]
+    assert outputs[0][0]["frame_stages"]["person"]["batch_size"] == 3
+
+
+class _FlakyBatchAdapter:
+    supports_frame_batching = True
+    available = True
+
+    def __init__(self):
+        self.model_key = "vest"
+        self.display_name = "Vest"
+
+    def predict_batch(self, contexts):
+        contexts[0].prefill("model", id(self), "from-batch", batch_size=len(contexts))
+        raise RuntimeError("batch pass exploded")
+
+    def infer(self, frame, camera_id=0, context=None):
+        source = context.model_result(self, lambda: "per-frame", consumer=self.model_key)
+        return {"status": "ok", "detected": False, "confidence": 0.0, "payload": {"source": source}}
+
+
+@pytest.mark.regression
+def test_failed_batch_pass_is_logged_counted_and_its_prefills_discarded(caplog):
+    import inference_service
+    from inference_service import InferenceService, batch_pass_failure_stats
+
+    service = InferenceService.__new__(InferenceService)
+    service._adapters = {"vest": _FlakyBatchAdapter()}
+    before = batch_pass_failure_stats().get("vest", 0)
+
+    frame = np.zeros((32, 32, 3), dtype=np.uint8)
+    with caplog.at_level("ERROR", logger=inference_service.__name__):
+        outputs = service.run_models_batch(
+            [{"frame": frame, "model_keys": ["vest"], "camera_id": camera_id} for camera_id in (1, 2)]
+        )
+
+    assert [output[0]["payload"]["source"] for output in outputs] == ["per-frame", "per-frame"]
+    assert batch_pass_failure_stats()["vest"] == before + 1
+    assert "Batched vest pass over 2 frames failed" in caplog.text
+
+
+class _TwoPersonModel(_CountingPersonModel):
+    def __call__(self, frame, **kwargs):
+        self.calls += 1
+        return [_FakeResult([_FakeBox((100, 50, 140, 150), 0.9), _FakeBox((200, 50, 240, 150), 0.85)])]
+
+
+class _FakeClassBox(_FakeBox):
+    def __init__(self, xyxy, conf, cls):
+        super().__init__(xyxy, conf)
+        self.cls = [cls]
+
+
+class _CropVestModel:
+    names = {0: "vest"}
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, crops, **kwargs):
+        self.calls.append(([crop.shape[:2] for crop in crops], kwargs.get("imgsz")))
+        # Only the first worker wears a vest; it is seen in crop coordinates.
+        return [
+            _FakeResult([_FakeClassBox((10, 20, 30, 60), 0.8, 0)] if index == 0 else [])
+            for index in range(len(crops))
+        ]
+
+
+def test_vest_roi_crop_mode_maps_crop_boxes_back_to_the_frame():
+    from inference_service import PPEModelAdapter
+
+    adapter = PPEModelAdapter.__new__(PPEModelAdapter)
+    adapter.model_key = "vest"
+    adapter.available = True
+    adapter.normalized_target_labels = {"vest"}
+    adapter.model_classes = ["vest"]
+    adapter.matched_labels = ["vest"]
+    adapter.inference_confidence = 0.35
+    adapter.supports_qr = False
+    adapter._absence_uses_features = False
+    adapter._absence_uses_person_overlap = True
+    adapter._supports_explicit_missing_classes = False
+    adapter.roi_crop = True
+    adapter.roi_crop_imgsz = 320
+    adapter.roi_crop_padding = 0.15
+    adapter._person_model = _TwoPersonModel()
+    adapter._model = _CropVestModel()
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    result = adapter.infer(frame, camera_id=2)
+
+    # One batched call over both padded person crops at the smaller size.
+    assert adapter._model.calls == [([(130, 52), (130, 52)], 320)]
+    assert adapter._person_model.calls == 1
+    payload = result["payload"]
+    assert payload["roi_crop"] == {"crops": 2, "imgsz": 320}
+    vest_box = next(box for box in payload["boxes"] if box["color"] == "green")
+    assert (vest_box["x1"], vest_box["y1"], vest_box["x2"], vest_box["y2"]) == (104, 55, 124, 95)
+    assert result["detected"] is True
+    assert payload["person_missing_count"] == 1
+
+
+class _LetterboxModel:
+    overrides = {"imgsz": 640}
+    names = {0: "vest"}
+
+    def __init__(self):
+        self.inputs = []
+
+    def __call__(self, source, **kwargs):
+        from ultralytics.engine.results import Results
+
+        self.inputs.append(tuple(source.shape))
+        boxes = torch.tensor([[100.0, 50.0, 300.0, 200.0, 0.9, 0.0]])
+        return [Results(np.zeros(source.shape[2:] + (3,), dtype=np.uint8), path="", names=self.names, boxes=boxes)]
+
+
+def test_models_at_the_same_input_size_share_one_letterbox():
+    from inference_service import FrameContext, PPEModelAdapter
+
+    adapter = PPEModelAdapter.__new__(PPEModelAdapter)
+    adapter.model_key = "vest"
+    adapter.imgsz = 640
+    adapter.roi_crop = False
+    adapter.inference_confidence = 0.35
+    adapter._model = _LetterboxModel()
+    person_model = _LetterboxModel()
+
+    context = FrameContext(np.zeros((1080, 1920, 3), dtype=np.uint8))
+    result = adapter._predict(context.frame, context)
+    person_boxes = context.person_boxes(person_model, consumer="helmet")
+
+    # 1920x1080 letterboxes to 640x384 once; both detectors get that tensor.
+    assert adapter._model.inputs == person_model.inputs == [(1, 3, 384, 640)]
+    stages = context.stage_summary()
+    assert stages["letterbox"]["runs"] == 1
+    assert stages["letterbox"]["consumers"] == ["vest", "person"]
+    # Boxes come back in frame coordinates.
+    assert result.boxes.xyxy.tolist() == [[300.0, 114.0, 900.0, 564.0]]
+    assert person_boxes == [(300, 114, 900, 564, pytest.approx(0.9))]
+
+
+class _SlowPersonConsumer(_PersonConsumer):
+    def infer(self, frame, camera_id=0, context=None):
+        result = super().infer(frame, camera_id=camera_id, context=context)
+        time.sleep(0.2)
+        return result
+
+
+def test_run_models_runs_adapters_concurrently_on_the_model_pool(monkeypatch):
+    import inference_service as inference_module
+    from model_executor import ModelExecutor
+
+    executor = ModelExecutor(max_workers=4)
+    monkeypatch.setattr(inference_module, "_model_executor", executor)
+    person_model = _CountingPersonModel()
+    service = inference_module.InferenceService.__new__(inference_module.InferenceService)
+    service._adapters = {
+        key: _SlowPersonConsumer(key, person_model) for key in ("helmet", "vest", "faceshield", "safetysuit")
+    }
+
+    started = time.monotonic()
+    results = service.run_models(np.zeros((240, 320, 3), dtype=np.uint8), list(service._adapters), camera_id=1)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.6
+    # The shared person stage still runs once; the others wait for it.
+    assert person_model.calls == 1
+    assert [result["model_key"] for result in results] == ["helmet", "vest", "faceshield", "safetysuit"]
+    assert all(result["timing"]["wall_ms"] >= 200 for result in results)
+    stats = executor.stats()
+    assert stats["peak_concurrent_models"] == 4
+    assert stats["models"]["vest"]["runs"] == 1
@@ -0,0 +1,95 @@
+import os
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+
+class _EchoScheduler:
+    def submit(self, frame, model_keys, camera_id=0):
+        if "crash" in model_keys:
+            os._exit(3)
+        future = Future()
+        if "hang" in model_keys:
+            return future
+        future.set_result(
+            [
+                {
+                    "model_key": key,
+                    "model_name": key,
+                    "status": "ok",
+                    "detected": False,
+                    "confidence": 0.0,
+                    "payload": {"checksum": int(frame.sum()), "shape": list(frame.shape), "camera_id": camera_id},
+                    "frame_stages": {"person": {"runs": 1}},
+                }
+                for key in model_keys
+            ]
+        )
+        return future
+
+
+def _echo_service_factory():
+    return None, _EchoScheduler()
+
+
+@pytest.mark.slow
+def test_worker_pool_reads_frames_from_shared_memory_and_restarts_crashed_workers():
+    from inference_workers import InferenceWorkerPool, WorkerCrashed
+
+    pool = InferenceWorkerPool(
+        workers=1,
+        slots_per_worker=2,
+        slot_bytes=64 * 64 * 3,
+        model_names={"helmet": "Helmet Detection"},
+        service_factory=_echo_service_factory,
+        restart_delay=0.1,
+    )
+    try:
+        frame = np.full((64, 64, 3), 2, dtype=np.uint8)
+        results = pool.run(frame, ["helmet", "vest"], camera_id=4, timeout=60)
+        assert [result["model_key"] for result in results] == ["helmet", "vest"]
+        assert results[0]["model_name"] == "Helmet Detection"
+        assert results[0]["payload"] == {"checksum": 64 * 64 * 3 * 2, "shape": [64, 64, 3], "camera_id": 4}
+        assert results[1]["frame_stages"] == {"person": {"runs": 1}}
+
+        # Larger than a slot: sent inline instead of through shared memory.
+        big = np.ones((128, 64, 3), dtype=np.uint8)
+        assert pool.run(big, ["helmet"], timeout=60)[0]["payload"]["shape"] == [128, 64, 3]
+        assert pool.stats()["inline_frames"] == 1
+
+        with pytest.raises(WorkerCrashed):
+            pool.run(frame, ["crash"], timeout=60)
+        assert pool.run(frame, ["helmet"], timeout=60)[0]["payload"]["checksum"] == 64 * 64 * 3 * 2
+        stats = pool.stats()
+        assert stats["crashes"] == 1
+        assert stats["workers"][0]["restarts"] == 1
+        assert stats["workers"][0]["free_slots"] == 2
+    finally:
+        pool.close()
+
+
+@pytest.mark.slow
+def test_worker_pool_times_out_instead_of_waiting_for_a_slot_held_by_a_hung_worker():
+    from concurrent.futures import TimeoutError as FutureTimeout
+
+    from inference_workers import InferenceWorkerPool
+
+    pool = InferenceWorkerPool(
+        workers=1,
+        slots_per_worker=1,
+        slot_bytes=64 * 64 * 3,
+        service_factory=_echo_service_factory,
+        slot_timeout=0.2,
+    )
+    try:
+        frame = np.zeros((64, 64, 3), dtype=np.uint8)
+        with pytest.raises(FutureTimeout):
+            pool.run(frame, ["hang"], timeout=0.2)
+        # The only slot is still held by the hung request.
+        with pytest.raises(FutureTimeout):
+            pool.run(frame, ["helmet"], timeout=60)
+        stats = pool.stats()
+        assert stats["slot_timeouts"] == 1 and stats["timeouts"] == 2
+    finally:
+        pool.close()
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+
+def test_exported_model_paths_sit_next_to_weights():
+    from model_export import exported_model_path
+
+    weights = Path("/models/best.pt")
+    assert exported_model_path(weights, "torch") == weights
+    assert exported_model_path(weights, "onnx") == Path("/models/best.onnx")
+    assert exported_model_path(weights, "onnx", int8=True) == Path("/models/best.int8.onnx")
+    assert exported_model_path(weights, "openvino", int8=True) == Path("/models/best_int8_openvino_model")
+
+
+def test_runtime_falls_back_to_torch_when_export_fails(monkeypatch):
+    import model_export
+
+    def broken_export(*args, **kwargs):
+        raise ImportError("onnxruntime is not installed")
+
+    monkeypatch.setattr(model_export, "export_model", broken_export)
+
+    assert model_export.resolve_runtime_weights("best.pt", "onnx") == ("best.pt", "torch")
+    assert model_export.resolve_runtime_weights("best.pt", "torch") == ("best.pt", "torch")
@@ -0,0 +1,25 @@
+import numpy as np
+
+
+def test_motion_gate_skips_still_scenes_and_runs_on_motion_onset():
+    from motion_gate import MotionGate
+
+    gate = MotionGate(idle_seconds=2.0)
+    still = np.zeros((240, 320, 3), dtype=np.uint8)
+    moved = still.copy()
+    moved[80:160, 100:180] = 255
+
+    assert gate.decide(still, due=True, now=0.0) is True  # first frame has no reference
+    assert gate.decide(still, due=True, now=0.3) is False
+    assert gate.decide(still, due=True, now=0.6) is False
+    # Motion onset runs even though the cadence is not due.
+    assert gate.decide(moved, due=False, now=0.7) is True
+    assert gate.decide(moved, due=True, now=1.0) is False
+    # A still scene is still refreshed once per idle period.
+    assert gate.decide(moved, due=True, now=2.8) is True
+
+    stats = gate.stats()
+    assert stats["runs"] == 3
+    assert stats["skipped"] == 3
+    assert stats["motion_triggered_runs"] == 2
+    assert stats["skip_rate"] == 0.5
@@ -0,0 +1,50 @@
+def test_tracker_keeps_ids_for_moving_boxes_and_expires_lost_ones():
+    from tracking import IoUTracker
+
+    tracker = IoUTracker(max_missed=1)
+    first = tracker.update([(0, 0, 10, 10), (100, 100, 120, 120)])
+    second = tracker.update([(102, 101, 122, 121), (2, 1, 12, 11)])
+    assert second == [first[1], first[0]]
+
+    # A fast mover barely overlaps its last box but stays close: centroid match.
+    third = tracker.update([(118, 100, 138, 120)])
+    assert third == [first[1]]
+
+    tracker.update([(119, 100, 139, 120)])
+    assert tracker.expired == [first[0]]
+    assert tracker.update([(0, 0, 10, 10)]) not in ([first[0]], [first[1]])
+
+
+def _helmet_snapshot(x):
+    return {
+        "helmet": {
+            "status": "ok",
+            "detected": False,
+            "payload": {
+                "boxes": [
+                    {"x1": x, "y1": 50, "x2": x + 40, "y2": 150, "label": "worker", "color": "blue"},
+                    {"x1": x + 5, "y1": 50, "x2": x + 35, "y2": 70, "label": "helmet", "color": "green"},
+                ]
+            },
+        }
+    }
+
+
+def test_detection_tracker_propagates_boxes_and_keeps_worker_ids():
+    from tracking import DetectionTracker
+
+    tracker = DetectionTracker(max_stable_speed=100.0)
+    first = tracker.observe(_helmet_snapshot(100), timestamp=0.0)
+    worker_id = first["helmet"]["payload"]["boxes"][0]["worker_id"]
+    assert first["helmet"]["payload"]["boxes"][1]["worker_id"] == worker_id
+    assert not tracker.stable
+
+    second = tracker.observe(_helmet_snapshot(110), timestamp=0.5)
+    assert second["helmet"]["payload"]["boxes"][0]["worker_id"] == worker_id
+    assert tracker.stable
+
+    # Halfway to the next cycle the worker box has moved on with its velocity.
+    moved = tracker.propagate(second, timestamp=0.75)["helmet"]["payload"]["boxes"][0]
+    assert 110 < moved["x1"] < 120
+    assert moved["worker_id"] == worker_id
+    assert second["helmet"]["payload"]["boxes"][0]["x1"] == 110
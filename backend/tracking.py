@@ -0,0 +1,267 @@
+"""Lightweight multi-object tracking for per-frame detection boxes.
+
+``IoUTracker`` assigns stable integer IDs to boxes across frames: boxes are
+matched greedily to existing tracks by IoU, then by centroid distance for
+fast-moving objects whose boxes no longer overlap. Tracks that go unmatched
+for ``max_missed`` updates expire and are reported in ``expired``.
+
+``MotionTracker`` adds SORT-style constant-velocity motion: tracks are
+matched against their predicted position and ``predict`` extrapolates every
+track to an arbitrary time between detections.
+
+``DetectionTracker`` applies motion tracking to whole inference snapshots
+(``{model_key: result}``) so camera streams can move cached boxes with the
+workers on frames between inference cycles and label them with stable IDs.
+
+Usage::
+
+    tracker = IoUTracker()
+    track_ids = tracker.update([(x1, y1, x2, y2), ...])
+"""
+import itertools
+import time
+from typing import Dict, List, Sequence, Tuple
+
+Box = Tuple[float, float, float, float]
+
+
+def box_iou(a: Box, b: Box) -> float:
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _centroid_distance(a: Box, b: Box) -> float:
+    """Centre distance relative to the boxes' mean diagonal (scale invariant)."""
+    ax, ay = (a[0] + a[2]) / 2.0, (a[1] + a[3]) / 2.0
+    bx, by = (b[0] + b[2]) / 2.0, (b[1] + b[3]) / 2.0
+    diag = (
+        ((a[2] - a[0]) ** 2 + (a[3] - a[1]) ** 2) ** 0.5
+        + ((b[2] - b[0]) ** 2 + (b[3] - b[1]) ** 2) ** 0.5
+    ) / 2.0
+    if diag <= 0:
+        return float("inf")
+    return (((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5) / diag
+
+
+class Track:
+    def __init__(self, track_id: int, box: Box, timestamp: float = 0.0):
+        self.track_id = track_id
+        self.box = tuple(box)
+        self.hits = 1
+        self.missed = 0
+        self.timestamp = timestamp
+        self.velocity = (0.0, 0.0, 0.0, 0.0)
+
+    def predicted(self, timestamp: float) -> Box:
+        dt = max(0.0, timestamp - self.timestamp)
+        return tuple(c + v * dt for c, v in zip(self.box, self.velocity))
+
+
+class IoUTracker:
+    def __init__(self, iou_threshold: float = 0.3, max_centroid_distance: float = 0.6, max_missed: int = 10):
+        self.iou_threshold = float(iou_threshold)
+        self.max_centroid_distance = float(max_centroid_distance)
+        self.max_missed = int(max_missed)
+        self.tracks = {}
+        self.expired: List[int] = []
+        self.born: List[int] = []
+        self._ids = itertools.count(1)
+
+    def _reference_box(self, track: Track, timestamp: float) -> Box:
+        return track.box
+
+    def _observe(self, track: Track, box: Box, timestamp: float) -> None:
+        track.box = tuple(box)
+        track.timestamp = timestamp
+
+    def _match(self, boxes: Sequence[Box], timestamp: float):
+        pairs = []
+        for track in self.tracks.values():
+            reference = self._reference_box(track, timestamp)
+            for index, box in enumerate(boxes):
+                pairs.append((box_iou(box, reference), _centroid_distance(box, reference), index, track.track_id))
+
+        matches = {}
+        used_tracks = set()
+        # IoU first, then centroid distance for boxes that jumped too far to overlap.
+        by_iou = sorted((p for p in pairs if p[0] >= self.iou_threshold), key=lambda p: -p[0])
+        by_centroid = sorted((p for p in pairs if p[1] <= self.max_centroid_distance), key=lambda p: p[1])
+        for _, _, index, track_id in itertools.chain(by_iou, by_centroid):
+            if index in matches or track_id in used_tracks:
+                continue
+            matches[index] = track_id
+            used_tracks.add(track_id)
+        return matches
+
+    def update(self, boxes: Sequence[Box], timestamp: float = None) -> List[int]:
+        """Associate this frame's ``boxes`` with tracks; returns one ID per box."""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        matches = self._match(boxes, timestamp)
+        track_ids = []
+        self.born = []
+        for index, box in enumerate(boxes):
+            track_id = matches.get(index)
+            if track_id is None:
+                track_id = next(self._ids)
+                self.tracks[track_id] = Track(track_id, box, timestamp)
+                self.born.append(track_id)
+            else:
+                track = self.tracks[track_id]
+                self._observe(track, box, timestamp)
+                track.hits += 1
+                track.missed = 0
+            track_ids.append(track_id)
+
+        seen = set(track_ids)
+        self.expired = []
+        for track_id, track in list(self.tracks.items()):
+            if track_id in seen:
+                continue
+            track.missed += 1
+            if track.missed > self.max_missed:
+                del self.tracks[track_id]
+                self.expired.append(track_id)
+        return track_ids
+
+
+class MotionTracker(IoUTracker):
+    """IoU tracker with a smoothed constant-velocity model per track."""
+
+    def __init__(self, *args, velocity_smoothing: float = 0.5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.velocity_smoothing = float(velocity_smoothing)
+
+    def _reference_box(self, track: Track, timestamp: float) -> Box:
+        return track.predicted(timestamp)
+
+    def _observe(self, track: Track, box: Box, timestamp: float) -> None:
+        dt = timestamp - track.timestamp
+        if dt > 0:
+            alpha = self.velocity_smoothing
+            measured = [(new - old) / dt for new, old in zip(box, track.box)]
+            track.velocity = tuple(alpha * m + (1.0 - alpha) * v for m, v in zip(measured, track.velocity))
+        super()._observe(track, box, timestamp)
+
+    def predict(self, timestamp: float) -> Dict[int, Box]:
+        """Extrapolated box of every live track at ``timestamp``."""
+        return {track_id: track.predicted(timestamp) for track_id, track in self.tracks.items()}
+
+    def max_speed(self) -> float:
+        """Fastest box-edge speed across tracks, in pixels per second."""
+        return max((max(abs(v) for v in track.velocity) for track in self.tracks.values()), default=0.0)
+
+
+# Person boxes drawn by the helmet pipeline; their tracks are the worker IDs.
+_WORKER_LABELS = {"worker"}
+
+
+def _payload_box(box: Dict) -> Box:
+    return (box["x1"], box["y1"], box["x2"], box["y2"])
+
+
+class DetectionTracker:
+    """Track the boxes of each inference snapshot for one camera.
+
+    ``observe`` is called with every fresh ``{model_key: result}`` snapshot;
+    it tracks each model's boxes per label, tags them with ``track_id`` and,
+    where they overlap a tracked worker, with the worker's stable
+    ``worker_id``. ``propagate`` returns a copy of the last snapshot with its
+    boxes moved to where their tracks predict them at the given time.
+    ``stable`` tells the camera loop no track appeared, disappeared or moved
+    fast at the last inference cycle, so full detection can run less often.
+    """
+
+    def __init__(self, max_stable_speed: float = 40.0, max_missed: int = 3, max_extrapolation_seconds: float = 1.0):
+        self.max_stable_speed = float(max_stable_speed)
+        self.max_missed = int(max_missed)
+        self.max_extrapolation_seconds = float(max_extrapolation_seconds)
+        self._trackers: Dict[Tuple[str, str], MotionTracker] = {}
+        self._box_tracks = []
+        self._timestamp = None
+        self.stable = False
+
+    def _tracker(self, key) -> MotionTracker:
+        tracker = self._trackers.get(key)
+        if tracker is None:
+            tracker = MotionTracker(max_missed=self.max_missed)
+            self._trackers[key] = tracker
+        return tracker
+
+    def observe(self, snapshot: Dict, timestamp: float = None) -> Dict:
+        """Assign IDs to ``snapshot``'s boxes in place and remember them for propagation."""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        grouped = {}
+        for model_key, result in snapshot.items():
+            if result.get("status") != "ok":
+                continue
+            for box in (result.get("payload") or {}).get("boxes") or []:
+                grouped.setdefault((model_key, str(box.get("label", ""))), []).append(box)
+
+        changed = False
+        box_tracks = []
+        worker_boxes = {}
+        for key, boxes in grouped.items():
+            tracker = self._tracker(key)
+            track_ids = tracker.update([_payload_box(box) for box in boxes], timestamp)
+            changed = changed or bool(tracker.born or tracker.expired)
+            for box, track_id in zip(boxes, track_ids):
+                box["track_id"] = track_id
+                box_tracks.append((box, tracker, track_id))
+                if key[1] in _WORKER_LABELS:
+                    box["worker_id"] = track_id
+                    worker_boxes[track_id] = _payload_box(box)
+
+        # Models without a box group this cycle still age their tracks out.
+        for key, tracker in self._trackers.items():
+            if key not in grouped and tracker.tracks:
+                tracker.update([], timestamp)
+                changed = changed or bool(tracker.expired)
+
+        if worker_boxes:
+            for box, _, _ in box_tracks:
+                if "worker_id" in box:
+                    continue
+                own = _payload_box(box)
+                best_id, best_iou = None, 0.1
+                for worker_id, worker_box in worker_boxes.items():
+                    iou = box_iou(own, worker_box)
+                    if iou > best_iou:
+                        best_id, best_iou = worker_id, iou
+                if best_id is not None:
+                    box["worker_id"] = best_id
+
+        fast = any(tracker.max_speed() > self.max_stable_speed for tracker in self._trackers.values())
+        self.stable = bool(box_tracks) and not changed and not fast
+        self._box_tracks = box_tracks
+        self._timestamp = timestamp
+        return snapshot
+
+    def propagate(self, snapshot: Dict, timestamp: float = None) -> Dict:
+        """Copy of ``snapshot`` (the last observed one) with boxes moved to their predicted positions."""
+        if not self._box_tracks or self._timestamp is None:
+            return snapshot
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        # Never extrapolate far past the last detection (e.g. if inference stalls).
+        timestamp = min(timestamp, self._timestamp + self.max_extrapolation_seconds)
+        moved = {}
+        for box, tracker, track_id in self._box_tracks:
+            track = tracker.tracks.get(track_id)
+            if track is None:
+                continue
+            x1, y1, x2, y2 = track.predicted(timestamp)
+            moved[id(box)] = {"x1": int(x1), "y1": int(y1), "x2": int(x2), "y2": int(y2)}
+
+        propagated = {}
+        for model_key, result in snapshot.items():
+            boxes = (result.get("payload") or {}).get("boxes")
+            if not boxes:
+                propagated[model_key] = result
+                continue
+            payload = dict(result["payload"])
+            payload["boxes"] = [{**box, **moved[id(box)]} if id(box) in moved else box for box in boxes]
+            propagated[model_key] = {**result, "payload": payload}
+        return propagated
+
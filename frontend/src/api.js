@@ -82,6 +82,7 @@ export const api = {
     const qs = new URLSearchParams(params).toString();
     return request(`/alerts/${qs ? "?" + qs : ""}`);
   },
+  getAlert: (id) => request(`/alerts/${id}/`),
   acknowledgeAlert: (id) => request(`/alerts/${id}/acknowledge/`, { method: "PATCH" }),
   exportAlertsExcel: async (params = {}) => {
     const qs = new URLSearchParams(params).toString();
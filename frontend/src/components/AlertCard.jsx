@@ -20,6 +20,7 @@ export default function AlertCard({ alert, compact = false, onClick }) {
       )}
       <div className="text-[8px] text-zinc-600 mt-1">
         {alert.camera_name} &middot; {formatTime(alert.created_at)}
+        {alert.occurrence_count > 1 && <> &middot; seen {alert.occurrence_count}&times;</>}
       </div>
     </div>
   );
@@ -1,8 +1,13 @@
+import { useRef } from "react";
 import Badge from "./Badge";
+import OverlayCanvas from "./OverlayCanvas";
 import useCameraStream from "../hooks/useCameraStream";
 
 export default function CameraFeed({ camera, isHero = false, onClick, onDelete, badges = [], overlays = null, isDeleting = false, streamDisabled = false, inference = null }) {
-  const { src, status } = useCameraStream(streamDisabled ? null : camera.id, overlays);
+  // Vector mode: raw frames plus overlay metadata, drawn here so overlay
+  // toggles need no server work.
+  const { src, status, overlay } = useCameraStream(streamDisabled ? null : camera.id, overlays, { vector: true });
+  const imgRef = useRef(null);
   const inferenceStatus = inference?.status || "unknown";
   const aiLabel = streamDisabled
     ? "AI DEMO"
@@ -38,11 +43,15 @@ export default function CameraFeed({ camera, isHero = false, onClick, onDelete,
     >
       {/* WebSocket JPEG stream */}
       {src ? (
-        <img
-          src={src}
-          alt={camera.name}
-          className="absolute inset-0 w-full h-full object-cover"
-        />
+        <>
+          <img
+            ref={imgRef}
+            src={src}
+            alt={camera.name}
+            className="absolute inset-0 w-full h-full object-cover"
+          />
+          <OverlayCanvas overlay={overlay} overlays={overlays} imgRef={imgRef} fit="cover" />
+        </>
       ) : (
         <div className="absolute inset-0 flex flex-col items-center justify-center bg-zinc-950">
           <svg viewBox="0 0 24 24" className="w-8 h-8 text-zinc-700 mb-2" fill="none" stroke="currentColor" strokeWidth="1.5">
@@ -0,0 +1,41 @@
+import { useEffect, useRef } from "react";
+import { drawDetections } from "../overlays";
+
+/**
+ * Canvas laid over a stream <img> that draws a vector-mode overlay message.
+ * `fit` must match the image's object-fit ("cover" or "contain"); frame
+ * coordinates are scaled from the overlay's frame size, or the image's
+ * natural size when the message has none.
+ */
+export default function OverlayCanvas({ overlay, overlays = null, imgRef, fit = "cover" }) {
+  const canvasRef = useRef(null);
+
+  useEffect(() => {
+    const canvas = canvasRef.current;
+    if (!canvas) return;
+    const rect = canvas.getBoundingClientRect();
+    const w = Math.round(rect.width);
+    const h = Math.round(rect.height);
+    if (canvas.width !== w || canvas.height !== h) {
+      canvas.width = w;
+      canvas.height = h;
+    }
+    const ctx = canvas.getContext("2d");
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    if (!overlay) return;
+
+    const img = imgRef?.current;
+    const vW = overlay.width || img?.naturalWidth;
+    const vH = overlay.height || img?.naturalHeight;
+    if (!vW || !vH || !w || !h) return;
+
+    const scale = fit === "contain" ? Math.min(w / vW, h / vH) : Math.max(w / vW, h / vH);
+    const offX = (w - vW * scale) / 2;
+    const offY = (h - vH * scale) / 2;
+    const tx = (x) => offX + x * scale;
+    const ty = (y) => offY + y * scale;
+    drawDetections(ctx, overlay.detections, overlays, tx, ty, Math.min(1.5, Math.max(0.6, scale)));
+  }, [overlay, Array.isArray(overlays) ? overlays.join(",") : "__all__", fit]);
+
+  return <canvas ref={canvasRef} className="absolute inset-0 w-full h-full pointer-events-none" />;
+}
@@ -5,13 +5,20 @@ import { useEffect, useRef, useState } from "react";
  * latest frame.  The blob URL is revoked automatically when a new frame
  * arrives or the hook unmounts.
  *
+ * In vector mode the server sends raw frames, each preceded by an overlay
+ * message with the detections to draw on it; `overlay` holds the message
+ * for the current frame and overlay toggles are applied client-side.
+ *
  * @param {number|null} cameraId  Camera PK (null to disconnect)
  * @param {string[]|undefined|null} overlays  Model keys for annotation overlays; omit/null for all
- * @returns {{ src: string|null, status: "connecting"|"live"|"error" }}
+ * @param {{ vector?: boolean }} options
+ * @returns {{ src: string|null, status: "connecting"|"live"|"error", overlay: object|null }}
  */
-export default function useCameraStream(cameraId, overlays = null) {
+export default function useCameraStream(cameraId, overlays = null, { vector = false } = {}) {
   const [src, setSrc] = useState(null);
   const [status, setStatus] = useState("connecting");
+  const [overlay, setOverlay] = useState(null);
+  const pendingOverlayRef = useRef(null);
   const wsRef = useRef(null);
   const prevBlobRef = useRef(null);
   const reconnectRef = useRef(null);
@@ -37,14 +44,26 @@ export default function useCameraStream(cameraId, overlays = null) {
       ws.onopen = () => {
         if (disposed) { ws.close(); return; }
         setStatus("live");
-        // Send overlay configuration only when explicitly provided.
-        if (Array.isArray(overlays)) {
+        if (vector) {
+          ws.send(JSON.stringify({ mode: "vector" }));
+        } else if (Array.isArray(overlays)) {
+          // Send overlay configuration only when explicitly provided.
           ws.send(JSON.stringify({ overlays }));
         }
       };
 
       ws.onmessage = (e) => {
         if (disposed) return;
+        if (typeof e.data === "string") {
+          // Overlay metadata for the binary frame that follows it.
+          try {
+            const msg = JSON.parse(e.data);
+            if (msg.type === "overlay") pendingOverlayRef.current = msg;
+          } catch {
+            // ignore malformed metadata
+          }
+          return;
+        }
         // Revoke previous blob to avoid memory leaks
         if (prevBlobRef.current) URL.revokeObjectURL(prevBlobRef.current);
 
@@ -52,6 +71,10 @@ export default function useCameraStream(cameraId, overlays = null) {
         const blobUrl = URL.createObjectURL(blob);
         prevBlobRef.current = blobUrl;
         setSrc(blobUrl);
+        if (vector) {
+          setOverlay(pendingOverlayRef.current);
+          pendingOverlayRef.current = null;
+        }
         setStatus("live");
       };
 
@@ -81,16 +104,18 @@ export default function useCameraStream(cameraId, overlays = null) {
         prevBlobRef.current = null;
       }
       setSrc(null);
+      setOverlay(null);
     };
-  }, [cameraId]);
+  }, [cameraId, vector]);
 
   // When overlays change, send updated config over the existing WS
+  // (vector streams filter overlays client-side instead).
   useEffect(() => {
     const ws = wsRef.current;
-    if (ws && ws.readyState === WebSocket.OPEN && Array.isArray(overlays)) {
+    if (!vector && ws && ws.readyState === WebSocket.OPEN && Array.isArray(overlays)) {
       ws.send(JSON.stringify({ overlays }));
     }
   }, [Array.isArray(overlays) ? overlays.join(",") : "__all__"]);
 
-  return { src, status };
+  return { src, status, overlay };
 }
@@ -8,6 +8,8 @@ import { api } from "../api";
 
 const ROUTE_LOADING_MIN_MS = 420;
 const MAX_TOASTS = 3;
+// Alert ids already toasted and counted; broadcasts may repeat an alert.
+const MAX_SEEN_ALERT_IDS = 500;
 
 export default function DashboardLayout() {
   const [toasts, setToasts] = useState([]);
@@ -15,6 +17,7 @@ export default function DashboardLayout() {
   const [routeLoading, setRouteLoading] = useState(false);
   const [pendingPath, setPendingPath] = useState(null);
   const toastSeqRef = useRef(0);
+  const seenAlertIdsRef = useRef(new Set());
   const location = useLocation();
 
   useEffect(() => {
@@ -25,21 +28,28 @@ export default function DashboardLayout() {
 
   useEffect(() => {
     const socket = createAlertSocket((msg) => {
-      if (msg.type === "alert.new") {
-        setToasts((prev) => {
-          const alertId = msg.alert?.id ?? null;
-          if (alertId != null && prev.some((toast) => toast.__alertId === alertId)) {
-            return prev;
+      if (msg.type === "alert.batch") {
+        const seen = seenAlertIdsRef.current;
+        const added = [];
+        for (const alert of msg.alerts || []) {
+          if (alert.id != null) {
+            if (seen.has(alert.id)) continue;
+            seen.add(alert.id);
+            if (seen.size > MAX_SEEN_ALERT_IDS) seen.delete(seen.values().next().value);
           }
-          const toast = {
-            ...msg.alert,
-            __alertId: alertId,
+          added.push(alert);
+        }
+        if (!added.length) return;
+        setToasts((prev) => [
+          ...prev,
+          ...added.map((alert) => ({
+            ...alert,
+            __alertId: alert.id ?? null,
             __toastId: `toast-${Date.now()}-${++toastSeqRef.current}`,
-          };
-          const next = [...prev, toast];
-          return next.slice(-MAX_TOASTS);
-        });
-        setAlertCount((c) => c + 1);
+          })),
+        ].slice(-MAX_TOASTS));
+        // Count only what was added, so the badge matches the alerts shown.
+        setAlertCount((c) => c + added.length);
       }
       if (msg.type === "alert.acknowledged") {
         setAlertCount((c) => Math.max(0, c - 1));
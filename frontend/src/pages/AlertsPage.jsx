@@ -320,7 +320,10 @@ export default function AlertsPage() {
                   <div className={`w-1 h-7 rounded-sm ${sevColor(alert.severity)}`} />
                   <div>
                     <div className="text-[11px] font-medium text-zinc-100">{alert.message}</div>
-                    <div className="text-[9px] text-zinc-600 mt-0.5">{alert.model_key} detection</div>
+                    <div className="text-[9px] text-zinc-600 mt-0.5">
+                      {alert.model_key} detection
+                      {alert.occurrence_count > 1 && <> &middot; seen {alert.occurrence_count}&times;</>}
+                    </div>
                   </div>
                   <div className="text-[10px] text-zinc-500">{alert.camera_name}</div>
                   <div className="text-[10px] text-zinc-600">{formatTime(alert.created_at)}</div>
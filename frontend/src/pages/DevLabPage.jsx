@@ -1,7 +1,9 @@
 import { useState, useEffect, useRef } from "react";
 import { api } from "../api";
+import OverlayCanvas from "../components/OverlayCanvas";
 import Toggle from "../components/Toggle";
 import useCameraStream from "../hooks/useCameraStream";
+import { drawDetections } from "../overlays";
 
 const TABS = ["Video Analysis", "Live Camera Test", "Threshold Tuning"];
 const ALL_MODELS = ["helmet", "fatigue", "vest", "gloves", "goggles", "boots", "faceshield", "safetysuit"];
@@ -73,123 +75,6 @@ export default function DevLabPage() {
   );
 }
 
-// ============================================================
-// Client-side canvas annotation drawing
-// ============================================================
-
-const ANNO_COLORS = {
-  helmet: "rgb(80,200,0)",
-  fatigue: "rgb(255,140,0)",
-  vest: "rgb(50,160,255)",
-  gloves: "rgb(255,220,0)",
-  goggles: "rgb(0,200,220)",
-  boots: "rgb(255,220,0)",
-  faceshield: "rgb(0,200,220)",
-  safetysuit: "rgb(50,160,255)",
-  red: "rgb(255,60,0)",
-  green: "rgb(80,200,0)",
-  blue: "rgb(50,160,255)",
-  yellow: "rgb(255,220,0)",
-  cyan: "rgb(0,200,220)",
-  orange: "rgb(255,140,0)",
-  white: "rgb(255,255,255)",
-};
-
-function drawPPEBoxes(ctx, payload, modelKey, tx, ty, s) {
-  const defaultColor = ANNO_COLORS[modelKey] || ANNO_COLORS.white;
-  for (const box of payload.boxes || []) {
-    const x1 = tx(box.x1), y1 = ty(box.y1);
-    const x2 = tx(box.x2), y2 = ty(box.y2);
-    const label = box.label || modelKey;
-    const color = ANNO_COLORS[box.color] || defaultColor;
-
-    ctx.strokeStyle = color;
-    ctx.lineWidth = 2;
-    ctx.strokeRect(x1, y1, x2 - x1, y2 - y1);
-
-    const fontSize = Math.max(10, Math.round(12 * s));
-    ctx.font = `bold ${fontSize}px sans-serif`;
-    const tm = ctx.measureText(label);
-    const lh = fontSize + 4;
-    ctx.fillStyle = color;
-    ctx.fillRect(x1, y1 - lh, tm.width + 8, lh);
-    ctx.fillStyle = "#000";
-    ctx.fillText(label, x1 + 4, y1 - 3);
-  }
-}
-
-function drawFatigue(ctx, payload, tx, ty, s) {
-  const color = ANNO_COLORS.fatigue;
-  const isFatigued = payload.is_fatigued;
-  const boxColor = isFatigued ? ANNO_COLORS.red : color;
-  const faceBox = payload.face_box;
-
-  if (faceBox) {
-    const x1 = tx(faceBox.x1), y1 = ty(faceBox.y1);
-    const x2 = tx(faceBox.x2), y2 = ty(faceBox.y2);
-    ctx.strokeStyle = boxColor;
-    ctx.lineWidth = 2;
-    ctx.strokeRect(x1, y1, x2 - x1, y2 - y1);
-
-    const hybrid = payload.hybrid_score || 0;
-    const tag = isFatigued ? "FATIGUED" : "Alert";
-    const label = `${tag} (${Math.round(hybrid * 100)}%)`;
-    const fontSize = Math.max(10, Math.round(12 * s));
-    ctx.font = `bold ${fontSize}px sans-serif`;
-    const tm = ctx.measureText(label);
-    const lh = fontSize + 4;
-    ctx.fillStyle = boxColor;
-    ctx.fillRect(x1, y1 - lh, tm.width + 8, lh);
-    ctx.fillStyle = "#000";
-    ctx.fillText(label, x1 + 4, y1 - 3);
-  }
-
-  ctx.fillStyle = color;
-  for (const pt of payload.landmarks || []) {
-    if (pt.length >= 2) {
-      ctx.beginPath();
-      ctx.arc(tx(pt[0]), ty(pt[1]), Math.max(1, 1.5 * s), 0, Math.PI * 2);
-      ctx.fill();
-    }
-  }
-
-  const pose = payload.pose_line;
-  if (pose) {
-    const sx = tx(pose.start[0]), sy = ty(pose.start[1]);
-    const ex = tx(pose.end[0]), ey = ty(pose.end[1]);
-    ctx.strokeStyle = ANNO_COLORS.cyan;
-    ctx.lineWidth = 2;
-    ctx.beginPath();
-    ctx.moveTo(sx, sy);
-    ctx.lineTo(ex, ey);
-    ctx.stroke();
-    const angle = Math.atan2(ey - sy, ex - sx);
-    const tipLen = 8 * s;
-    ctx.beginPath();
-    ctx.moveTo(ex, ey);
-    ctx.lineTo(ex - tipLen * Math.cos(angle - 0.4), ey - tipLen * Math.sin(angle - 0.4));
-    ctx.moveTo(ex, ey);
-    ctx.lineTo(ex - tipLen * Math.cos(angle + 0.4), ey - tipLen * Math.sin(angle + 0.4));
-    ctx.stroke();
-  }
-
-  if (faceBox) {
-    const lines = [];
-    if (payload.ear != null) lines.push(`EAR ${payload.ear.toFixed(2)}`);
-    if (payload.mar != null) lines.push(`MAR ${payload.mar.toFixed(2)}`);
-    if (payload.head_tilt_degrees != null) lines.push(`Tilt ${payload.head_tilt_degrees.toFixed(1)}`);
-    const mfs = Math.max(9, Math.round(11 * s));
-    ctx.font = `${mfs}px monospace`;
-    ctx.fillStyle = color;
-    const xT = tx(faceBox.x2) + 5;
-    let yT = ty(faceBox.y1) + 14 * s;
-    for (const txt of lines) {
-      ctx.fillText(txt, xT, yT);
-      yT += 16 * s;
-    }
-  }
-}
-
 // ============================================================
 // Video Analysis — live WebSocket streaming
 // ============================================================
@@ -443,14 +328,7 @@ function VideoAnalysis() {
             const tx = (x) => offX + x * scale;
             const ty = (y) => offY + y * scale;
 
-            const active = overlaysRef.current;
-            for (const [key, det] of Object.entries(detections)) {
-              if (!active.includes(key)) continue;
-              if (det.status !== "ok") continue;
-              const payload = det.payload || {};
-              if (key === "fatigue") drawFatigue(ctx, payload, tx, ty, scale);
-              else drawPPEBoxes(ctx, payload, key, tx, ty, scale);
-            }
+            drawDetections(ctx, detections, overlaysRef.current, tx, ty, scale);
           }
         }
       }
@@ -723,11 +601,15 @@ function LiveCameraTest() {
 }
 
 function LiveCameraPreview({ cameraId, overlays }) {
-  const { src, status } = useCameraStream(cameraId, overlays);
+  const { src, status, overlay } = useCameraStream(cameraId, overlays, { vector: true });
+  const imgRef = useRef(null);
   return (
     <div className="bg-surface-alt border border-zinc-800 rounded-lg aspect-video overflow-hidden relative">
       {src ? (
-        <img src={src} alt="Live test" className="w-full h-full object-contain" />
+        <>
+          <img ref={imgRef} src={src} alt="Live test" className="w-full h-full object-contain" />
+          <OverlayCanvas overlay={overlay} overlays={overlays} imgRef={imgRef} fit="contain" />
+        </>
       ) : (
         <div className="absolute inset-0 flex items-center justify-center">
           <span className="text-[10px] text-zinc-600">
@@ -291,7 +291,7 @@ export default function FeedsPage() {
 }
 
 function AddCameraDialog({ onClose, onSubmit }) {
-  const [form, setForm] = useState({ name: "", source_url: "", location: "" });
+  const [form, setForm] = useState({ name: "", source_url: "", inference_source_url: "", location: "" });
   const [devices, setDevices] = useState([]);
   const [scanning, setScanning] = useState(false);
   const [preview, setPreview] = useState(null);       // object URL for preview image
@@ -455,6 +455,12 @@ function AddCameraDialog({ onClose, onSubmit }) {
             </div>
           )}
 
+          <FormField
+            label="Inference Sub-stream"
+            placeholder="e.g. rtsp://nvr/ch1/sub (optional, lower resolution)"
+            value={form.inference_source_url}
+            onChange={(v) => setForm((f) => ({ ...f, inference_source_url: v }))}
+          />
           <FormField
             label="Location"
             placeholder="e.g. Building B, Floor 2 (optional)"
@@ -1,11 +1,24 @@
-export function createAlertSocket(onMessage) {
+// Alerts arrive as `alert.batch` frames of summaries (no payload). Pass
+// { cameras, severities } to only receive matching alerts; the full alert is
+// requested with requestDetail(id) and answered as `alert.detail`.
+export function createAlertSocket(onMessage, filter = {}) {
   const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
   const url = `${protocol}//${window.location.host}/ws/alerts/`;
   let ws = null;
   let reconnectTimer = null;
+  let currentFilter = filter;
+
+  function send(message) {
+    if (ws && ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify(message));
+  }
 
   function connect() {
     ws = new WebSocket(url);
+    ws.onopen = () => {
+      if (currentFilter.cameras?.length || currentFilter.severities?.length) {
+        send({ filter: currentFilter });
+      }
+    };
     ws.onmessage = (e) => {
       try {
         const data = JSON.parse(e.data);
@@ -23,6 +36,13 @@ export function createAlertSocket(onMessage) {
   connect();
 
   return {
+    setFilter(next) {
+      currentFilter = next || {};
+      send({ filter: currentFilter });
+    },
+    requestDetail(id) {
+      send({ action: "detail", id });
+    },
     close() {
       clearTimeout(reconnectTimer);
       if (ws) ws.close();
@@ -0,0 +1,179 @@
+"""Compare latency and detection parity of exported models against PyTorch.
+
+For every YOLO model in MODEL_DEFINITIONS, runs the ``.pt`` weights and the
+ONNX / OpenVINO export over the same frames and reports median and p95
+latency plus how many PyTorch detections the export reproduces (same class,
+IoU >= 0.5) and the largest confidence drift among matched boxes.
+
+Usage:
+    python scripts/benchmark_model_backends.py --backend onnx --int8
+    python scripts/benchmark_model_backends.py --backend openvino --source uploads/dev_videos/site.mp4 helmet
+Options:
+    --source   image directory, image or video (default: Ultralytics sample images)
+    --frames   number of frames to time (default 50)
+    --json     write the results as JSON to this path
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = ROOT / "backend"
+IOU_THRESHOLD = 0.5
+CONF_THRESHOLD = 0.35
+WARMUP_RUNS = 3
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def _load_frames(source, limit):
+    if source is None:
+        import ultralytics
+
+        source = Path(ultralytics.__file__).parent / "assets"
+    source = Path(source)
+    if source.is_dir():
+        paths = sorted(p for p in source.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        frames = [cv2.imread(str(p)) for p in paths]
+    elif source.suffix.lower() in IMAGE_SUFFIXES:
+        frames = [cv2.imread(str(source))]
+    else:
+        capture = cv2.VideoCapture(str(source))
+        frames = []
+        while len(frames) < limit:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(frame)
+        capture.release()
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        raise SystemExit(f"No frames could be read from {source}")
+    return [frames[i % len(frames)] for i in range(limit)]
+
+
+def _detections(result):
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+    xyxy = boxes.xyxy.cpu().numpy()
+    conf = boxes.conf.cpu().numpy()
+    cls = boxes.cls.cpu().numpy().astype(int)
+    return list(zip(xyxy, conf, cls))
+
+
+def _iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _parity(reference, candidate):
+    matched, max_conf_delta = 0, 0.0
+    used = set()
+    for box, conf, cls in reference:
+        best, best_iou = None, IOU_THRESHOLD
+        for index, (other_box, _, other_cls) in enumerate(candidate):
+            if index in used or other_cls != cls:
+                continue
+            iou = _iou(box, other_box)
+            if iou >= best_iou:
+                best, best_iou = index, iou
+        if best is not None:
+            used.add(best)
+            matched += 1
+            max_conf_delta = max(max_conf_delta, abs(float(conf) - float(candidate[best][1])))
+    return matched, max_conf_delta
+
+
+def _time_model(model, frames):
+    for frame in frames[:WARMUP_RUNS]:
+        model(frame, conf=CONF_THRESHOLD, verbose=False)
+    latencies, outputs = [], []
+    for frame in frames:
+        started = time.perf_counter()
+        result = model(frame, conf=CONF_THRESHOLD, verbose=False)[0]
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        outputs.append(_detections(result))
+    return latencies, outputs
+
+
+def _summary(latencies):
+    ordered = sorted(latencies)
+    return {
+        "median_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+    }
+
+
+def main():
+    sys.path.insert(0, str(BACKEND_DIR))
+    from ultralytics import YOLO
+
+    from config import MODEL_DEFINITIONS
+    from model_export import export_model
+
+    parser = argparse.ArgumentParser(description="Benchmark exported YOLO models against PyTorch.")
+    parser.add_argument("models", nargs="*", help="Model keys (default: every YOLO model).")
+    parser.add_argument("--backend", choices=("onnx", "openvino"), default="onnx")
+    parser.add_argument("--int8", action="store_true")
+    parser.add_argument("--source", default=None)
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    frames = _load_frames(args.source, max(1, args.frames))
+    results = {}
+    for model_key, definition in MODEL_DEFINITIONS.items():
+        if "backend" not in definition or (args.models and model_key not in args.models):
+            continue
+        weights_path = definition["weights_path"]
+        if not Path(weights_path).exists():
+            print(f"[skip] {model_key}: weights missing")
+            continue
+        try:
+            exported = export_model(weights_path, args.backend, int8=args.int8)
+        except Exception as exc:
+            print(f"[fail] {model_key}: export failed: {exc}")
+            continue
+
+        torch_latency, torch_out = _time_model(YOLO(weights_path), frames)
+        export_latency, export_out = _time_model(YOLO(str(exported), task="detect"), frames)
+        reference_total = sum(len(items) for items in torch_out)
+        matched, conf_delta = 0, 0.0
+        for reference, candidate in zip(torch_out, export_out):
+            frame_matched, frame_delta = _parity(reference, candidate)
+            matched += frame_matched
+            conf_delta = max(conf_delta, frame_delta)
+
+        torch_stats, export_stats = _summary(torch_latency), _summary(export_latency)
+        results[model_key] = {
+            "backend": args.backend,
+            "int8": args.int8,
+            "torch": torch_stats,
+            "exported": export_stats,
+            "speedup": round(torch_stats["median_ms"] / max(export_stats["median_ms"], 1e-6), 2),
+            "reference_detections": reference_total,
+            "exported_detections": sum(len(items) for items in export_out),
+            "parity_recall": round(matched / reference_total, 4) if reference_total else None,
+            "max_confidence_delta": round(conf_delta, 4),
+        }
+        row = results[model_key]
+        print(
+            f"{model_key:<11} torch {torch_stats['median_ms']:>7.1f} ms  "
+            f"{args.backend}{'-int8' if args.int8 else ''} {export_stats['median_ms']:>7.1f} ms  "
+            f"x{row['speedup']:<5} parity {row['parity_recall']}  max dconf {row['max_confidence_delta']}"
+        )
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
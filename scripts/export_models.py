@@ -0,0 +1,62 @@
+"""Export the YOLO detectors in MODEL_DEFINITIONS for ONNX Runtime or OpenVINO.
+
+Exports are cached next to each ``.pt`` file and skipped while fresh; pass
+``--force`` to rebuild. Select the runtime at serve time with
+``MODEL_RUNTIME_BACKEND`` (or ``<KEY>_MODEL_BACKEND``) and ``MODEL_RUNTIME_INT8``.
+
+Usage:
+    python scripts/export_models.py --backend onnx
+    python scripts/export_models.py --backend openvino --int8 --data coco8.yaml helmet vest
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = ROOT / "backend"
+
+
+def main():
+    sys.path.insert(0, str(BACKEND_DIR))
+    from config import MODEL_DEFINITIONS, ensure_ml_models_layout
+    from model_export import DEFAULT_EXPORT_IMGSZ, export_model
+
+    parser = argparse.ArgumentParser(description="Export YOLO model weights for a CPU runtime.")
+    parser.add_argument("models", nargs="*", help="Model keys to export (default: every YOLO model).")
+    parser.add_argument("--backend", choices=("onnx", "openvino"), default="onnx")
+    parser.add_argument("--int8", action="store_true", help="Also quantize weights to INT8.")
+    parser.add_argument("--imgsz", type=int, default=DEFAULT_EXPORT_IMGSZ)
+    parser.add_argument("--data", default=None, help="Calibration dataset YAML for OpenVINO INT8.")
+    parser.add_argument("--force", action="store_true", help="Re-export even if a fresh export exists.")
+    parser.add_argument("--skip-person", action="store_true", help="Do not export the shared person detector.")
+    args = parser.parse_args()
+
+    ensure_ml_models_layout()
+    weights = {}
+    for model_key, definition in MODEL_DEFINITIONS.items():
+        if "backend" not in definition or (args.models and model_key not in args.models):
+            continue
+        weights.setdefault(definition["weights_path"], model_key)
+        if definition.get("person_model_path") and not args.skip_person:
+            weights.setdefault(definition["person_model_path"], "person")
+
+    failures = 0
+    for weights_path, label in weights.items():
+        if not Path(weights_path).exists():
+            print(f"[skip] {label}: weights missing at {weights_path}")
+            continue
+        try:
+            target = export_model(
+                weights_path, args.backend, int8=args.int8, imgsz=args.imgsz, data=args.data, force=args.force
+            )
+        except Exception as exc:
+            failures += 1
+            print(f"[fail] {label}: {exc}")
+            continue
+        print(f"[ok]   {label}: {Path(target).relative_to(ROOT).as_posix()}")
+
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()